@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Optional, Protocol
+
+
+class CheckpointPort(Protocol):
+    """Porta para o cursor de listagem persistido entre execucoes."""
+
+    def load(self, name: str) -> Optional[str]:
+        """Retorna o ultimo cursor gravado para `name` (None quando nao existe)."""
+        ...
+
+    def save(self, name: str, start_after: Optional[str]) -> None:
+        """Grava o cursor; None apaga o checkpoint (proxima execucao recomeca do inicio)."""
+        ...
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import ContextManager, Protocol
+
+
+class BodyStream(Protocol):
+    """Corpo de uma resposta HTTP lido sob demanda."""
+
+    def read(self, size: int = -1) -> bytes: ...
+
+
+class DownloaderPort(Protocol):
+    """Cliente HTTP usado pelos uploads por URL."""
+
+    def open(self, url: str) -> ContextManager[BodyStream]:
+        """Abre a resposta da URL sem carregar o corpo na memoria (erro para status >= 400)."""
+        ...
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import ContextManager, Protocol, Union
+
+
+class FileReaderPort(Protocol):
+    """Acesso somente leitura ao conteudo de arquivos locais."""
+
+    def open(self, path: Path) -> ContextManager[Union[bytes, memoryview]]:
+        """Expoe o conteudo do arquivo (ex.: mapeado em memoria); o buffer so vale dentro do `with`."""
+        ...
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Iterable, Protocol
+
+
+class KeyIndexPort(Protocol):
+    """Indice local de chaves existentes no bucket (evita HEADs por arquivo)."""
+
+    def exists_any(self, keys: Iterable[str]) -> bool:
+        """True se alguma das chaves existir no bucket."""
+        ...
+
+    def add(self, key: str) -> None:
+        """Registra uma chave enviada nesta execucao."""
+        ...
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    """Estado de um arquivo local ja tratado, valido enquanto `size` e `mtime_ns` nao mudarem."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    md5_hash: Optional[str] = None
+    origin: Optional[str] = None
+    s3_key: Optional[str] = None
+    uploaded: bool = False
+    ingested: bool = False
+
+
+class ManifestPort(Protocol):
+    """Manifesto local compartilhado por upload-batch e sample-local."""
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[ManifestEntry]:
+        """Retorna a entrada do arquivo se ele nao mudou desde o registro (mesmo tamanho e mtime)."""
+        ...
+
+    def record_upload(self, entry: ManifestEntry) -> None:
+        """Registra que o arquivo esta no bucket (enviado ou ja existente)."""
+        ...
+
+    def record_ingest(self, entry: ManifestEntry) -> None:
+        """Registra que o arquivo foi persistido no banco."""
+        ...
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+from project.application.ports.repository_port import RecordRow
+
+
+@dataclass(frozen=True)
+class ParsedSummary:
+    """Resultado do parse de um payload: o suficiente para persistir e mover sem parsear de novo."""
+
+    origin: Optional[str] = None
+    name: Optional[str] = None
+    sex: Optional[str] = None
+    birth_date: Optional[str] = None
+    records: tuple[RecordRow, ...] = ()
+
+
+class ParseCachePort(Protocol):
+    """Cache local de parse indexado pelo md5 do conteudo."""
+
+    def get(self, md5_hash: str) -> Optional[ParsedSummary]:
+        """Retorna o resumo gravado para o md5 (pela versao atual do parser) ou None."""
+        ...
+
+    def put(self, md5_hash: str, summary: ParsedSummary) -> None:
+        """Grava o resumo do md5, descartando os menos usados se o limite de tamanho for excedido."""
+        ...
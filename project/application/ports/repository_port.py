@@ -1,13 +1,69 @@
 from __future__ import annotations
 
-from typing import Protocol
+from dataclasses import dataclass, field
+from typing import Optional, Protocol, Sequence
+
+
+@dataclass(frozen=True)
+class RecordRow:
+    """Registro logico do NIST para findface.tb_nist_record (posicoes em bytes no objeto)."""
+
+    seq: int
+    record_type: int
+    idc: Optional[int]
+    offset: int
+    length: int
+    image_offset: Optional[int] = None
+    image_length: Optional[int] = None
+    image_format: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class IngestRow:
+    """Linha a ser consolidada em findface.tb_nist_ingest."""
+
+    s3_key: str
+    md5_hash: str
+    origin: Optional[str] = None
+    processed: bool = False
+    records: tuple[RecordRow, ...] = ()
+
+
+@dataclass
+class UpsertResult:
+    """Resultado de um upsert em lote, por chave S3."""
+
+    inserted: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    # Chave -> chave que ja guarda o mesmo md5 (conteudo duplicado, sem linha propria).
+    duplicates: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def persisted(self) -> set[str]:
+        """Chaves gravadas com sucesso (inseridas ou atualizadas)."""
+        return set(self.inserted) | set(self.updated)
 
 
 class RepositoryPort(Protocol):
     """Porta de persistencia e logs utilizada pela camada de aplicacao."""
 
-    def upsert_person_from_nist(self, person: object, origin_base: object, md5_hash: str) -> None:
-        """Persiste ou atualiza dados derivados do NIST com base no md5."""
+    def upsert_person_from_nist(
+        self, person: object, origin_base: object, md5_hash: str, records: Sequence[RecordRow] = ()
+    ) -> None:
+        """Persiste ou atualiza dados derivados do NIST com base no md5 (e o indice de registros, se informado)."""
+        ...
+
+    def upsert_many(self, rows: Sequence[IngestRow]) -> UpsertResult:
+        """Persiste um lote de linhas e informa quais chaves foram inseridas ou atualizadas."""
+        ...
+
+    def lookup_ingested(self, keys: Sequence[str]) -> dict[str, IngestRow]:
+        """Retorna, por chave S3, as linhas ja presentes em tb_nist_ingest."""
+        ...
+
+    def mark_processed(self, keys: Sequence[str]) -> int:
+        """Marca as chaves como processadas (estrategia `mark`) e retorna quantas foram atualizadas."""
         ...
 
     def log(self, level: str, message: str) -> None:
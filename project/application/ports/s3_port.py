@@ -1,27 +1,97 @@
 from __future__ import annotations
 
-from typing import Protocol, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, Optional, Protocol
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    """Metadados de um objeto obtidos na listagem (sem requisicoes adicionais)."""
+
+    key: str
+    etag: Optional[str] = None
+    size: Optional[int] = None
+
+    @property
+    def single_part_md5(self) -> Optional[str]:
+        """ETag como md5 (hex) quando o upload foi de parte unica; None para multipart."""
+        if not self.etag or "-" in self.etag:
+            return None
+        return self.etag.lower()
+
+
+@dataclass
+class DeleteResult:
+    """Resultado de uma remocao em lote (ou apenas a contagem, em dry-run)."""
+
+    listed: int = 0
+    removed: int = 0
+    failed: int = 0
+    errors: dict[str, str] = field(default_factory=dict)
+    dry_run: bool = False
+
+
+@dataclass
+class MoveResult:
+    """Resultado de uma movimentacao em lote, por chave de origem."""
+
+    moved: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    destinations: dict[str, str] = field(default_factory=dict)
 
 
 class S3Port(Protocol):
     """Porta de acesso ao S3/MinIO utilizada pela camada de aplicacao."""
 
-    def list_nists(self) -> Sequence[str]:
-        """Lista chaves com sufixo .nst sob o prefixo 'nist/'."""
+    def list_nists(self, start_after: Optional[str] = None, page_size: int = 1000) -> Iterator[str]:
+        """Percorre, sob demanda, chaves com sufixo .nst sob 'nist/' apos `start_after`."""
+        ...
+
+    def list_nist_objects(self, start_after: Optional[str] = None, page_size: int = 1000) -> Iterator[ObjectInfo]:
+        """Percorre objetos .nst sob 'nist/' com ETag e tamanho apos `start_after`."""
+        ...
+
+    def list_keys(self, prefix: str, start_after: Optional[str] = None) -> Iterator[str]:
+        """Percorre todas as chaves sob o prefixo (sem filtro de extensao)."""
         ...
 
     def read_bytes(self, key: str) -> bytes:
         """Le bytes de uma chave do bucket."""
         ...
 
+    def iter_bytes(self, key: str, chunk_size: int = 256 * 1024) -> Iterator[bytes]:
+        """Le o objeto em blocos, a medida que chegam da rede."""
+        ...
+
+    def read_header(self, key: str, max_bytes: int = 1024) -> bytes:
+        """Le apenas o registro Tipo-1 de uma chave usando requisicoes parciais (Range)."""
+        ...
+
     def move_processed(self, key: str, dest_key: str) -> None:
         """Move um objeto (copia e remove) para a chave de destino."""
         ...
 
+    def mark_processed(self, key: str) -> None:
+        """Marca o objeto como processado sem copia-lo (tag no proprio objeto)."""
+        ...
+
+    def move_many(self, moves: Iterable[tuple[str, str]]) -> MoveResult:
+        """Move varios objetos (copias concorrentes e remocao das origens em lote)."""
+        ...
+
     def upload_bytes(self, key: str, raw: bytes) -> None:
         """Envia bytes para a chave informada."""
         ...
 
+    def upload_file(self, key: str, path: Path) -> str:
+        """Envia um arquivo local lendo-o do disco (multipart acima do limite do adaptador) e retorna seu MD5."""
+        ...
+
+    def upload_stream(self, key: str, stream: BinaryIO) -> str:
+        """Envia um fluxo de tamanho desconhecido (ex.: corpo HTTP) sem carrega-lo inteiro e retorna seu MD5."""
+        ...
+
     def object_exists(self, key: str) -> bool:
         """Retorna True se o objeto existir no bucket."""
         ...
@@ -30,6 +100,6 @@ class S3Port(Protocol):
         """Remove um objeto específico do bucket."""
         ...
 
-    def delete_prefix(self, prefix: str) -> int:
-        """Remove todos os objetos que iniciam com o prefixo informado e retorna o total removido."""
+    def delete_prefix(self, prefix: str, dry_run: bool = False) -> DeleteResult:
+        """Remove (ou apenas conta, em dry-run) os objetos que iniciam com o prefixo informado."""
         ...
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from typing import Optional, Protocol
+
+
+class UrlJournalPort(Protocol):
+    """Diario de URLs ja concluidas, usado para retomar um indice interrompido."""
+
+    def is_done(self, url: str) -> bool:
+        """True se a URL ja foi enviada (ou encontrada no bucket) em uma execucao anterior."""
+        ...
+
+    def mark_done(self, url: str, status: str, key: Optional[str]) -> None:
+        """Registra a conclusao da URL."""
+        ...
@@ -1,13 +1,58 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import base64
+from dataclasses import dataclass, field
 from hashlib import md5
+from pathlib import Path
+
+from project.infra.nist_records import BytesLike
+
+
+@dataclass
+class Md5Digest:
+    """MD5 incremental: alimentado bloco a bloco enquanto os bytes trafegam.
+
+    Exemplo
+    >>> digest = Md5Digest()
+    >>> digest.update(b"a"); digest.update(b"bc")
+    >>> digest.finalize()
+    '900150983cd24fb0d6963f7d28e17f72'
+    >>> digest.content_md5()
+    'kAFQmDzST7DWlj99KOF/cg=='
+    """
+
+    size: int = 0
+    _hash: object = field(default_factory=md5, init=False, repr=False)
+
+    def update(self, chunk: BytesLike) -> None:
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    def finalize(self) -> str:
+        """MD5 (hex) dos bytes recebidos ate aqui, no formato gravado em tb_nist_ingest."""
+        return self._hash.hexdigest()
+
+    def content_md5(self) -> str:
+        """Mesmo digest em base64, no formato do cabecalho HTTP `Content-MD5`."""
+        return base64.b64encode(self._hash.digest()).decode("ascii")
 
 
 @dataclass
 class ChecksumService:
     """Servico responsavel pelo calculo de checksums."""
 
-    def md5_bytes(self, data: bytes) -> str:
-        """Calcula o hash MD5 (hex) para um buffer de bytes."""
+    def md5_bytes(self, data: BytesLike) -> str:
+        """Calcula o hash MD5 (hex) para um buffer (`bytes`, `memoryview` ou `mmap`), sem copia-lo."""
         return md5(data).hexdigest()
+
+    def new_md5(self) -> Md5Digest:
+        """Inicia um calculo incremental (update/finalize)."""
+        return Md5Digest()
+
+    def md5_file(self, path: Path, chunk_size: int = 1024 * 1024) -> str:
+        """Calcula o MD5 (hex) de um arquivo lendo-o em blocos, sem carrega-lo inteiro."""
+        digest = self.new_md5()
+        with Path(path).open("rb") as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.finalize()
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Tuple
+from dataclasses import dataclass, field
+from typing import Optional, Sequence, Tuple
 
-from project.infra.sanitizers import sanitize_text
-from project.infra.s3.s3_manager import _field_1_008
+from project.application.ports.parse_cache_port import ParsedSummary
+from project.application.ports.repository_port import RecordRow
+from project.infra.nist_records import (
+    BytesLike,
+    NistFormatError,
+    NistRecord,
+    image_format,
+    image_span,
+    iter_records,
+    read_type1,
+    structural_error,
+)
+from project.infra.sanitizers import normalize_sex, parse_date, sanitize_text
+from project.infra.s3.s3_manager import _index_text_fields
+
+# Versao do resultado de `parse`/`record_rows`; incremente ao alterar a extracao (invalida o cache de parse).
+PARSER_VERSION = 1
+
+# Prefixo dos objetos rejeitados pela validacao estrutural (um subprefixo por motivo).
+QUARANTINE_PREFIX = "nist-quarentena/"
 
 
 @dataclass
@@ -24,28 +42,131 @@ class OriginBase:
     origin: str | None = None
 
 
+@dataclass
+class ParsedNist:
+    """Payload NIST parseado uma unica vez, com indice (tipo, campo) -> valor.
+
+    `records` fica vazio quando o payload nao segue a estrutura ANSI/NIST-ITL e
+    o indice foi montado pela varredura textual de fallback. `raw` e o buffer
+    recebido (pode ser um `mmap`, valido apenas enquanto o arquivo estiver mapeado).
+    `rows` traz o indice de registros ja calculado quando o NIST vem do cache de parse.
+    """
+
+    raw: BytesLike
+    records: list[NistRecord] = field(default_factory=list)
+    fields: dict[tuple[int, int], str] = field(default_factory=dict)
+    rows: Optional[list[RecordRow]] = None
+
+    def get(self, type_no: int, field_no: int) -> Optional[str]:
+        """Retorna o valor da primeira ocorrencia do campo ou None."""
+        value = self.fields.get((type_no, field_no))
+        if value is None:
+            return None
+        return value.strip(" \t\r\n|;,") or None
+
+    @property
+    def origin(self) -> Optional[str]:
+        """Valor bruto do campo 1:008 (origem)."""
+        return self.get(1, 8)
+
+    def record_rows(self) -> list[RecordRow]:
+        """Indice dos registros com a faixa de bytes da imagem (vazio no fallback textual)."""
+        if self.rows is not None:
+            return list(self.rows)
+        rows = []
+        for seq, record in enumerate(self.records):
+            span = image_span(self.raw, record)
+            rows.append(
+                RecordRow(
+                    seq=seq,
+                    record_type=record.record_type,
+                    idc=record.idc,
+                    offset=record.offset,
+                    length=record.length,
+                    image_offset=span[0] if span else None,
+                    image_length=span[1] if span else None,
+                    image_format=image_format(self.raw, record) if span else None,
+                )
+            )
+        return rows
+
+
 @dataclass
 class NistParserService:
     """Servico de parsing NIST (versao inicial e heuristica)."""
 
-    def parse(self, raw: bytes) -> Tuple[Person, OriginBase]:
-        """Extrai entidades a partir do payload NIST.
+    def load(self, raw: BytesLike) -> ParsedNist:
+        """Percorre o payload uma unica vez e indexa os campos textuais de todos os registros."""
+        try:
+            records = list(iter_records(raw))
+        except NistFormatError:
+            return ParsedNist(raw=raw, fields=_index_text_fields(raw))
+        fields: dict[tuple[int, int], str] = {}
+        for record in records:
+            for field_no, value in record.fields.items():
+                fields.setdefault((record.record_type, field_no), value)
+        return ParsedNist(raw=raw, records=records, fields=fields)
+
+    def load_header(self, raw: BytesLike) -> ParsedNist:
+        """Indexa apenas o registro Tipo-1 (ex.: bytes obtidos com leitura parcial)."""
+        try:
+            header = read_type1(raw)
+        except NistFormatError:
+            return ParsedNist(raw=raw, fields=_index_text_fields(raw))
+        fields = {(1, field_no): value for field_no, value in header.fields.items()}
+        return ParsedNist(raw=raw, records=[header], fields=fields)
+
+    def validate(self, raw: BytesLike) -> Optional[str]:
+        """Validacao estrutural rapida (CNT x LEN x tamanho real); retorna o codigo de rejeicao ou None."""
+        return structural_error(raw)
 
-        Implementacao simplificada: apenas origem (1:008), normalizada.
+    def parse(self, nist: ParsedNist) -> Tuple[Person, OriginBase]:
+        """Extrai entidades a partir do NIST indexado (sem nova leitura do payload).
+
+        Origem (1:008) e dados do Tipo-2: nome (2.030), nascimento (2.035, ISO) e sexo (2.039).
         """
-        origin_value = _field_1_008(raw) or "unknown"
-        person = Person()
+        origin_value = nist.origin or "unknown"
+        birth_date = parse_date(nist.get(2, 35))
+        sex = nist.get(2, 39)
+        person = Person(
+            name=sanitize_text(nist.get(2, 30)) or None,
+            sex=normalize_sex(sex) if sex is not None else None,
+            birth_date=birth_date.isoformat() if birth_date else None,
+        )
         origin_base = OriginBase(origin=sanitize_text(origin_value))
         return person, origin_base
 
-    def compose_key_for_upload(self, filename: str, raw: bytes) -> str:
+    def summarize(self, nist: ParsedNist, person: Person, records: Sequence[RecordRow]) -> ParsedSummary:
+        """Resume o resultado do parse para o cache indexado por md5."""
+        return ParsedSummary(
+            origin=nist.origin,
+            name=person.name,
+            sex=person.sex,
+            birth_date=person.birth_date,
+            records=tuple(records),
+        )
+
+    def restore(self, raw: BytesLike, summary: ParsedSummary) -> Tuple[ParsedNist, Person, OriginBase]:
+        """Reconstroi NIST, `Person` e `OriginBase` a partir do cache, sem parsear o payload."""
+        fields = {(1, 8): summary.origin} if summary.origin is not None else {}
+        nist = ParsedNist(raw=raw, fields=fields, rows=list(summary.records))
+        person = Person(name=summary.name, sex=summary.sex, birth_date=summary.birth_date)
+        origin_base = OriginBase(origin=sanitize_text(summary.origin or "unknown"))
+        return nist, person, origin_base
+
+    def compose_key_for_upload(self, filename: str, nist: ParsedNist) -> str:
         """Monta a chave S3 no padrao 'nist/<1:008>/<arquivo>.nst'."""
-        origin_value = _field_1_008(raw) or "unknown"
+        origin_value = nist.origin or "unknown"
         return f"nist/{origin_value}/{filename}"
 
-    def destination_key_for_processed(self, key: str, raw: bytes) -> str:
+    def destination_key_for_processed(self, key: str, nist: ParsedNist) -> str:
         """Gera a chave de destino de arquivos processados sob 'nist-lidos/'."""
-        origin_value = _field_1_008(raw) or "unknown"
+        origin_value = nist.origin or "unknown"
         parts = key.split("/")
         filename = parts[-1] if parts else key
         return f"nist-lidos/{origin_value}/{filename}"
+
+    def quarantine_key(self, key: str, reason: str) -> str:
+        """Gera a chave sob 'nist-quarentena/<motivo>/', preservando o caminho abaixo de 'nist/'."""
+        relative = key[len("nist/"):] if key.startswith("nist/") else key.split("/")[-1]
+        return f"{QUARANTINE_PREFIX}{reason}/{relative}"
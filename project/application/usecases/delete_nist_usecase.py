@@ -13,10 +13,13 @@ class DeleteNistUseCase:
         """Remove um objeto específico identificado pela chave completa."""
         self.s3.delete_object(key)
 
-    def delete_by_prefix(self, prefix: str) -> int:
-        """Remove todos os objetos que iniciam com o prefixo informado e retorna o total removido."""
-        return self.s3.delete_prefix(prefix)
+    def delete_by_prefix(self, prefix: str, dry_run: bool = False) -> "DeleteResult":
+        """Remove os objetos que iniciam com o prefixo e retorna as contagens de removidos/falhas.
 
-    def delete_all(self) -> int:
+        Com `dry_run=True` apenas conta os objetos que seriam removidos.
+        """
+        return self.s3.delete_prefix(prefix, dry_run=dry_run)
+
+    def delete_all(self, dry_run: bool = False) -> "DeleteResult":
         """Remove todos os objetos do bucket."""
-        return self.s3.delete_prefix("")
+        return self.s3.delete_prefix("", dry_run=dry_run)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import Iterable
 
 
 @dataclass
@@ -9,9 +11,39 @@ class MoveProcessedUseCase:
 
     s3: "S3Port"
     nist_tools: "NistParserService"
+    header_workers: int = 8
 
-    def execute(self, key: str, raw: bytes) -> str:
+    def execute(self, key: str, nist: "ParsedNist") -> str:
         """Calcula a chave de destino e realiza a movimentacao no S3."""
-        destination = self.nist_tools.destination_key_for_processed(key, raw)
+        destination = self.nist_tools.destination_key_for_processed(key, nist)
         self.s3.move_processed(key, destination)
         return destination
+
+    def execute_by_key(self, key: str) -> str:
+        """Move um objeto ja ingerido lendo apenas o cabecalho (Tipo-1) para decidir o destino."""
+        nist = self.nist_tools.load_header(self.s3.read_header(key))
+        return self.execute(key, nist)
+
+    def execute_many(self, items: Iterable[tuple[str, "ParsedNist"]]) -> "MoveResult":
+        """Move varios objetos de uma vez (copias concorrentes e remocao em lote no S3)."""
+        moves = ((key, self.nist_tools.destination_key_for_processed(key, nist)) for key, nist in items)
+        return self.s3.move_many(moves)
+
+    def execute_many_by_key(self, keys: Iterable[str]) -> "MoveResult":
+        """Versao em lote de `execute_by_key`: os cabecalhos sao lidos em paralelo.
+
+        Chaves cujo cabecalho nao pode ser lido aparecem em `failed` e nao sao movidas.
+        """
+
+        def route(key: str) -> tuple[str, object]:
+            try:
+                return key, self.nist_tools.load_header(self.s3.read_header(key))
+            except Exception as exc:
+                return key, exc
+
+        with ThreadPoolExecutor(max_workers=max(1, self.header_workers)) as pool:
+            routed = list(pool.map(route, keys))
+        failed = {key: str(value) for key, value in routed if isinstance(value, Exception)}
+        result = self.execute_many((key, value) for key, value in routed if not isinstance(value, Exception))
+        result.failed.update(failed)
+        return result
@@ -1,30 +1,73 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Protocol, Sequence
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional, Protocol, Sequence
+
+from project.application.ports.checkpoint_port import CheckpointPort
+from project.application.ports.parse_cache_port import ParseCachePort
+from project.application.ports.repository_port import IngestRow, RecordRow, UpsertResult
+from project.application.ports.s3_port import MoveResult, ObjectInfo
+from project.application.usecases.move_processed_usecase import MoveProcessedUseCase
 
 
 class S3Port(Protocol):
     """Porta S3 utilizada pelo caso de uso de processamento."""
 
-    def list_nists(self) -> Sequence[str]:
-        """Lista chaves candidatas para processamento."""
+    def list_nists(self, start_after: Optional[str] = None, page_size: int = 1000) -> Iterator[str]:
+        """Percorre chaves candidatas para processamento apos `start_after`."""
+        ...
+
+    def list_nist_objects(self, start_after: Optional[str] = None, page_size: int = 1000) -> Iterator[ObjectInfo]:
+        """Percorre objetos candidatos com ETag (usado pela pre-checagem)."""
         ...
 
     def read_bytes(self, key: str) -> bytes:
         """Le o conteudo bruto de um objeto S3."""
         ...
 
+    def iter_bytes(self, key: str) -> Iterator[bytes]:
+        """Le o conteudo do objeto em blocos, a medida que chegam da rede."""
+        ...
+
+    def read_header(self, key: str) -> bytes:
+        """Le apenas o registro Tipo-1 do objeto."""
+        ...
+
     def move_processed(self, key: str, dest_key: str) -> None:
         """Move um objeto processado para a chave de destino."""
         ...
 
+    def move_many(self, moves: Iterable[tuple[str, str]]) -> MoveResult:
+        """Move varios objetos de uma vez (copias concorrentes e remocao em lote)."""
+        ...
+
+    def mark_processed(self, key: str) -> None:
+        """Marca o objeto como processado sem move-lo (estrategia `mark`)."""
+        ...
+
 
 class RepositoryPort(Protocol):
     """Porta de repositorio para persistencia e logs."""
 
-    def upsert_person_from_nist(self, person: object, origin_base: object, md5_hash: str) -> None:
-        """Persiste ou atualiza os dados derivados do NIST."""
+    def upsert_person_from_nist(
+        self, person: object, origin_base: object, md5_hash: str, records: Sequence[RecordRow] = ()
+    ) -> None:
+        """Persiste ou atualiza os dados derivados do NIST e o indice de registros."""
+        ...
+
+    def upsert_many(self, rows: Sequence[IngestRow]) -> UpsertResult:
+        """Persiste um lote e informa as chaves inseridas/atualizadas."""
+        ...
+
+    def lookup_ingested(self, keys: Sequence[str]) -> dict[str, IngestRow]:
+        """Retorna as chaves ja presentes em tb_nist_ingest."""
+        ...
+
+    def mark_processed(self, keys: Sequence[str]) -> int:
+        """Registra as chaves como processadas (estrategia `mark`)."""
         ...
 
     def log(self, level: str, message: str) -> None:
@@ -32,6 +75,132 @@ class RepositoryPort(Protocol):
         ...
 
 
+class AnalyzerPort(Protocol):
+    """Backend opcional que calcula md5 e parse fora do processo orquestrador."""
+
+    def analyze(self, raw: bytes) -> object:
+        """Retorna objeto com `md5_hash`, `nist`, `person` e `origin_base`."""
+        ...
+
+
+PROCESSED_STRATEGIES = ("move", "mark")
+
+
+class _Quarantined(Exception):
+    """Objeto rejeitado pela validacao estrutural e ja movido para a quarentena."""
+
+
+@dataclass(frozen=True)
+class PipelineOptions:
+    """Quantidade de workers por estagio e capacidade das filas entre estagios."""
+
+    read_workers: int = 4
+    parse_workers: int = 1
+    persist_workers: int = 2
+    move_workers: int = 4
+    queue_size: int = 64
+    batch_size: int = 1
+    flush_interval: float = 2.0
+
+    @classmethod
+    def uniform(cls, workers: int, queue_size: int = 64) -> "PipelineOptions":
+        """Cria opcoes com o mesmo numero de workers em todos os estagios."""
+        return cls(
+            read_workers=workers,
+            parse_workers=workers,
+            persist_workers=workers,
+            move_workers=workers,
+            queue_size=queue_size,
+        )
+
+
+@dataclass
+class _WorkItem:
+    """Estado de um objeto trafegando entre os estagios do pipeline."""
+
+    key: str
+    raw: bytes = b""
+    md5_hash: str = ""
+    nist: object = None
+    person: object = None
+    origin_base: object = None
+    known: bool = False
+    seq: int = -1
+    records: list[RecordRow] = field(default_factory=list)
+
+
+_STOP = object()
+
+
+@dataclass
+class _Counter:
+    """Contador protegido por lock para os workers do ultimo estagio."""
+
+    value: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def increment(self) -> None:
+        with self._lock:
+            self.value += 1
+
+
+@dataclass
+class _ListingCursor:
+    """Cursor confirmado da listagem: maior chave cujo prefixo inteiro ja foi tratado.
+
+    No pipeline os itens terminam fora de ordem; o cursor so avanca quando todas
+    as chaves anteriores (na ordem da listagem) foram concluidas ou descartadas.
+    """
+
+    value: Optional[str] = None
+    unsaved: int = 0
+    _next: int = 0
+    _low: int = 0
+    _keys: dict[int, str] = field(default_factory=dict, repr=False)
+    _done: set[int] = field(default_factory=set, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def register(self, key: str) -> int:
+        with self._lock:
+            seq = self._next
+            self._next += 1
+            self._keys[seq] = key
+            return seq
+
+    def complete(self, seq: int) -> None:
+        with self._lock:
+            self._done.add(seq)
+            while self._low in self._done:
+                self._done.discard(self._low)
+                self.value = self._keys.pop(self._low)
+                self._low += 1
+                self.unsaved += 1
+
+
+@dataclass
+class PrecheckStats:
+    """Contadores da pre-checagem de objetos ja ingeridos."""
+
+    listed: int = 0
+    known: int = 0
+    known_moved: int = 0
+    known_skipped: int = 0
+    etag_mismatch: int = 0
+    already_processed: int = 0
+    quarantined: int = 0
+    parse_cache_hits: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def downloads_avoided(self) -> int:
+        """Objetos conhecidos que nao tiveram o payload baixado."""
+        return self.known
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+
 @dataclass
 class ProcessNistUseCase:
     """Processa os NISTs pendentes disponiveis no bucket."""
@@ -40,28 +209,437 @@ class ProcessNistUseCase:
     repository: RepositoryPort
     parser: "NistParserService"
     checksum: "ChecksumService"
+    analyzer: Optional[AnalyzerPort] = None
+    precheck: bool = False
+    precheck_page_size: int = 500
+    known_action: str = "move"
+    verify_etag: bool = True
+    processed_strategy: str = "move"
+    checkpoint: Optional[CheckpointPort] = None
+    checkpoint_name: str = "process"
+    checkpoint_every: int = 100
+    resume: bool = True
+    mark_watermark: bool = False
+    list_page_size: int = 1000
+    quarantine: bool = True
+    parse_cache: Optional[ParseCachePort] = None
+    stats: PrecheckStats = field(default_factory=PrecheckStats, init=False)
+    _cursor: Optional[_ListingCursor] = field(default=None, init=False, repr=False)
+    _last_listed: Optional[str] = field(default=None, init=False, repr=False)
+    _checkpoint_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _mover: MoveProcessedUseCase = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        if self.processed_strategy not in PROCESSED_STRATEGIES:
+            raise ValueError(f"estrategia de processados invalida: {self.processed_strategy!r}")
+        self._mover = MoveProcessedUseCase(s3=self.s3, nist_tools=self.parser)
 
     def execute(self) -> int:
         """Executa o fluxo de processamento e retorna a quantidade de itens tratados."""
         processed = 0
-        for key in self.s3.list_nists():
+        exhausted = False
+        self._open_checkpoint()
+        try:
+            for item in self._iter_work():
+                key = item.key
+                self._track(item)
+                try:
+                    if item.known:
+                        self._move(item)
+                    else:
+                        item = self._read(item)
+                        item = self._parse(item)
+                        item = self._persist(item)
+                        self._move(item)
+                        processed += 1
+                except _Quarantined:
+                    pass
+                except Exception as exc:
+                    self.repository.log("ERROR", f"Failed {key}: {exc}")
+                # Interrupcoes (KeyboardInterrupt) nao confirmam o item: ele volta na retomada.
+                self._finish(item)
+            exhausted = True
+        finally:
+            self._close_checkpoint(exhausted)
+        return processed
+
+    def execute_pipelined(self, options: Optional[PipelineOptions] = None) -> int:
+        """Executa o processamento em estagios concorrentes (leitura, parse, persistencia, movimentacao).
+
+        Os estagios sao ligados por filas limitadas; cada chave continua isolada:
+        uma falha em qualquer estagio e registrada e o item e descartado.
+        """
+        options = options or PipelineOptions()
+        stages: list[tuple[Callable[[_WorkItem], _WorkItem], int]] = [
+            (self._read, options.read_workers),
+            (self._parse, options.parse_workers),
+            (self._persist, options.persist_workers),
+            (self._move, options.move_workers),
+        ]
+        queues: list[queue.Queue] = [queue.Queue(maxsize=max(1, options.queue_size)) for _ in stages]
+        counter = _Counter()
+        exhausted = False
+        self._open_checkpoint()
+
+        threads: list[list[threading.Thread]] = []
+        for index, (handler, workers) in enumerate(stages):
+            inbox = queues[index]
+            outbox = queues[index + 1] if index + 1 < len(queues) else None
+            target: Callable[..., None] = self._stage_worker
+            args: tuple[object, ...] = (handler, inbox, outbox, counter)
+            if handler == self._persist and options.batch_size > 1:
+                # Persistencia em lote: COPY + merge por lote em vez de um upsert por chave.
+                target = self._batch_worker
+                args = (inbox, options, lambda items, outbox=outbox: self._flush_batch(items, outbox))
+            elif handler == self._move and options.batch_size > 1 and self.processed_strategy == "move":
+                # Movimentacao em lote: copias concorrentes e remocao das origens com DeleteObjects.
+                target = self._batch_worker
+                args = (inbox, options, lambda items: self._move_batch(items, counter))
+            stage_threads = [
+                threading.Thread(
+                    target=target,
+                    args=args,
+                    name=f"nist-{handler.__name__.strip('_')}-{n}",
+                    daemon=True,
+                )
+                for n in range(max(1, workers))
+            ]
+            for thread in stage_threads:
+                thread.start()
+            threads.append(stage_threads)
+
+        try:
+            for item in self._iter_work():
+                self._track(item)
+                # Objetos ja ingeridos vao direto para a movimentacao, sem leitura/parse.
+                queues[-1 if item.known else 0].put(item)
+            exhausted = True
+        finally:
+            # Encerra cada estagio em ordem: sentinelas so entram depois que o anterior drenou.
+            for inbox, stage_threads in zip(queues, threads):
+                for _ in stage_threads:
+                    inbox.put(_STOP)
+                for thread in stage_threads:
+                    thread.join()
+            self._close_checkpoint(exhausted)
+        return counter.value
+
+    def _stage_worker(
+        self,
+        handler: Callable[[_WorkItem], _WorkItem],
+        inbox: queue.Queue,
+        outbox: Optional[queue.Queue],
+        counter: _Counter,
+    ) -> None:
+        """Consome itens da fila de entrada, aplica o estagio e repassa ao proximo."""
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            try:
+                result = handler(item)
+            except _Quarantined:
+                self._finish(item)
+                continue
+            except Exception as exc:
+                self._log_failure(item.key, exc)
+                self._finish(item)
+                continue
+            if outbox is not None:
+                outbox.put(result)
+                continue
+            if not result.known:
+                counter.increment()
+            self._finish(result)
+
+    def _batch_worker(
+        self, inbox: queue.Queue, options: PipelineOptions, flush: Callable[[list[_WorkItem]], None]
+    ) -> None:
+        """Acumula itens e entrega o lote a `flush` ao atingir `batch_size` ou `flush_interval`."""
+        pending: list[_WorkItem] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
             try:
-                raw = self.s3.read_bytes(key)
-                md5_hash = self.checksum.md5_bytes(raw)
-                person, origin_base = self.parser.parse(raw)
+                item = inbox.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            stopping = item is _STOP
+            if isinstance(item, _WorkItem):
+                if not pending:
+                    deadline = time.monotonic() + options.flush_interval
+                pending.append(item)
+            if pending and (
+                stopping or len(pending) >= options.batch_size or time.monotonic() >= deadline
+            ):
+                flush(pending)
+                pending = []
+            if stopping:
+                return
+
+    def _flush_batch(self, items: list[_WorkItem], outbox: queue.Queue) -> None:
+        """Grava o lote e encaminha ao estagio de movimentacao as chaves persistidas.
 
-                # Acrescenta metadados minimos para persistencia.
+        Chaves com conteudo duplicado (o md5 ficou com outra chave) nao contam como
+        processadas: seguem como ja ingeridas e sao movidas, como no modo serial.
+        """
+        rows = [
+            IngestRow(
+                s3_key=item.key,
+                md5_hash=item.md5_hash,
+                origin=getattr(item.origin_base, "origin", None),
+                records=tuple(item.records),
+            )
+            for item in items
+        ]
+        try:
+            result = self.repository.upsert_many(rows)
+        except Exception as exc:
+            for item in items:
+                self._log_failure(item.key, exc)
+                self._finish(item)
+            return
+        persisted = result.persisted
+        for item in items:
+            if item.key in persisted:
+                outbox.put(item)
+            elif item.key in result.duplicates:
+                self.repository.log("INFO", f"Duplicate content {item.key} (md5 kept by {result.duplicates[item.key]})")
+                item.known = True
+                outbox.put(item)
+            else:
+                self._log_failure(item.key, result.failed.get(item.key, "nao persistido"))
+                self._finish(item)
+
+    def _move_batch(self, items: list[_WorkItem], counter: _Counter) -> None:
+        """Move o lote via `move_many`; objetos ja ingeridos (sem NIST em memoria) sao roteados pelo Tipo-1."""
+        parsed = [item for item in items if item.nist is not None]
+        headless = [item.key for item in items if item.nist is None]
+        results: list[MoveResult] = []
+        try:
+            if parsed:
+                results.append(self._mover.execute_many((item.key, item.nist) for item in parsed))
+            if headless:
+                results.append(self._mover.execute_many_by_key(headless))
+        except Exception as exc:
+            for item in items:
+                self._log_failure(item.key, exc)
+                self._finish(item)
+            return
+        moved = {key for result in results for key in result.moved}
+        failed = {key: message for result in results for key, message in result.failed.items()}
+        destinations = {key: dest for result in results for key, dest in result.destinations.items()}
+        for item in items:
+            if item.key in moved:
+                if not item.known:
+                    counter.increment()
                 try:
-                    setattr(origin_base, "s3_key", key)
+                    self._log_moved(item, destinations.get(item.key))
                 except Exception:
                     pass
+            else:
+                self._log_failure(item.key, failed.get(item.key, "nao movido"))
+            self._finish(item)
 
-                self.repository.upsert_person_from_nist(person, origin_base, md5_hash)
+    def _log_failure(self, key: str, exc: object) -> None:
+        try:
+            self.repository.log("ERROR", f"Failed {key}: {exc}")
+        except Exception:
+            # Um worker nao pode morrer: as filas limitadas travariam o pipeline.
+            pass
 
-                destination = self.parser.destination_key_for_processed(key, raw)
-                self.s3.move_processed(key, destination)
-                self.repository.log("INFO", f"Processed {key} -> {destination}")
-                processed += 1
+    def _open_checkpoint(self) -> None:
+        """Carrega o cursor salvo para retomar a listagem de onde a execucao anterior parou."""
+        self._cursor = None
+        if self.checkpoint is None:
+            return
+        start_after = None
+        if self.resume:
+            try:
+                start_after = self.checkpoint.load(self.checkpoint_name)
             except Exception as exc:
-                self.repository.log("ERROR", f"Failed {key}: {exc}")
-        return processed
+                self._log_failure("checkpoint", exc)
+        if start_after:
+            self.repository.log("INFO", f"Resuming listing after {start_after}")
+        self._cursor = _ListingCursor(value=start_after)
+
+    def _close_checkpoint(self, exhausted: bool) -> None:
+        """Apaga o cursor ao fim de uma listagem completa; em interrupcoes grava o ultimo confirmado.
+
+        Com `mark_watermark` na estrategia `mark`, a listagem completa grava a ultima
+        chave listada: as proximas execucoes listam so o que vem depois dela, sem
+        reler os objetos marcados (chaves novas anteriores a ela exigem `--restart`).
+        """
+        if self._cursor is None:
+            return
+        if not exhausted:
+            self._save_checkpoint(self._cursor.value)
+        elif self.mark_watermark and self.processed_strategy == "mark":
+            self._save_checkpoint(self._last_listed or self._cursor.value)
+        else:
+            self._save_checkpoint(None)
+
+    def _save_checkpoint(self, start_after: Optional[str]) -> None:
+        try:
+            self.checkpoint.save(self.checkpoint_name, start_after)
+        except Exception as exc:
+            self._log_failure("checkpoint", exc)
+
+    def _track(self, item: _WorkItem) -> None:
+        if self._cursor is not None:
+            item.seq = self._cursor.register(item.key)
+
+    def _finish(self, item: _WorkItem) -> None:
+        """Marca o item como concluido e grava o cursor a cada `checkpoint_every` chaves confirmadas."""
+        cursor = self._cursor
+        if cursor is None or item.seq < 0:
+            return
+        cursor.complete(item.seq)
+        if cursor.unsaved < max(1, self.checkpoint_every):
+            return
+        with self._checkpoint_lock:
+            if cursor.unsaved < max(1, self.checkpoint_every):
+                return
+            cursor.unsaved = 0
+            self._save_checkpoint(cursor.value)
+
+    def _iter_work(self) -> Iterator[_WorkItem]:
+        """Gera os itens a processar, consultando o banco por pagina quando a pre-checagem esta ativa."""
+        start_after = self._cursor.value if self._cursor is not None else None
+        self._last_listed = None
+        # Na estrategia `mark` os objetos continuam em nist/: a consulta ao banco e o filtro.
+        if not (self.precheck or self.processed_strategy == "mark"):
+            for key in self.s3.list_nists(start_after=start_after, page_size=self.list_page_size):
+                self._last_listed = key
+                yield _WorkItem(key=key)
+            return
+        page: list[ObjectInfo] = []
+        for info in self.s3.list_nist_objects(start_after=start_after, page_size=self.list_page_size):
+            self._last_listed = info.key
+            page.append(info)
+            if len(page) >= self.precheck_page_size:
+                yield from self._precheck_page(page)
+                page = []
+        if page:
+            yield from self._precheck_page(page)
+
+    def _precheck_page(self, page: list[ObjectInfo]) -> Iterator[_WorkItem]:
+        self.stats.add("listed", len(page))
+        try:
+            known = self.repository.lookup_ingested([info.key for info in page])
+        except Exception as exc:
+            # Sem a consulta, processa a pagina normalmente (comportamento sem pre-checagem).
+            self._log_failure("precheck", exc)
+            known = {}
+        for info in page:
+            row = known.get(info.key)
+            if row is not None and self.verify_etag:
+                etag_md5 = info.single_part_md5
+                if etag_md5 is not None and row.md5_hash and etag_md5 != row.md5_hash.lower():
+                    # Conteudo mudou desde a ingestao: reprocessa.
+                    self.stats.add("etag_mismatch")
+                    row = None
+            if row is not None and row.processed:
+                self.stats.add("already_processed")
+                continue
+            if row is None:
+                yield _WorkItem(key=info.key)
+                continue
+            self.stats.add("known")
+            if self.known_action == "skip":
+                self.stats.add("known_skipped")
+                continue
+            yield _WorkItem(key=info.key, md5_hash=row.md5_hash, known=True)
+
+    def _read(self, item: _WorkItem) -> _WorkItem:
+        if self.analyzer is not None:
+            # O md5 e calculado no pool de processos, junto com o parse.
+            item.raw = self.s3.read_bytes(item.key)
+            self._check_structure(item)
+            return item
+        # MD5 calculado enquanto os blocos chegam, sobrepondo hash e rede.
+        digest = self.checksum.new_md5()
+        chunks = []
+        for chunk in self.s3.iter_bytes(item.key):
+            digest.update(chunk)
+            chunks.append(chunk)
+        item.raw = b"".join(chunks)
+        item.md5_hash = digest.finalize()
+        self._check_structure(item)
+        return item
+
+    def _check_structure(self, item: _WorkItem) -> None:
+        """Move para a quarentena payloads truncados ou malformados, antes de qualquer gravacao no banco."""
+        if not self.quarantine:
+            return
+        reason = self.parser.validate(item.raw)
+        if reason is None:
+            return
+        destination = self.parser.quarantine_key(item.key, reason)
+        self.s3.move_processed(item.key, destination)
+        self.stats.add("quarantined")
+        self.repository.log("WARNING", f"Quarantined {item.key} ({reason}) -> {destination}")
+        raise _Quarantined(reason)
+
+    def _parse(self, item: _WorkItem) -> _WorkItem:
+        # Com o pool de processos o md5 so e conhecido apos a analise: o cache apenas recebe o resultado.
+        summary = None
+        if self.parse_cache is not None and item.md5_hash:
+            summary = self.parse_cache.get(item.md5_hash)
+        if summary is not None:
+            item.nist, item.person, item.origin_base = self.parser.restore(item.raw, summary)
+            self.stats.add("parse_cache_hits")
+        elif self.analyzer is not None:
+            result = self.analyzer.analyze(item.raw)
+            item.md5_hash = result.md5_hash
+            item.nist = result.nist
+            item.person, item.origin_base = result.person, result.origin_base
+        else:
+            item.nist = self.parser.load(item.raw)
+            item.person, item.origin_base = self.parser.parse(item.nist)
+        record_rows = getattr(item.nist, "record_rows", None)
+        if record_rows is not None:
+            item.records = record_rows()
+        if summary is None and self.parse_cache is not None:
+            self.parse_cache.put(item.md5_hash, self.parser.summarize(item.nist, item.person, item.records))
+
+        # Acrescenta metadados minimos para persistencia.
+        try:
+            setattr(item.origin_base, "s3_key", item.key)
+        except Exception:
+            pass
+        return item
+
+    def _persist(self, item: _WorkItem) -> _WorkItem:
+        # Linha e indice de registros na mesma transacao, como no modo em lote.
+        self.repository.upsert_person_from_nist(item.person, item.origin_base, item.md5_hash, item.records)
+        return item
+
+    def _move(self, item: _WorkItem) -> _WorkItem:
+        if self.processed_strategy == "mark" and self._mark(item):
+            return item
+        if item.nist is None:
+            # Objeto ja ingerido: o destino depende apenas do Tipo-1 (leitura parcial).
+            destination = self._mover.execute_by_key(item.key)
+        else:
+            destination = self._mover.execute(item.key, item.nist)
+        self._log_moved(item, destination)
+        return item
+
+    def _log_moved(self, item: _WorkItem, destination: Optional[str]) -> None:
+        if item.known:
+            self.stats.add("known_moved")
+            self.repository.log("INFO", f"Moved already ingested {item.key} -> {destination}")
+        else:
+            self.repository.log("INFO", f"Processed {item.key} -> {destination}")
+
+    def _mark(self, item: _WorkItem) -> bool:
+        """Marca o objeto no lugar; False quando nao ha linha com a chave (conteudo duplicado) e ele deve ser movido."""
+        # A tag vem antes: o estado no banco (que exclui o objeto das listagens) e gravado por ultimo.
+        self.s3.mark_processed(item.key)
+        if not self.repository.mark_processed([item.key]):
+            return False
+        if item.known:
+            self.stats.add("known_moved")
+        self.repository.log("INFO", f"Marked processed {item.key}")
+        return True
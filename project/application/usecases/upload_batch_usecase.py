@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+
+from project.application.ports.file_reader_port import FileReaderPort
+from project.application.ports.key_index_port import KeyIndexPort
+from project.application.ports.manifest_port import ManifestEntry, ManifestPort
+
+
+@dataclass
+class UploadBatchStats:
+    """Totais e vazao de uma execucao de upload em lote."""
+
+    files: int = 0
+    uploaded: int = 0
+    skipped: int = 0
+    unchanged: int = 0
+    already_done: int = 0
+    errors: int = 0
+    manifest_errors: int = 0
+    bytes_uploaded: int = 0
+    elapsed: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes_uploaded / (1024 * 1024) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class UploadBatchUseCase:
+    """Envia varios arquivos .nst locais em paralelo, sem carrega-los inteiros na memoria.
+
+    A chave S3 depende apenas do Tipo-1, lido de uma janela inicial do arquivo;
+    o conteudo e enviado a partir do disco (`S3Port.upload_file`), em multipart
+    acima do limite configurado no adaptador.
+    """
+
+    s3: "S3Port"
+    nist_tools: "NistParserService"
+    file_reader: FileReaderPort
+    workers: int = 4
+    header_bytes: int = 4096
+    key_index: Optional[KeyIndexPort] = None
+    manifest: Optional[ManifestPort] = None
+    checksum: Optional["ChecksumService"] = None
+    stats: UploadBatchStats = field(default_factory=UploadBatchStats, init=False)
+
+    def execute(self, files: Iterable[Path]) -> list[dict[str, object]]:
+        """Processa os arquivos e retorna um resumo por arquivo, na ordem de entrada."""
+        self.stats = UploadBatchStats()
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            results = list(pool.map(self._upload_one, files))
+        self.stats.elapsed = time.monotonic() - started
+        return results
+
+    def _upload_one(self, path: Path) -> dict[str, object]:
+        self.stats.add("files")
+        try:
+            stat = path.stat()
+            if self.manifest is not None:
+                # Arquivo inalterado desde o ultimo envio: nem leitura nem parse.
+                known = self.manifest.get(str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+                if known is not None and known.uploaded:
+                    self.stats.add("unchanged")
+                    return {"file": str(path), "status": "skipped_unchanged", "key": known.s3_key}
+            nist = self._load_header(path)
+            base_key = self.nist_tools.compose_key_for_upload(path.name, nist)
+            read_key = self.nist_tools.destination_key_for_processed(base_key, nist)
+            if self._exists(base_key, read_key):
+                self.stats.add("skipped")
+                result = {"file": str(path), "status": "skipped_exists", "key": base_key}
+                self._record(result, path, stat, nist, base_key)
+                return result
+            md5_hash = self.s3.upload_file(base_key, path)
+        except Exception as exc:
+            self.stats.add("errors")
+            return {"file": str(path), "status": "error", "error": str(exc)}
+        if self.key_index is not None:
+            self.key_index.add(base_key)
+        self.stats.add("uploaded")
+        self.stats.add("bytes_uploaded", stat.st_size)
+        result = {"file": str(path), "status": "uploaded", "key": base_key}
+        self._record(result, path, stat, nist, base_key, md5_hash)
+        return result
+
+    def _record(
+        self,
+        result: dict[str, object],
+        path: Path,
+        stat: object,
+        nist: "ParsedNist",
+        key: str,
+        md5_hash: Optional[str] = None,
+    ) -> None:
+        """Grava o arquivo no manifesto; uma falha aqui nao desfaz o envio, apenas fica no resumo."""
+        if self.manifest is None:
+            return
+        try:
+            if md5_hash is None and self.checksum is not None:
+                # Objeto ja existente: o md5 nao veio do envio.
+                md5_hash = self.checksum.md5_file(path)
+            self.manifest.record_upload(
+                ManifestEntry(
+                    path=str(path.resolve()),
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    md5_hash=md5_hash,
+                    origin=nist.origin,
+                    s3_key=key,
+                )
+            )
+        except Exception as exc:
+            self.stats.add("manifest_errors")
+            result["manifest_error"] = str(exc)
+
+    def _exists(self, *keys: str) -> bool:
+        """Checagem de duplicidade: indice local quando configurado, senao um HEAD por chave."""
+        if self.key_index is not None:
+            return self.key_index.exists_any(keys)
+        return any(self.s3.object_exists(key) for key in keys)
+
+    def _load_header(self, path: Path) -> "ParsedNist":
+        """Indexa o Tipo-1 a partir da janela inicial; sem ele na janela, a partir do arquivo inteiro."""
+        with path.open("rb") as handle:
+            window = handle.read(self.header_bytes)
+            nist = self.nist_tools.load_header(window)
+            if nist.records or len(window) < self.header_bytes:
+                return nist
+        # Tipo-1 maior que a janela ou formato texto legado: o leitor injetado expoe o arquivo todo.
+        with self.file_reader.open(path) as raw:
+            nist = self.nist_tools.load_header(raw)
+            # Apenas os campos indexados sao usados depois que o buffer e liberado.
+            nist.raw = b""
+            return nist
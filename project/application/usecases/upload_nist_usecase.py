@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 
+from project.application.ports.file_reader_port import FileReaderPort
+
 
 @dataclass
 class UploadNistUseCase:
@@ -10,11 +12,16 @@ class UploadNistUseCase:
 
     s3: "S3Port"
     nist_tools: "NistParserService"
+    file_reader: FileReaderPort
 
     def execute(self, file_path: str) -> str:
-        """Le um arquivo local, gera a chave S3 e envia o conteudo para o bucket."""
+        """Indexa o Tipo-1 do arquivo local, gera a chave S3 e envia o conteudo a partir do disco."""
         path = Path(file_path)
-        raw = path.read_bytes()
-        key = self.nist_tools.compose_key_for_upload(path.name, raw)
-        self.s3.upload_bytes(key, raw)
+        with self.file_reader.open(path) as raw:
+            # A chave depende apenas do 1.008: nao indexa os demais registros.
+            nist = self.nist_tools.load_header(raw)
+            key = self.nist_tools.compose_key_for_upload(path.name, nist)
+            # O buffer so vale dentro do bloco: nao reter a referencia no NIST.
+            nist.raw = b""
+        self.s3.upload_file(key, path)
         return key
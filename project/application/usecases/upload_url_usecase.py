@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import time
+import urllib.parse
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+from project.application.ports.downloader_port import BodyStream, DownloaderPort
+from project.application.ports.key_index_port import KeyIndexPort
+from project.application.ports.url_journal_port import UrlJournalPort
+from project.application.usecases.upload_batch_usecase import UploadBatchStats
+
+
+def filename_for_url(url: str, forced_name: Optional[str] = None) -> str:
+    """Nome do arquivo usado na chave S3: o informado ou o ultimo segmento do caminho da URL."""
+    fname = forced_name or urllib.parse.unquote(urllib.parse.urlparse(url).path.split("/")[-1] or "download.nst")
+    if not fname.endswith(".nst"):
+        fname = fname + ".nst"
+    return fname
+
+
+class _PeekableBody:
+    """Corpo da resposta com leitura antecipada do inicio e contagem do que e entregue ao upload.
+
+    `peek` guarda o inicio do corpo (Tipo-1) sem consumi-lo; `read` entrega
+    primeiro o trecho guardado e depois o restante do fluxo.
+    """
+
+    def __init__(self, body: BodyStream) -> None:
+        self._body = body
+        self._buffer = b""
+        self.size = 0
+
+    def peek(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            chunk = self._body.read(size - len(self._buffer))
+            if not chunk:
+                break
+            self._buffer += chunk
+        return self._buffer[:size]
+
+    def peek_all(self) -> bytes:
+        self._buffer += self._body.read()
+        return self._buffer
+
+    def read(self, size: int = -1) -> bytes:
+        if self._buffer:
+            if size is None or size < 0:
+                data, self._buffer = self._buffer + self._body.read(), b""
+            else:
+                data, self._buffer = self._buffer[:size], self._buffer[size:]
+        else:
+            data = self._body.read(size)
+        self.size += len(data)
+        return data
+
+
+@dataclass
+class UploadUrlUseCase:
+    """Baixa .nst de varias URLs em paralelo enviando cada corpo direto ao S3.
+
+    A chave depende apenas do Tipo-1, lido do inicio da resposta; o restante
+    do corpo segue em fluxo para `S3Port.upload_stream` (multipart acima do
+    limite do adaptador), que devolve o MD5 calculado durante o envio. Com `journal`,
+    URLs concluidas em execucoes anteriores sao puladas sem download.
+    """
+
+    s3: "S3Port"
+    nist_tools: "NistParserService"
+    downloader: DownloaderPort
+    workers: int = 8
+    header_bytes: int = 4096
+    key_index: Optional[KeyIndexPort] = None
+    journal: Optional[UrlJournalPort] = None
+    stats: UploadBatchStats = field(default_factory=UploadBatchStats, init=False)
+
+    def execute(self, items: Iterable[tuple[str, Optional[str]]]) -> list[dict[str, object]]:
+        """Processa pares (url, nome opcional) e retorna um resumo por URL, na ordem de entrada."""
+        return list(self.execute_iter(items))
+
+    def execute_iter(self, items: Iterable[tuple[str, Optional[str]]]) -> Iterator[dict[str, object]]:
+        """Como `execute`, mas consome `items` sob demanda e entrega cada resumo assim que pronto.
+
+        No maximo `2 * workers` URLs ficam em andamento, entao a memoria nao
+        depende do tamanho de `items` (ex.: indice lido em fluxo).
+        """
+        self.stats = UploadBatchStats()
+        started = time.monotonic()
+        window = max(1, self.workers) * 2
+        pending: deque[Future[dict[str, object]]] = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+                for item in items:
+                    if self.journal is not None and self.journal.is_done(item[0]):
+                        self.stats.add("already_done")
+                        continue
+                    pending.append(pool.submit(self._upload_one, item))
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        finally:
+            self.stats.elapsed = time.monotonic() - started
+
+    def _upload_one(self, item: tuple[str, Optional[str]]) -> dict[str, object]:
+        url, forced_name = item
+        self.stats.add("files")
+        try:
+            with self.downloader.open(url) as body:
+                reader = _PeekableBody(body)
+                nist = self._load_header(reader)
+                base_key = self.nist_tools.compose_key_for_upload(filename_for_url(url, forced_name), nist)
+                read_key = self.nist_tools.destination_key_for_processed(base_key, nist)
+                if self._exists(base_key, read_key):
+                    self._mark_done(url, "skipped_exists", base_key)
+                    self.stats.add("skipped")
+                    return {"url": url, "status": "skipped_exists", "key": base_key}
+                md5_hash = self.s3.upload_stream(base_key, reader)
+            self._mark_done(url, "uploaded", base_key)
+        except Exception as exc:
+            self.stats.add("errors")
+            return {"url": url, "status": "error", "error": str(exc)}
+        if self.key_index is not None:
+            self.key_index.add(base_key)
+        self.stats.add("uploaded")
+        self.stats.add("bytes_uploaded", reader.size)
+        return {"url": url, "status": "uploaded", "key": base_key, "size": reader.size, "md5": md5_hash}
+
+    def _mark_done(self, url: str, status: str, key: str) -> None:
+        if self.journal is not None:
+            self.journal.mark_done(url, status, key)
+
+    def _exists(self, *keys: str) -> bool:
+        if self.key_index is not None:
+            return self.key_index.exists_any(keys)
+        return any(self.s3.object_exists(key) for key in keys)
+
+    def _load_header(self, reader: _PeekableBody) -> "ParsedNist":
+        """Indexa o Tipo-1 do inicio da resposta; corpos fora da estrutura binaria sao lidos inteiros."""
+        window = reader.peek(self.header_bytes)
+        nist = self.nist_tools.load_header(window)
+        if nist.records or len(window) < self.header_bytes:
+            return nist
+        return self.nist_tools.load(reader.peek_all())
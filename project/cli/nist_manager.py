@@ -5,15 +5,40 @@ import os
 import sys
 from dataclasses import dataclass
 import json
+import textwrap
+from itertools import islice
+from pathlib import Path
+from typing import Iterable
 
+from project.application.ports.manifest_port import ManifestEntry
 from project.application.services.checksum_service import ChecksumService
-from project.application.services.nist_parser_service import NistParserService
+from project.application.ports.parse_cache_port import ParseCachePort
+from project.application.services.nist_parser_service import (
+    PARSER_VERSION,
+    NistParserService,
+    OriginBase,
+    ParsedNist,
+    Person,
+)
 from project.application.usecases.delete_nist_usecase import DeleteNistUseCase
-from project.application.usecases.process_nist_usecase import ProcessNistUseCase
-from project.config import load_config
+from project.application.usecases.process_nist_usecase import PipelineOptions, ProcessNistUseCase
+from project.application.usecases.upload_batch_usecase import UploadBatchUseCase
+from project.application.usecases.upload_url_usecase import UploadUrlUseCase
+from project.config import Config, load_config
 from project.logging_config import setup_logging
 from project.infra.s3.miniosdk import MinioFactory
+from project.infra.http_downloader import HttpDownloader
+from project.infra.mapped_file import MappedFileReader, map_file
+from project.infra.nist_records import BytesLike
+from project.infra.local_manifest import MANIFEST_FILENAME, SqliteManifest
+from project.infra.parse_cache import PARSE_CACHE_FILENAME, SqliteParseCache
+from project.infra.s3.key_index import S3KeyIndex
+from project.infra.url_index import UrlIndexError, iter_json_index, iter_text_index
+from project.infra.url_journal import URL_JOURNAL_FILENAME, SqliteUrlJournal
 from project.infra.s3.s3_manager import MinioS3Adapter
+from project.infra.db.checkpoint_store import PgCheckpointStore
+from project.infra.db.log_sink import BufferedLogSink
+from project.infra.db.migrations import SchemaMigrator
 from project.infra.db.orm_db import PgManager
 from project.infra.db.person_repository import PgPersonRepository
 
@@ -21,8 +46,8 @@ from project.infra.db.person_repository import PgPersonRepository
 # Adaptadores dummy (infra real deve substituir)
 @dataclass
 class _DummyS3:
-    def list_nists(self):
-        return []
+    def list_nists(self, start_after=None, page_size=1000):
+        return iter(())
 
     def read_bytes(self, key: str) -> bytes:
         raise NotImplementedError
@@ -36,7 +61,7 @@ class _DummyS3:
 
 @dataclass
 class _DummyRepo:
-    def upsert_person_from_nist(self, person, base, md5_hash: str) -> None:
+    def upsert_person_from_nist(self, person, base, md5_hash: str, records=()) -> None:
         pass
 
     def log(self, level: str, message: str) -> None:
@@ -57,19 +82,48 @@ def main(argv: list[str] | None = None) -> int:
     parser = argparse.ArgumentParser(description="MITRA NIST Manager (CLI)")
     sub = parser.add_subparsers(dest="command", required=True)
 
-    sub.add_parser("process", help="Processa NISTs pendentes do bucket")
+    process = sub.add_parser("process", help="Processa NISTs pendentes do bucket")
+    process.add_argument("--workers", type=int, help="Ativa o pipeline concorrente com N workers por estágio")
+    process.add_argument("--queue-size", type=int, default=64, help="Capacidade das filas entre estágios (padrão: 64)")
+    process.add_argument("--read-workers", type=int, help="Workers do estágio de leitura (sobrepõe --workers)")
+    process.add_argument("--parse-workers", type=int, help="Workers do estágio de parse/md5 (sobrepõe --workers)")
+    process.add_argument("--persist-workers", type=int, help="Workers do estágio de persistência (sobrepõe --workers)")
+    process.add_argument("--move-workers", type=int, help="Workers do estágio de movimentação (sobrepõe --workers)")
+    process.add_argument("--batch-size", type=int, help="Linhas por upsert e objetos por movimentação em lote no pipeline (padrão: INGEST_BATCH_SIZE)")
+    process.add_argument("--flush-interval", type=float, help="Segundos até gravar um lote incompleto (padrão: INGEST_FLUSH_INTERVAL)")
+    process.add_argument("--no-precheck", action="store_true", help="Não consulta o banco antes de baixar (reprocessa objetos já ingeridos)")
+    process.add_argument("--known-action", choices=["move", "skip"], default="move", help="O que fazer com objetos já ingeridos (padrão: move)")
+    process.add_argument("--no-verify-etag", action="store_true", help="Não compara o ETag (md5 de uploads de parte única) com o md5 gravado")
+    process.add_argument("--parse-processes", type=int, help="Calcula md5/parse em um pool de N processos (memória compartilhada)")
+    process.add_argument("--list-page-size", type=int, default=1000, help="Chaves por página da listagem do bucket (padrão: 1000)")
+    process.add_argument("--restart", action="store_true", help="Ignora o checkpoint salvo e lista o bucket desde o início")
+    process.add_argument("--no-checkpoint", action="store_true", help="Não grava nem usa o cursor de listagem (findface.tb_checkpoint)")
+    process.add_argument("--no-parse-cache", action="store_true", help="Não consulta nem grava o cache de parse por md5 (CACHE_DIR)")
+    process.add_argument("--no-quarantine", action="store_true", help="Não valida a estrutura (CNT/LEN) nem move arquivos inválidos para nist-quarentena/")
 
     upload = sub.add_parser("upload", help="Faz upload de um arquivo .nst")
     upload.add_argument("path", help="Caminho do arquivo .nst")
 
     sub.add_parser("check-connections", help="Testa conexões com S3 (MinIO) e PostgreSQL")
 
+    delete_cmd = sub.add_parser("delete", help="Remove objetos do bucket S3")
+    delete_group = delete_cmd.add_mutually_exclusive_group(required=True)
+    delete_group.add_argument("--key", help="Chave completa do objeto a remover")
+    delete_group.add_argument("--prefix", help="Prefixo dos objetos a remover")
+    delete_group.add_argument("--all", action="store_true", help="Remove todos os objetos do bucket")
+    delete_cmd.add_argument("--dry-run", action="store_true", help="Apenas conta os objetos que seriam removidos")
+
+    sub.add_parser("migrate", help="Aplica as migrações pendentes do schema findface")
+
     sample = sub.add_parser("sample", help="Busca N NISTs do S3, mostra dados e persiste")
     sample.add_argument("--limit", type=int, default=3, help="Quantidade de NISTs a coletar (padrão: 3)")
+    sample.add_argument("--no-parse-cache", action="store_true", help="Não consulta nem grava o cache de parse por md5 (CACHE_DIR)")
 
     sample_local = sub.add_parser("sample-local", help="Lê NISTs da pasta local 'nists/' e persiste no DB")
     sample_local.add_argument("--limit", type=int, default=3, help="Quantidade de NISTs locais (padrão: 3)")
     sample_local.add_argument("--files", nargs="*", help="Lista de arquivos .nst específicos para processar")
+    sample_local.add_argument("--no-manifest", action="store_true", help="Não consulta nem atualiza o manifesto local (CACHE_DIR)")
+    sample_local.add_argument("--no-parse-cache", action="store_true", help="Não consulta nem grava o cache de parse por md5 (CACHE_DIR)")
 
     dbsample = sub.add_parser("db-sample", help="Consulta o banco e retorna amostras de tabelas do schema findface")
     dbsample.add_argument("--limit", type=int, default=5, help="Quantidade de linhas por tabela (padrão: 5)")
@@ -78,14 +132,24 @@ def main(argv: list[str] | None = None) -> int:
     upbatch = sub.add_parser("upload-batch", help="Faz upload de múltiplos .nst (arquivos e/ou diretórios)")
     upbatch.add_argument("paths", nargs="+", help="Arquivos ou diretórios contendo .nst")
     upbatch.add_argument("--recursive", action="store_true", help="Varre diretórios recursivamente")
+    upbatch.add_argument("--workers", type=int, help="Uploads simultâneos (padrão: UPLOAD_WORKERS)")
+    upbatch.add_argument("--no-manifest", action="store_true", help="Não consulta nem atualiza o manifesto local (CACHE_DIR)")
+    upbatch.add_argument("--refresh-index", action="store_true", help="Refaz o índice local de chaves do bucket antes de checar duplicados")
 
     upurl = sub.add_parser("upload-url", help="Baixa .nst de uma URL/API e envia ao S3")
     upurl.add_argument("urls", nargs="+", help="URLs HTTP(s) para baixar o .nst")
     upurl.add_argument("--filename", help="Nome do arquivo para compor a chave S3 (opcional)")
+    upurl.add_argument("--workers", type=int, help="Downloads simultâneos (padrão: DOWNLOAD_WORKERS)")
+    upurl.add_argument("--per-host", type=int, help="Conexões simultâneas por host (padrão: DOWNLOAD_PER_HOST)")
 
     upidx = sub.add_parser("upload-url-index", help="Carrega uma lista de URLs de .nst a partir de um índice (JSON ou texto)")
     upidx.add_argument("index", help="URL do índice contendo os links de .nst")
     upidx.add_argument("--format", choices=["json", "txt"], default="json", help="Formato do índice (json: array de URLs/objetos; txt: 1 URL por linha)")
+    upidx.add_argument("--workers", type=int, help="Downloads simultâneos (padrão: DOWNLOAD_WORKERS)")
+    upidx.add_argument("--per-host", type=int, help="Conexões simultâneas por host (padrão: DOWNLOAD_PER_HOST)")
+    upidx.add_argument("--restart", action="store_true", help="Esquece as URLs já concluídas e percorre o índice do início")
+    upidx.add_argument("--no-journal", action="store_true", help="Não consulta nem registra o diário de URLs concluídas (CACHE_DIR)")
+    upidx.add_argument("--refresh-index", action="store_true", help="Refaz o índice local de chaves do bucket antes de checar duplicados")
 
     args = parser.parse_args(argv)
 
@@ -97,76 +161,182 @@ def main(argv: list[str] | None = None) -> int:
 
     # Adaptadores reais (S3/DB)
     s3_client = MinioFactory(cfg).build()
-    s3 = MinioS3Adapter(client=s3_client, bucket=cfg.s3_bucket)
-    repo = PgPersonRepository(cfg)
-
+    s3 = MinioS3Adapter(client=s3_client, bucket=cfg.s3_bucket, multipart_threshold=cfg.multipart_threshold)
+    pg = PgManager(cfg)
+    log_sink = BufferedLogSink(
+        pg,
+        max_buffer=cfg.log_buffer_size,
+        flush_size=cfg.log_flush_size,
+        flush_interval=cfg.log_flush_interval,
+        on_full=cfg.log_full_policy,
+    )
+    repo = PgPersonRepository(cfg, manager=pg, log_sink=log_sink)
+    # Índice de chaves do bucket: carregado/listado só no primeiro uso (comandos de upload).
+    key_index = S3KeyIndex(
+        s3,
+        path=Path(cfg.cache_dir) / f"key-index-{cfg.s3_bucket}.bin",
+        max_age=cfg.key_index_max_age,
+        force_refresh=getattr(args, "refresh_index", False),
+    )
+
+    try:
+        return _run_command(args, cfg, s3, repo, pg, parser_service, checksum, key_index)
+    finally:
+        try:
+            # Persiste as chaves enviadas nesta execução para as próximas.
+            key_index.save()
+        finally:
+            # Grava os logs pendentes e fecha o pool compartilhado mesmo em caso de erro.
+            repo.close()
+
+
+def _run_command(
+    args: argparse.Namespace,
+    cfg: Config,
+    s3: MinioS3Adapter,
+    repo: PgPersonRepository,
+    pg: PgManager,
+    parser_service: NistParserService,
+    checksum: ChecksumService,
+    key_index: S3KeyIndex,
+) -> int:
+    """Executa o subcomando selecionado com os adaptadores já construídos."""
     if args.command == "process":
-        usecase = ProcessNistUseCase(s3=s3, repository=repo, parser=parser_service, checksum=checksum)
-        count = usecase.execute()
+        analyzer = None
+        if args.parse_processes:
+            from project.infra.parse_pool import ProcessPoolAnalyzer
+
+            analyzer = ProcessPoolAnalyzer(workers=args.parse_processes, parser=parser_service, checksum=checksum)
+        parse_cache = _open_parse_cache(cfg, args)
+        usecase = ProcessNistUseCase(
+            s3=s3,
+            repository=repo,
+            parser=parser_service,
+            checksum=checksum,
+            analyzer=analyzer,
+            precheck=not args.no_precheck,
+            known_action=args.known_action,
+            verify_etag=not args.no_verify_etag,
+            processed_strategy=cfg.processed_strategy,
+            checkpoint=None if args.no_checkpoint else PgCheckpointStore(pg),
+            checkpoint_name=f"process:{cfg.s3_bucket}",
+            resume=not args.restart,
+            mark_watermark=cfg.mark_watermark,
+            list_page_size=max(1, args.list_page_size),
+            quarantine=not args.no_quarantine,
+            parse_cache=parse_cache,
+        )
+        stage_overrides = (args.read_workers, args.parse_workers, args.persist_workers, args.move_workers)
+        try:
+            if args.workers is None and analyzer is None and all(v is None for v in stage_overrides):
+                count = usecase.execute()
+            else:
+                base = PipelineOptions.uniform(max(1, args.workers or 1), queue_size=max(1, args.queue_size))
+                # Cada worker de parse aguarda um processo do pool; sem isso o pool fica ocioso.
+                parse_default = max(base.parse_workers, args.parse_processes or 0)
+                options = PipelineOptions(
+                    read_workers=args.read_workers or base.read_workers,
+                    parse_workers=args.parse_workers or parse_default,
+                    persist_workers=args.persist_workers or base.persist_workers,
+                    move_workers=args.move_workers or base.move_workers,
+                    queue_size=base.queue_size,
+                    batch_size=max(1, args.batch_size or cfg.ingest_batch_size),
+                    flush_interval=args.flush_interval if args.flush_interval is not None else cfg.ingest_flush_interval,
+                )
+                count = usecase.execute_pipelined(options)
+        finally:
+            if analyzer is not None:
+                analyzer.close()
+            if parse_cache is not None:
+                parse_cache.close()
         print(f"Processados: {count}")
+        if usecase.stats.quarantined:
+            print(f"Em quarentena (estrutura inválida): {usecase.stats.quarantined}")
+        if usecase.stats.parse_cache_hits:
+            print(f"Parse reaproveitado do cache (md5): {usecase.stats.parse_cache_hits}")
+        if usecase.precheck or usecase.processed_strategy == "mark":
+            stats = usecase.stats
+            print(
+                f"Já ingeridos: {stats.known} (movidos/marcados: {stats.known_moved}, ignorados: {stats.known_skipped}) - "
+                f"downloads evitados: {stats.downloads_avoided}, ETag divergente: {stats.etag_mismatch}, "
+                f"já processados: {stats.already_processed}"
+            )
         return 0
 
     if args.command == "upload":
         # leitura local para calcular chave e evitar duplicação
-        from pathlib import Path
-        raw = Path(args.path).read_bytes()
-        base_key = parser_service.compose_key_for_upload(Path(args.path).name, raw)
-        read_key = parser_service.destination_key_for_processed(base_key, raw)
+        with map_file(args.path) as raw:
+            nist = parser_service.load_header(raw)
+            base_key = parser_service.compose_key_for_upload(Path(args.path).name, nist)
+            # Só os campos indexados são usados depois que o mapeamento é fechado.
+            nist.raw = b""
+        read_key = parser_service.destination_key_for_processed(base_key, nist)
+        # Arquivo único: dois HEADs custam menos que listar o bucket para o índice.
         if s3.object_exists(base_key) or s3.object_exists(read_key):
             print(f"SKIP (exists): {base_key} or {read_key}")
             return 0
-        s3.upload_bytes(base_key, raw)
+        s3.upload_file(base_key, Path(args.path))
         print(base_key)
         return 0
 
     if args.command == "delete":
-
         delete_usecase = DeleteNistUseCase(s3=s3)
-
         if args.key:
-
+            if args.dry_run:
+                print(f"Seria removido: {args.key}")
+                return 0
             delete_usecase.delete_by_key(args.key)
-
             print(f"Removido: {args.key}")
-
             return 0
-
         if args.prefix:
-
-            removed = delete_usecase.delete_by_prefix(args.prefix)
-
-            print(f"Removidos {removed} objetos com prefixo '{args.prefix}'")
-
-            return 0
-
-        if args.all:
-
-            removed = delete_usecase.delete_all()
-
-            print(f"Removidos {removed} objetos do bucket '{cfg.s3_bucket}'")
-
+            result = delete_usecase.delete_by_prefix(args.prefix, dry_run=args.dry_run)
+            target = f"com prefixo '{args.prefix}'"
+        else:
+            result = delete_usecase.delete_all(dry_run=args.dry_run)
+            target = f"do bucket '{cfg.s3_bucket}'"
+        if result.dry_run:
+            print(f"Seriam removidos {result.listed} objetos {target}")
             return 0
-
-
+        print(f"Removidos {result.removed} objetos {target} (falhas: {result.failed})")
+        for key, message in result.errors.items():
+            print(f"  FALHA {key}: {message}")
+        return 1 if result.failed else 0
 
     if args.command == "sample":
         limit = max(1, int(args.limit))
         checksum = ChecksumService()
         collected = []
-        keys = s3.list_nists()
-        for key in keys[:limit]:
-            raw = s3.read_bytes(key)
-            md5_hash = checksum.md5_bytes(raw)
-            person, base = parser_service.parse(raw)
-            setattr(base, "s3_key", key)
-            repo.upsert_person_from_nist(person, base, md5_hash)
-            item = {
-                "key": key,
-                "md5": md5_hash,
-                "origem": getattr(base, "origem", None),
-                "size": len(raw),
-            }
-            collected.append(item)
+        keys = list(islice(s3.list_nists(page_size=limit), limit))
+        known = repo.lookup_ingested(keys)
+        parse_cache = _open_parse_cache(cfg, args)
+        try:
+            for key in keys:
+                row = known.get(key)
+                if row is not None:
+                    # Já ingerido: não baixa o payload novamente.
+                    collected.append({"key": key, "md5": row.md5_hash, "origem": row.origin, "status": "already_ingested"})
+                    continue
+                raw = s3.read_bytes(key)
+                reason = parser_service.validate(raw)
+                if reason is not None:
+                    # Estrutura inválida: nada é gravado (o `process` move o objeto para a quarentena).
+                    collected.append({"key": key, "size": len(raw), "status": "invalid", "reason": reason})
+                    continue
+                md5_hash = checksum.md5_bytes(raw)
+                nist, person, base = _parse_cached(parser_service, parse_cache, raw, md5_hash)
+                setattr(base, "s3_key", key)
+                # Índice de registros (tb_nist_record) na mesma transação, como no `process`.
+                repo.upsert_person_from_nist(person, base, md5_hash, nist.record_rows())
+                item = {
+                    "key": key,
+                    "md5": md5_hash,
+                    "origem": getattr(base, "origem", None),
+                    "size": len(raw),
+                }
+                collected.append(item)
+        finally:
+            if parse_cache is not None:
+                parse_cache.close()
         print(json.dumps(collected, ensure_ascii=False, indent=2))
         return 0
 
@@ -184,28 +354,58 @@ def main(argv: list[str] | None = None) -> int:
         if not files:
             print("Nenhum arquivo .nst encontrado em 'nists/'.")
             return 1
+        manifest = None if args.no_manifest else SqliteManifest(Path(cfg.cache_dir) / MANIFEST_FILENAME)
+        parse_cache = _open_parse_cache(cfg, args)
         collected = []
-        for fp in files[:limit]:
-            raw = fp.read_bytes()
-            md5_hash = checksum.md5_bytes(raw)
-            person, base = parser_service.parse(raw)
-            # usa um pseudo s3_key com prefixo local
-            setattr(base, "s3_key", f"local/{fp.name}")
-            repo.upsert_person_from_nist(person, base, md5_hash)
-            item = {
-                "key": f"local/{fp.name}",
-                "md5": md5_hash,
-                "origem": getattr(base, "origem", None),
-                "size": len(raw),
-            }
-            collected.append(item)
+        try:
+            for fp in files[:limit]:
+                stat = fp.stat()
+                # Caminho absoluto: a mesma chave do manifesto usada pelo upload-batch.
+                known = manifest.get(str(fp.resolve()), stat.st_size, stat.st_mtime_ns) if manifest else None
+                if known is not None and known.ingested:
+                    # Inalterado desde a última persistência: apenas o stat().
+                    collected.append(
+                        {"key": known.s3_key, "md5": known.md5_hash, "size": stat.st_size, "status": "skipped_unchanged"}
+                    )
+                    continue
+                # Arquivo mapeado: md5 e parse leem direto das páginas do arquivo.
+                with map_file(fp) as raw:
+                    reason = parser_service.validate(raw)
+                    if reason is None:
+                        md5_hash = known.md5_hash if known is not None and known.md5_hash else checksum.md5_bytes(raw)
+                        nist, person, base = _parse_cached(parser_service, parse_cache, raw, md5_hash)
+                        # As faixas de imagem dependem do payload: calculadas antes de fechar o mapeamento.
+                        records = nist.record_rows()
+                        # Só os campos indexados são usados depois que o mapeamento é fechado.
+                        nist.raw = b""
+                if reason is not None:
+                    collected.append({"key": f"local/{fp.name}", "size": stat.st_size, "status": "invalid", "reason": reason})
+                    continue
+                # usa um pseudo s3_key com prefixo local
+                setattr(base, "s3_key", f"local/{fp.name}")
+                repo.upsert_person_from_nist(person, base, md5_hash, records)
+                if manifest is not None:
+                    manifest.record_ingest(
+                        ManifestEntry(str(fp.resolve()), stat.st_size, stat.st_mtime_ns, md5_hash, nist.origin, f"local/{fp.name}")
+                    )
+                item = {
+                    "key": f"local/{fp.name}",
+                    "md5": md5_hash,
+                    "origem": getattr(base, "origem", None),
+                    "size": stat.st_size,
+                }
+                collected.append(item)
+        finally:
+            if manifest is not None:
+                manifest.close()
+            if parse_cache is not None:
+                parse_cache.close()
         print(json.dumps(collected, ensure_ascii=False, indent=2))
         return 0
 
     if args.command == "db-sample":
-        import psycopg
         limit = max(1, int(args.limit))
-        with psycopg.connect(host=cfg.db_host, port=cfg.db_port, dbname=cfg.db_name, user=cfg.db_user, password=cfg.db_password) as conn:
+        with pg.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT table_name FROM information_schema.tables WHERE table_schema='findface' AND table_type='BASE TABLE' ORDER BY table_name;")
                 existing = [r[0] for r in cur.fetchall()]
@@ -224,109 +424,85 @@ def main(argv: list[str] | None = None) -> int:
 
     if args.command == "upload-batch":
         from pathlib import Path
-        sent = []
-        for p in args.paths:
-            pth = Path(p)
-            files = []
-            if pth.is_dir():
-                files = list(pth.rglob("*.nst")) if args.recursive else list(pth.glob("*.nst"))
-            elif pth.is_file():
-                files = [pth]
-            else:
-                continue
-            for fp in files:
-                try:
-                    raw = fp.read_bytes()
-                    base_key = parser_service.compose_key_for_upload(fp.name, raw)
-                    read_key = parser_service.destination_key_for_processed(base_key, raw)
-                    if s3.object_exists(base_key) or s3.object_exists(read_key):
-                        sent.append({"file": str(fp), "status": "skipped_exists", "key": base_key})
-                        continue
-                    s3.upload_bytes(base_key, raw)
-                    sent.append({"file": str(fp), "status": "uploaded", "key": base_key})
-                except Exception as exc:
-                    sent.append({"file": str(fp), "status": "error", "error": str(exc)})
+
+        def _files():
+            for p in args.paths:
+                pth = Path(p)
+                if pth.is_dir():
+                    yield from (pth.rglob("*.nst") if args.recursive else pth.glob("*.nst"))
+                elif pth.is_file():
+                    yield pth
+
+        manifest = None if args.no_manifest else SqliteManifest(Path(cfg.cache_dir) / MANIFEST_FILENAME)
+        usecase = UploadBatchUseCase(
+            s3=s3,
+            nist_tools=parser_service,
+            file_reader=MappedFileReader(),
+            workers=max(1, args.workers or cfg.upload_workers),
+            key_index=key_index,
+            manifest=manifest,
+            checksum=checksum,
+        )
+        try:
+            sent = usecase.execute(_files())
+        finally:
+            if manifest is not None:
+                manifest.close()
         print(json.dumps(sent, ensure_ascii=False, indent=2))
+        stats = usecase.stats
+        # Vazão em stderr para não misturar com o JSON do resumo.
+        print(
+            f"Arquivos: {stats.files} (enviados: {stats.uploaded}, existentes: {stats.skipped}, "
+            f"inalterados: {stats.unchanged}, erros: {stats.errors}) "
+            f"em {stats.elapsed:.1f}s - {stats.files_per_second:.1f} arquivos/s, {stats.mb_per_second:.2f} MB/s",
+            file=sys.stderr,
+        )
+        if stats.manifest_errors:
+            print(f"Falhas ao gravar o manifesto: {stats.manifest_errors}", file=sys.stderr)
         return 0
 
     if args.command == "upload-url-index":
-        import urllib.request
-        import json as _json
-        import urllib.parse
-        try:
-            with urllib.request.urlopen(args.index, timeout=30) as resp:
-                payload = resp.read().decode("utf-8", errors="ignore")
-        except Exception as exc:
-            print(_safe(f"Falha ao baixar índice: {exc}"))
-            return 1
-
-        urls: list[tuple[str, str | None]] = []
-        if args.format == "txt":
-            for line in payload.splitlines():
-                u = line.strip()
-                if not u:
-                    continue
-                urls.append((u, None))
-        else:
+        from contextlib import ExitStack
+
+        journal = None if args.no_journal else SqliteUrlJournal(Path(cfg.cache_dir) / URL_JOURNAL_FILENAME)
+        # Conexão própria para o índice: ela fica aberta durante toda a execução.
+        index_downloader = HttpDownloader(per_host=1)
+        with ExitStack() as stack:
+            stack.callback(index_downloader.close)
+            if journal is not None:
+                stack.callback(journal.close)
+                if args.restart:
+                    journal.clear()
             try:
-                data = _json.loads(payload)
-                if isinstance(data, list):
-                    for item in data:
-                        if isinstance(item, str):
-                            urls.append((item, None))
-                        elif isinstance(item, dict) and "url" in item:
-                            urls.append((str(item["url"]), item.get("filename")))
-                else:
-                    print("Índice JSON inválido: esperado array")
-                    return 1
+                body = stack.enter_context(index_downloader.open(args.index))
             except Exception as exc:
-                print(_safe(f"Falha ao parsear índice JSON: {exc}"))
+                print(f"Falha ao baixar índice: {exc}")
                 return 1
-
-        # Reutiliza fluxo do upload-url (com dedupe por existência)
-        import urllib.request
-        import urllib.parse
-        sent = []
-        for url, forced_name in urls:
+            # O índice é lido em fluxo, à medida que as URLs são consumidas.
+            entries = iter_text_index(body) if args.format == "txt" else iter_json_index(body)
             try:
-                with urllib.request.urlopen(url, timeout=30) as resp:
-                    raw = resp.read()
-                fname = (forced_name or urllib.parse.unquote(urllib.parse.urlparse(url).path.split('/')[-1] or 'download.nst'))
-                if not fname.endswith('.nst'):
-                    fname = fname + '.nst'
-                base_key = parser_service.compose_key_for_upload(fname, raw)
-                read_key = parser_service.destination_key_for_processed(base_key, raw)
-                if s3.object_exists(base_key) or s3.object_exists(read_key):
-                    sent.append({"url": url, "status": "skipped_exists", "key": base_key})
-                    continue
-                s3.upload_bytes(base_key, raw)
-                sent.append({"url": url, "status": "uploaded", "key": base_key, "size": len(raw)})
-            except Exception as exc:
-                sent.append({"url": url, "status": "error", "error": str(exc)})
-        print(json.dumps(sent, ensure_ascii=False, indent=2))
-        return 0
+                return _upload_urls(
+                    cfg, args, s3, parser_service, key_index, _build_downloader(cfg, args), entries, journal
+                )
+            except UrlIndexError as exc:
+                print(f"Falha ao ler índice: {exc}")
+                return 1
 
     if args.command == "upload-url":
-        import urllib.request
-        import urllib.parse
-        sent = []
-        for url in args.urls:
-            try:
-                with urllib.request.urlopen(url, timeout=30) as resp:
-                    raw = resp.read()
-                fname = args.filename or urllib.parse.unquote(urllib.parse.urlparse(url).path.split('/')[-1] or 'download.nst')
-                if not fname.endswith('.nst'):
-                    fname = fname + '.nst'
-                base_key = parser_service.compose_key_for_upload(fname, raw)
-                read_key = parser_service.destination_key_for_processed(base_key, raw)
-                if s3.object_exists(base_key) or s3.object_exists(read_key):
-                    sent.append({"url": url, "status": "skipped_exists", "key": base_key})
-                    continue
-                s3.upload_bytes(base_key, raw)
-                sent.append({"url": url, "status": "uploaded", "key": base_key, "size": len(raw)})
-            except Exception as exc:
-                sent.append({"url": url, "status": "error", "error": str(exc)})
-        print(json.dumps(sent, ensure_ascii=False, indent=2))
+        downloader = _build_downloader(cfg, args)
+        # Poucas URLs: checa duplicados com HEADs, sem listar o bucket para o índice.
+        return _upload_urls(
+            cfg, args, s3, parser_service, None, downloader, [(url, args.filename) for url in args.urls]
+        )
+
+    if args.command == "migrate":
+        migrator = SchemaMigrator(pg)
+        applied = migrator.migrate()
+        if applied:
+            print(f"Migrações aplicadas: {', '.join(str(v) for v in applied)}")
+        else:
+            print("Schema já atualizado")
+        print(f"Versão atual: {migrator.current_version()}")
         return 0
 
     if args.command == "check-connections":
@@ -341,14 +517,14 @@ def main(argv: list[str] | None = None) -> int:
         # Teste S3
         try:
             # apenas itera 1 item para validar permissão/listagem
-            keys = s3.list_nists()
-            print(f"S3 OK - bucket='{cfg.s3_bucket}', objetos_nist={len(keys)}")
+            first = next(s3.list_nists(page_size=1), None)
+            print(f"S3 OK - bucket='{cfg.s3_bucket}', primeiro_nist={first or '-'}")
         except Exception as exc:
             print("S3 ERROR - " + _safe(exc).encode('cp1252', 'ignore').decode('cp1252'))
 
         # Teste PostgreSQL
         try:
-            version = PgManager(cfg).test_connection()
+            version = pg.test_connection()
             print("PostgreSQL OK - " + _safe(version).encode('cp1252', 'ignore').decode('cp1252'))
         except Exception as exc:
             print("PostgreSQL ERROR - " + _safe(exc).encode('cp1252', 'ignore').decode('cp1252'))
@@ -357,16 +533,71 @@ def main(argv: list[str] | None = None) -> int:
     return 1
 
 
-if __name__ == "__main__":
-    raise SystemExit(main())
-
-
-    delete_cmd = sub.add_parser("delete", help="Remove objetos do bucket S3")
-
-    delete_group = delete_cmd.add_mutually_exclusive_group(required=True)
-
-    delete_group.add_argument("--key", help="Chave completa do objeto a remover")
+def _open_parse_cache(cfg: Config, args: argparse.Namespace) -> SqliteParseCache | None:
+    if args.no_parse_cache:
+        return None
+    path = Path(cfg.cache_dir) / PARSE_CACHE_FILENAME
+    return SqliteParseCache(path, version=PARSER_VERSION, max_bytes=cfg.parse_cache_max_bytes)
+
+
+def _parse_cached(
+    parser_service: NistParserService, cache: ParseCachePort | None, raw: BytesLike, md5_hash: str
+) -> tuple[ParsedNist, Person, OriginBase]:
+    """Parse do payload, reaproveitando o resultado gravado no cache para o mesmo md5."""
+    summary = cache.get(md5_hash) if cache is not None else None
+    if summary is not None:
+        return parser_service.restore(raw, summary)
+    nist = parser_service.load(raw)
+    person, base = parser_service.parse(nist)
+    if cache is not None:
+        cache.put(md5_hash, parser_service.summarize(nist, person, nist.record_rows()))
+    return nist, person, base
+
+
+def _build_downloader(cfg: Config, args: argparse.Namespace) -> HttpDownloader:
+    return HttpDownloader(per_host=max(1, args.per_host or cfg.download_per_host))
+
+
+def _upload_urls(
+    cfg: Config,
+    args: argparse.Namespace,
+    s3: MinioS3Adapter,
+    parser_service: NistParserService,
+    key_index: S3KeyIndex | None,
+    downloader: HttpDownloader,
+    urls: Iterable[tuple[str, str | None]],
+    journal: SqliteUrlJournal | None = None,
+) -> int:
+    """Baixa e envia as URLs em paralelo, imprimindo o resumo (JSON) e a vazão (stderr).
+
+    O array JSON é impresso item a item, sem acumular os resumos na memória.
+    """
+    usecase = UploadUrlUseCase(
+        s3=s3,
+        nist_tools=parser_service,
+        downloader=downloader,
+        workers=max(1, args.workers or cfg.download_workers),
+        key_index=key_index,
+        journal=journal,
+    )
+    count = 0
+    try:
+        for entry in usecase.execute_iter(urls):
+            item = textwrap.indent(json.dumps(entry, ensure_ascii=False, indent=2), "  ")
+            print(("[\n" if count == 0 else ",\n") + item, end="", flush=True)
+            count += 1
+    finally:
+        downloader.close()
+        print("\n]" if count else "[]")
+    stats = usecase.stats
+    print(
+        f"URLs: {stats.files} (enviadas: {stats.uploaded}, existentes: {stats.skipped}, "
+        f"já concluídas: {stats.already_done}, erros: {stats.errors}) "
+        f"em {stats.elapsed:.1f}s - {stats.files_per_second:.1f} URLs/s, {stats.mb_per_second:.2f} MB/s",
+        file=sys.stderr,
+    )
+    return 0
 
-    delete_group.add_argument("--prefix", help="Prefixo dos objetos a remover")
 
-    delete_group.add_argument("--all", action="store_true", help="Remove todos os objetos do bucket")
\ No newline at end of file
+if __name__ == "__main__":
+    raise SystemExit(main())
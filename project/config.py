@@ -31,6 +31,28 @@ class Config:
 
     log_level: str
 
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 8
+    db_pool_max_lifetime: float = 1800.0
+    db_pool_timeout: float = 30.0
+
+    ingest_batch_size: int = 500
+    ingest_flush_interval: float = 2.0
+    processed_strategy: str = "move"
+    mark_watermark: bool = False
+    upload_workers: int = 4
+    multipart_threshold: int = 16 * 1024 * 1024
+    download_workers: int = 8
+    download_per_host: int = 4
+    cache_dir: str = ".cache"
+    key_index_max_age: float = 3600.0
+    parse_cache_max_bytes: int = 256 * 1024 * 1024
+
+    log_buffer_size: int = 10_000
+    log_flush_size: int = 200
+    log_flush_interval: float = 1.0
+    log_full_policy: str = "flush"
+
 
 def _getenv_bool(name: str, default: bool) -> bool:
     val = os.getenv(name)
@@ -89,6 +111,25 @@ def load_config() -> Config:
         db_user=db_user,
         db_password=db_password,
         log_level=os.getenv("LOG_LEVEL", "INFO"),
+        db_pool_min_size=int(os.getenv("DB_POOL_MIN_SIZE", "1")),
+        db_pool_max_size=int(os.getenv("DB_POOL_MAX_SIZE", "8")),
+        db_pool_max_lifetime=float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+        db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        ingest_batch_size=int(os.getenv("INGEST_BATCH_SIZE", "500")),
+        ingest_flush_interval=float(os.getenv("INGEST_FLUSH_INTERVAL", "2")),
+        processed_strategy=os.getenv("PROCESSED_STRATEGY", "move").strip().lower(),
+        mark_watermark=_getenv_bool("MARK_WATERMARK", False),
+        upload_workers=int(os.getenv("UPLOAD_WORKERS", "4")),
+        multipart_threshold=int(os.getenv("MULTIPART_THRESHOLD", str(16 * 1024 * 1024))),
+        download_workers=int(os.getenv("DOWNLOAD_WORKERS", "8")),
+        download_per_host=int(os.getenv("DOWNLOAD_PER_HOST", "4")),
+        cache_dir=os.getenv("CACHE_DIR", str(Path(__file__).resolve().parents[1] / ".cache")),
+        key_index_max_age=float(os.getenv("KEY_INDEX_MAX_AGE", "3600")),
+        parse_cache_max_bytes=int(os.getenv("PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        log_buffer_size=int(os.getenv("LOG_BUFFER_SIZE", "10000")),
+        log_flush_size=int(os.getenv("LOG_FLUSH_SIZE", "200")),
+        log_flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "1")),
+        log_full_policy=os.getenv("LOG_FULL_POLICY", "flush").strip().lower(),
     )
 
 
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Protocol
+
+from project.infra.db.migrations import SchemaMigrator
+
+
+class _ConnectionProvider(Protocol):
+    def connection(self): ...  # noqa: ANN201
+
+
+@dataclass
+class PgCheckpointStore:
+    """Cursor de listagem (`start_after`) persistido em findface.tb_checkpoint.
+
+    Exemplo
+    >>> store = PgCheckpointStore(PgManager(cfg))  # doctest: +SKIP
+    >>> store.save("process:teste", "nist/TSE/0100.nst")  # doctest: +SKIP
+    >>> store.load("process:teste")  # doctest: +SKIP
+    'nist/TSE/0100.nst'
+    """
+
+    manager: _ConnectionProvider
+
+    def load(self, name: str) -> Optional[str]:
+        """Retorna o cursor gravado para `name` ou None."""
+        SchemaMigrator(self.manager).ensure()
+        with self.manager.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT start_after FROM findface.tb_checkpoint WHERE name = %s", (name,))
+                row = cursor.fetchone()
+        return row[0] if row else None
+
+    def save(self, name: str, start_after: Optional[str]) -> None:
+        """Grava o cursor de `name`; None remove o checkpoint."""
+        SchemaMigrator(self.manager).ensure()
+        with self.manager.connection() as connection:
+            with connection.cursor() as cursor:
+                if start_after is None:
+                    cursor.execute("DELETE FROM findface.tb_checkpoint WHERE name = %s", (name,))
+                    return
+                cursor.execute(
+                    """
+                    INSERT INTO findface.tb_checkpoint (name, start_after, updated_at)
+                    VALUES (%s, %s, NOW())
+                    ON CONFLICT (name) DO UPDATE
+                    SET start_after = EXCLUDED.start_after, updated_at = NOW();
+                    """,
+                    (name, start_after),
+                )
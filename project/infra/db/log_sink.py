@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Protocol
+
+_logger = logging.getLogger(__name__)
+
+FULL_POLICIES = ("flush", "drop")
+
+
+class _ConnectionProvider(Protocol):
+    def connection(self): ...  # noqa: ANN201
+
+
+@dataclass
+class BufferedLogSink:
+    """Buffer de logs gravado em findface.tb_log por uma thread em segundo plano.
+
+    As entradas são gravadas com COPY quando o buffer atinge `flush_size` ou a
+    cada `flush_interval` segundos. Com o buffer cheio (`max_buffer`), a política
+    `flush` bloqueia quem escreve até a gravação liberar espaço e `drop`
+    descarta a entrada (contabilizada em `dropped`). `close()` grava o restante.
+    """
+
+    manager: _ConnectionProvider
+    max_buffer: int = 10_000
+    flush_size: int = 200
+    flush_interval: float = 1.0
+    on_full: str = "flush"
+    dropped: int = field(default=0, init=False)
+    failed: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        if self.on_full not in FULL_POLICIES:
+            raise ValueError(f"política inválida para buffer cheio: {self.on_full!r}")
+        self._buffer: list[tuple[str, str, datetime]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="tb-log-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, level: str, message: str) -> None:
+        """Enfileira uma entrada de log sem acessar o banco."""
+        entry = (level, message, datetime.now(timezone.utc))
+        with self._cond:
+            if self._closed:
+                # Após o encerramento, grava de forma síncrona para não perder a entrada.
+                self._flush_rows([entry])
+                return
+            if len(self._buffer) >= self.max_buffer:
+                if self.on_full == "drop":
+                    self.dropped += 1
+                    return
+                self._cond.notify_all()
+                self._cond.wait_for(lambda: len(self._buffer) < self.max_buffer or self._closed)
+                if self._closed:
+                    # Encerrado durante a espera: a thread pode já ter gravado o último lote.
+                    self._flush_rows([entry])
+                    return
+            self._buffer.append(entry)
+            if len(self._buffer) >= self._flush_threshold():
+                self._cond.notify_all()
+
+    def _flush_threshold(self) -> int:
+        # Buffer cheio também dispara a gravação, mesmo abaixo de `flush_size`.
+        return min(self.flush_size, self.max_buffer)
+
+    def flush(self) -> None:
+        """Grava imediatamente as entradas pendentes na thread chamadora."""
+        with self._cond:
+            batch, self._buffer = self._buffer, []
+            self._cond.notify_all()
+        self._flush_rows(batch)
+
+    def close(self) -> None:
+        """Encerra a thread garantindo a gravação de todas as entradas pendentes."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or len(self._buffer) >= self._flush_threshold(),
+                    timeout=self.flush_interval,
+                )
+                batch, self._buffer = self._buffer, []
+                closing = self._closed
+                # Libera escritores bloqueados pela política "flush".
+                self._cond.notify_all()
+            self._flush_rows(batch)
+            if closing:
+                return
+
+    def _flush_rows(self, rows: list[tuple[str, str, datetime]]) -> None:
+        if not rows:
+            return
+        try:
+            with self.manager.connection() as connection:
+                with connection.cursor() as cursor:
+                    with cursor.copy("COPY findface.tb_log (level, message, created_at) FROM STDIN") as copy:
+                        for row in rows:
+                            copy.write_row(row)
+        except Exception:
+            # Falhas de log não podem interromper o processamento.
+            self.failed += len(rows)
+            _logger.exception("Falha ao gravar %d entradas em findface.tb_log", len(rows))
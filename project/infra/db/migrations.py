@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Protocol, Sequence
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Passo versionado do schema `findface`."""
+
+    version: int
+    description: str
+    statements: Sequence[str]
+
+
+# Migrações em ordem crescente de versão. Nunca altere uma versão já publicada;
+# acrescente uma nova. A versão 1 reproduz o schema criado antes do versionamento
+# e usa DDL idempotente para bancos que já o possuem.
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        version=1,
+        description="tb_nist_ingest e tb_log",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS findface.tb_nist_ingest (
+                id BIGSERIAL PRIMARY KEY
+            );
+            """,
+            "ALTER TABLE findface.tb_nist_ingest ADD COLUMN IF NOT EXISTS s3_key TEXT;",
+            "ALTER TABLE findface.tb_nist_ingest ADD COLUMN IF NOT EXISTS md5_hash TEXT;",
+            "ALTER TABLE findface.tb_nist_ingest ADD COLUMN IF NOT EXISTS origin TEXT;",
+            """
+            ALTER TABLE findface.tb_nist_ingest
+            ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
+            """,
+            """
+            DO $$ BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_constraint WHERE conname = 'uq_tb_nist_ingest_md5'
+                ) THEN
+                    ALTER TABLE findface.tb_nist_ingest
+                    ADD CONSTRAINT uq_tb_nist_ingest_md5 UNIQUE (md5_hash);
+                END IF;
+            END $$;
+            """,
+            """
+            DO $$ BEGIN
+                IF NOT EXISTS (
+                    SELECT 1 FROM pg_constraint WHERE conname = 'uq_tb_nist_ingest_s3key'
+                ) THEN
+                    ALTER TABLE findface.tb_nist_ingest
+                    ADD CONSTRAINT uq_tb_nist_ingest_s3key UNIQUE (s3_key);
+                END IF;
+            END $$;
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS findface.tb_log (
+                id BIGSERIAL PRIMARY KEY,
+                level TEXT NOT NULL,
+                message TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """,
+        ),
+    ),
+    Migration(
+        version=2,
+        description="tb_checkpoint (cursor de listagem do process)",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS findface.tb_checkpoint (
+                name TEXT PRIMARY KEY,
+                start_after TEXT NOT NULL,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+            );
+            """,
+        ),
+    ),
+    Migration(
+        version=3,
+        description="tb_nist_ingest.processed_at (estratégia mark)",
+        statements=(
+            "ALTER TABLE findface.tb_nist_ingest ADD COLUMN IF NOT EXISTS processed_at TIMESTAMPTZ;",
+        ),
+    ),
+    Migration(
+        version=4,
+        description="tb_nist_record (índice de registros e faixas de imagem)",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS findface.tb_nist_record (
+                md5_hash TEXT NOT NULL
+                    REFERENCES findface.tb_nist_ingest (md5_hash) ON DELETE CASCADE,
+                seq INTEGER NOT NULL,
+                record_type SMALLINT NOT NULL,
+                idc INTEGER,
+                byte_offset BIGINT NOT NULL,
+                byte_length BIGINT NOT NULL,
+                image_offset BIGINT,
+                image_length BIGINT,
+                image_format TEXT,
+                PRIMARY KEY (md5_hash, seq)
+            );
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ix_tb_nist_record_type
+            ON findface.tb_nist_record (record_type, md5_hash);
+            """,
+        ),
+    ),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+# Chave do advisory lock que serializa migrações concorrentes (processos distintos).
+_ADVISORY_LOCK_KEY = 7_316_001
+
+# Bancos já verificados neste processo: o caminho quente não repete a checagem.
+_VERIFIED: set[object] = set()
+_VERIFIED_LOCK = threading.Lock()
+
+
+class _ConnectionProvider(Protocol):
+    def connection(self): ...  # noqa: ANN201
+
+
+@dataclass
+class SchemaMigrator:
+    """Aplica as migrações pendentes e registra a versão em `findface.schema_version`."""
+
+    manager: _ConnectionProvider
+
+    def _key(self) -> object:
+        config = getattr(self.manager, "config", None)
+        if config is None:
+            return id(self.manager)
+        return (config.db_host, config.db_port, config.db_name)
+
+    def current_version(self) -> int:
+        """Retorna a versão aplicada (0 quando o controle de versão ainda não existe)."""
+        with self.manager.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('findface.schema_version') IS NOT NULL;")
+                row = cursor.fetchone()
+                if not row or not row[0]:
+                    return 0
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM findface.schema_version;")
+                row = cursor.fetchone()
+        return int(row[0]) if row else 0
+
+    def migrate(self) -> list[int]:
+        """Aplica, em uma transação, as migrações ainda não registradas e retorna suas versões."""
+        applied: list[int] = []
+        with self.manager.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s);", (_ADVISORY_LOCK_KEY,))
+                cursor.execute("CREATE SCHEMA IF NOT EXISTS findface;")
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS findface.schema_version (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT NOT NULL,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                    );
+                    """
+                )
+                cursor.execute("SELECT COALESCE(MAX(version), 0) FROM findface.schema_version;")
+                row = cursor.fetchone()
+                current = int(row[0]) if row else 0
+                for migration in MIGRATIONS:
+                    if migration.version <= current:
+                        continue
+                    for statement in migration.statements:
+                        cursor.execute(statement)
+                    cursor.execute(
+                        "INSERT INTO findface.schema_version (version, description) VALUES (%s, %s)",
+                        (migration.version, migration.description),
+                    )
+                    applied.append(migration.version)
+        with _VERIFIED_LOCK:
+            _VERIFIED.add(self._key())
+        return applied
+
+    def ensure(self) -> None:
+        """Garante o schema atualizado uma única vez por processo e banco."""
+        key = self._key()
+        if key in _VERIFIED:
+            return
+        with _VERIFIED_LOCK:
+            if key in _VERIFIED:
+                return
+            if self.current_version() >= LATEST_VERSION:
+                _VERIFIED.add(key)
+                return
+        self.migrate()
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
 
 import psycopg
+from psycopg_pool import ConnectionPool
 
 from project.config import Config
 
 
 @dataclass
 class PgManager:
-    """Gerencia conexões PostgreSQL (psycopg).
+    """Gerencia conexões PostgreSQL (psycopg) a partir de um pool compartilhado.
 
     Exemplo
     >>> from project.config import load_config
@@ -18,22 +21,80 @@ class PgManager:
     >>> pg = PgManager(cfg)
     >>> isinstance(pg.test_connection(), str)  # doctest: +SKIP
     True
+    >>> pg.close()
     """
     config: Config
+    _pool: Optional[ConnectionPool] = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _session_setup: list[str] = field(default_factory=list, init=False, repr=False)
+
+    def _connect_kwargs(self) -> dict[str, object]:
+        return {
+            "host": self.config.db_host,
+            "port": self.config.db_port,
+            "dbname": self.config.db_name,
+            "user": self.config.db_user,
+            "password": self.config.db_password,
+        }
 
     def connect(self) -> psycopg.Connection:
-        """Abre uma conexão com os parâmetros do .env/Config."""
-        return psycopg.connect(
-            host=self.config.db_host,
-            port=self.config.db_port,
-            dbname=self.config.db_name,
-            user=self.config.db_user,
-            password=self.config.db_password,
-        )
+        """Abre uma conexão avulsa (fora do pool) com os parâmetros do .env/Config."""
+        return psycopg.connect(**self._connect_kwargs())
+
+    def add_session_setup(self, *statements: str) -> None:
+        """Registra comandos executados uma vez em cada conexão aberta pelo pool (ex.: tabelas temporárias).
+
+        Deve ser chamado antes do primeiro uso do pool: conexões já abertas não os executariam.
+        """
+        with self._lock:
+            pending = [statement for statement in statements if statement not in self._session_setup]
+            if pending and self._pool is not None:
+                raise RuntimeError("pool já aberto: registre os comandos de sessão antes do primeiro uso")
+            self._session_setup.extend(pending)
+
+    def _configure(self, conn: psycopg.Connection) -> None:
+        """Callback `configure` do pool: prepara a sessão de cada conexão nova."""
+        if not self._session_setup:
+            return
+        with conn.cursor() as cur:
+            for statement in self._session_setup:
+                cur.execute(statement)
+        # O pool exige a conexão ociosa (fora de transação) ao fim do callback.
+        conn.commit()
+
+    def pool(self) -> ConnectionPool:
+        """Retorna o pool de conexões, criando-o na primeira chamada."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ConnectionPool(
+                    kwargs=self._connect_kwargs(),
+                    min_size=self.config.db_pool_min_size,
+                    max_size=max(self.config.db_pool_min_size, self.config.db_pool_max_size),
+                    max_lifetime=self.config.db_pool_max_lifetime,
+                    timeout=self.config.db_pool_timeout,
+                    check=ConnectionPool.check_connection,
+                    configure=self._configure,
+                    name="mitra",
+                    open=True,
+                )
+            return self._pool
+
+    @contextmanager
+    def connection(self) -> Iterator[psycopg.Connection]:
+        """Empresta uma conexão do pool (commit ao sair sem erro, rollback caso contrário)."""
+        with self.pool().connection() as conn:
+            yield conn
+
+    def close(self) -> None:
+        """Encerra o pool e todas as conexões abertas."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
 
     def test_connection(self) -> str:
         """Executa `SELECT version()` para validar a conexão."""
-        with self.connect() as conn:
+        with self.connection() as conn:
             with conn.cursor() as cur:
                 cur.execute("SELECT version();")
                 version: str = cur.fetchone()[0]
@@ -1,92 +1,111 @@
 from __future__ import annotations
 
+from contextlib import AbstractContextManager
 from dataclasses import dataclass
+from typing import Optional, Sequence
 
 import psycopg
 
-from project.application.ports.repository_port import RepositoryPort
+from project.application.ports.repository_port import IngestRow, RecordRow, RepositoryPort, UpsertResult
 from project.config import Config
+from project.infra.db.log_sink import BufferedLogSink
+from project.infra.db.migrations import SchemaMigrator
+from project.infra.db.orm_db import PgManager
+
+
+_RECORD_COLUMNS = (
+    "md5_hash, seq, record_type, idc, byte_offset, byte_length, image_offset, image_length, image_format"
+)
+
+
+# Tabelas de trabalho do merge em lote, criadas uma vez por conexão do pool.
+_TEMP_TABLES = (
+    """
+    CREATE TEMP TABLE IF NOT EXISTS tmp_nist_ingest (
+        s3_key TEXT,
+        md5_hash TEXT,
+        origin TEXT
+    ) ON COMMIT DELETE ROWS
+    """,
+    """
+    CREATE TEMP TABLE IF NOT EXISTS tmp_nist_record (
+        md5_hash TEXT,
+        seq INTEGER,
+        record_type SMALLINT,
+        idc INTEGER,
+        byte_offset BIGINT,
+        byte_length BIGINT,
+        image_offset BIGINT,
+        image_length BIGINT,
+        image_format TEXT
+    ) ON COMMIT DELETE ROWS
+    """,
+)
+
+
+def _record_values(md5_hash: str, record: RecordRow) -> tuple:
+    return (
+        md5_hash,
+        record.seq,
+        record.record_type,
+        record.idc,
+        record.offset,
+        record.length,
+        record.image_offset,
+        record.image_length,
+        record.image_format,
+    )
 
 
 @dataclass
 class PgPersonRepository(RepositoryPort):
-    """Repositório PostgreSQL responsável por inserir e registrar dados provenientes dos NISTs."""
+    """Repositório PostgreSQL responsável por inserir e registrar dados provenientes dos NISTs.
+
+    As conexões vêm do pool do `PgManager`; informe o mesmo gerenciador usado
+    pela CLI para compartilhar conexões já abertas.
+    """
 
     config: Config
+    manager: Optional[PgManager] = None
+    log_sink: Optional[BufferedLogSink] = None
 
-    def _connect(self) -> psycopg.Connection:
-        """Abre uma conexão com PostgreSQL utilizando as credenciais da configuração."""
-        return psycopg.connect(
-            host=self.config.db_host,
-            port=self.config.db_port,
-            dbname=self.config.db_name,
-            user=self.config.db_user,
-            password=self.config.db_password,
-        )
+    def __post_init__(self) -> None:
+        if self.manager is None:
+            self.manager = PgManager(self.config)
+        self.manager.add_session_setup(*_TEMP_TABLES)
 
-    def _ensure_schema(self, cursor: psycopg.Cursor) -> None:
-        """Garante a existência de schema, tabelas e restrições necessárias."""
-        cursor.execute("CREATE SCHEMA IF NOT EXISTS findface;")
+    def _connect(self) -> AbstractContextManager[psycopg.Connection]:
+        """Empresta uma conexão do pool compartilhado."""
+        return self.manager.connection()
 
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS findface.tb_nist_ingest (
-                id BIGSERIAL PRIMARY KEY
-            );
-            """
-        )
-        cursor.execute("ALTER TABLE findface.tb_nist_ingest ADD COLUMN IF NOT EXISTS s3_key TEXT;")
-        cursor.execute("ALTER TABLE findface.tb_nist_ingest ADD COLUMN IF NOT EXISTS md5_hash TEXT;")
-        cursor.execute("ALTER TABLE findface.tb_nist_ingest ADD COLUMN IF NOT EXISTS origin TEXT;")
-        cursor.execute(
-            """
-            ALTER TABLE findface.tb_nist_ingest
-            ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ NOT NULL DEFAULT NOW();
-            """
-        )
+    def close(self) -> None:
+        """Grava os logs pendentes e encerra o pool de conexões do gerenciador associado."""
+        if self.log_sink is not None:
+            self.log_sink.close()
+        self.manager.close()
 
-        cursor.execute(
-            """
-            DO $$ BEGIN
-                IF NOT EXISTS (
-                    SELECT 1 FROM pg_constraint WHERE conname = 'uq_tb_nist_ingest_md5'
-                ) THEN
-                    ALTER TABLE findface.tb_nist_ingest
-                    ADD CONSTRAINT uq_tb_nist_ingest_md5 UNIQUE (md5_hash);
-                END IF;
-            END $$;
-            """
-        )
-        cursor.execute(
-            """
-            DO $$ BEGIN
-                IF NOT EXISTS (
-                    SELECT 1 FROM pg_constraint WHERE conname = 'uq_tb_nist_ingest_s3key'
-                ) THEN
-                    ALTER TABLE findface.tb_nist_ingest
-                    ADD CONSTRAINT uq_tb_nist_ingest_s3key UNIQUE (s3_key);
-                END IF;
-            END $$;
-            """
-        )
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS findface.tb_log (
-                id BIGSERIAL PRIMARY KEY,
-                level TEXT NOT NULL,
-                message TEXT NOT NULL,
-                created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
-            );
-            """
-        )
+    def _ensure_schema(self) -> None:
+        """Garante o schema migrado; a checagem ocorre uma única vez por processo."""
+        SchemaMigrator(self.manager).ensure()
+
+    def upsert_person_from_nist(
+        self, person: object, origin_base: object, md5_hash: str, records: Sequence[RecordRow] = ()
+    ) -> None:
+        """Executa upsert em findface.tb_nist_ingest identificando registros pelo md5.
 
-    def upsert_person_from_nist(self, person: object, origin_base: object, md5_hash: str) -> None:
-        """Executa upsert em findface.tb_nist_ingest identificando registros pelo md5."""
+        Uma linha da mesma chave com outro md5 (conteúdo alterado) é substituída.
+        Com `records`, o índice em tb_nist_record é substituído na mesma transação.
+        """
         s3_key = getattr(person, "s3_key", None) or getattr(origin_base, "s3_key", None)
         origin = getattr(origin_base, "origin", None)
+        self._ensure_schema()
         with self._connect() as connection:
             with connection.cursor() as cursor:
-                self._ensure_schema(cursor)
+                # O índice de registros do md5 antigo sai junto (ON DELETE CASCADE).
+                cursor.execute(
+                    "DELETE FROM findface.tb_nist_ingest WHERE s3_key = %s AND md5_hash <> %s",
+                    (s3_key, md5_hash),
+                )
                 cursor.execute(
                     """
                     INSERT INTO findface.tb_nist_ingest (s3_key, md5_hash, origin)
@@ -95,12 +114,147 @@ class PgPersonRepository(RepositoryPort):
                     """,
                     (s3_key, md5_hash, origin),
                 )
+                self._merge_records(cursor, [IngestRow(s3_key, md5_hash, origin, records=tuple(records))])
+
+    def upsert_many(self, rows: Sequence[IngestRow]) -> UpsertResult:
+        """Consolida um lote via COPY em tabela temporária e um único INSERT ... ON CONFLICT.
+
+        Se o lote falhar (ex.: violação de `s3_key` único), as linhas são
+        reprocessadas individualmente para isolar as chaves com erro.
+        """
+        result = UpsertResult()
+        if not rows:
+            return result
+        self._ensure_schema()
+        try:
+            merged = self._merge_batch(rows)
+        except psycopg.Error:
+            for row in rows:
+                try:
+                    merged = self._merge_batch([row])
+                except psycopg.Error as exc:
+                    result.failed[row.s3_key] = str(exc).strip()
+                    continue
+                self._collect(result, [row], merged)
+            return result
+        self._collect(result, rows, merged)
+        return result
+
+    def _merge_batch(self, rows: Sequence[IngestRow]) -> list[tuple[str, str, bool]]:
+        """Executa COPY + merge em uma transação e retorna (s3_key, md5, inserido?) por linha gravada."""
+        with self._connect() as connection:
+            with connection.cursor() as cursor:
+                with cursor.copy("COPY tmp_nist_ingest (s3_key, md5_hash, origin) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row((row.s3_key, row.md5_hash, row.origin))
+                # Conteúdo alterado: remove a linha antiga da chave (e, em cascata, seu índice de registros).
+                cursor.execute(
+                    """
+                    DELETE FROM findface.tb_nist_ingest AS t
+                    USING tmp_nist_ingest AS s
+                    WHERE t.s3_key = s.s3_key AND t.md5_hash <> s.md5_hash
+                    """
+                )
+                cursor.execute(
+                    """
+                    INSERT INTO findface.tb_nist_ingest (s3_key, md5_hash, origin)
+                    SELECT DISTINCT ON (md5_hash) s3_key, md5_hash, origin
+                    FROM tmp_nist_ingest
+                    ORDER BY md5_hash, s3_key
+                    ON CONFLICT (md5_hash) DO UPDATE SET origin = EXCLUDED.origin
+                    RETURNING s3_key, md5_hash, (xmax = 0) AS inserted
+                    """
+                )
+                merged = [(s3_key, md5_hash, bool(inserted)) for s3_key, md5_hash, inserted in cursor.fetchall()]
+                self._merge_records(cursor, rows)
+                return merged
+
+    @staticmethod
+    def _merge_records(cursor: psycopg.Cursor, rows: Sequence[IngestRow]) -> None:
+        """Substitui, na mesma transação do merge, o índice de registros dos md5 que o trazem."""
+        rows = [row for row in rows if row.records]
+        if not rows:
+            return
+        with cursor.copy(f"COPY tmp_nist_record ({_RECORD_COLUMNS}) FROM STDIN") as copy:
+            for row in rows:
+                for record in row.records:
+                    copy.write_row(_record_values(row.md5_hash, record))
+        cursor.execute(
+            "DELETE FROM findface.tb_nist_record WHERE md5_hash IN (SELECT md5_hash FROM tmp_nist_record)"
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO findface.tb_nist_record ({_RECORD_COLUMNS})
+            SELECT DISTINCT ON (md5_hash, seq) {_RECORD_COLUMNS}
+            FROM tmp_nist_record
+            ORDER BY md5_hash, seq
+            """
+        )
+
+    @staticmethod
+    def _collect(result: UpsertResult, rows: Sequence[IngestRow], merged: list[tuple[str, str, bool]]) -> None:
+        """Mapeia o retorno do merge (por chave S3) para as linhas do lote.
+
+        O `RETURNING` traz a chave da linha gravada: com o mesmo md5 no lote (ou já
+        registrado em outra chave) só uma chave fica com a linha e as demais são
+        informadas como duplicadas, não como persistidas.
+        """
+        status = {s3_key: inserted for s3_key, _, inserted in merged}
+        owners = {md5_hash: s3_key for s3_key, md5_hash, _ in merged}
+        for row in rows:
+            inserted = status.get(row.s3_key)
+            if inserted is None:
+                owner = owners.get(row.md5_hash)
+                if owner is None:
+                    result.failed[row.s3_key] = "linha não retornada pelo merge"
+                else:
+                    result.duplicates[row.s3_key] = owner
+            elif inserted:
+                result.inserted.append(row.s3_key)
+            else:
+                result.updated.append(row.s3_key)
+
+    def lookup_ingested(self, keys: Sequence[str]) -> dict[str, IngestRow]:
+        """Consulta em lote (`s3_key = ANY(%s)`) as chaves já registradas em tb_nist_ingest."""
+        if not keys:
+            return {}
+        self._ensure_schema()
+        with self._connect() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT s3_key, md5_hash, origin, processed_at IS NOT NULL
+                    FROM findface.tb_nist_ingest WHERE s3_key = ANY(%s)
+                    """,
+                    (list(keys),),
+                )
+                rows = cursor.fetchall()
+        return {
+            s3_key: IngestRow(s3_key, md5_hash, origin, bool(processed))
+            for s3_key, md5_hash, origin, processed in rows
+        }
+
+    def mark_processed(self, keys: Sequence[str]) -> int:
+        """Preenche `processed_at` das chaves informadas; objetos marcados saem das próximas listagens."""
+        if not keys:
+            return 0
+        self._ensure_schema()
+        with self._connect() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE findface.tb_nist_ingest SET processed_at = NOW() WHERE s3_key = ANY(%s)",
+                    (list(keys),),
+                )
+                return cursor.rowcount
 
     def log(self, level: str, message: str) -> None:
-        """Registra entradas de log na tabela findface.tb_log."""
+        """Registra entradas de log na tabela findface.tb_log (via buffer, quando configurado)."""
+        self._ensure_schema()
+        if self.log_sink is not None:
+            self.log_sink.write(level, message)
+            return
         with self._connect() as connection:
             with connection.cursor() as cursor:
-                self._ensure_schema(cursor)
                 cursor.execute(
                     "INSERT INTO findface.tb_log (level, message) VALUES (%s, %s)",
                     (level, message),
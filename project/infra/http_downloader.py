@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import urllib3
+
+# Conexões simultâneas (e mantidas abertas para reuso) por host.
+DEFAULT_PER_HOST = 4
+# Hosts distintos com pool de conexões mantido.
+DEFAULT_MAX_HOSTS = 32
+
+
+class HttpDownloadError(RuntimeError):
+    """Erro levantado quando a URL responde com status HTTP de erro."""
+
+    def __init__(self, url: str, status: int) -> None:
+        super().__init__(f"HTTP {status} ao baixar {url}")
+        self.url = url
+        self.status = status
+
+
+class _ResponseBody:
+    """Corpo da resposta lido sob demanda; registra se foi consumido até o fim."""
+
+    def __init__(self, response: urllib3.BaseHTTPResponse) -> None:
+        self._response = response
+        self.eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._response.read(None if size is None or size < 0 else size)
+        if not data or size is None or size < 0:
+            self.eof = True
+        return data
+
+
+@dataclass
+class HttpDownloader:
+    """Cliente HTTP com keep-alive e limite de conexões simultâneas por host.
+
+    Cada host tem um pool de até `per_host` conexões reaproveitadas entre
+    downloads; requisições além do limite aguardam uma conexão livre. O corpo
+    é entregue como fluxo, sem ser carregado na memória.
+
+    Exemplo
+    >>> downloader = HttpDownloader(per_host=2)
+    >>> with downloader.open("https://exemplo/arquivo.nst") as body:  # doctest: +SKIP
+    ...     header = body.read(4096)
+    """
+
+    per_host: int = DEFAULT_PER_HOST
+    timeout: float = 30.0
+    retries: int = 2
+    max_hosts: int = DEFAULT_MAX_HOSTS
+    _pool: urllib3.PoolManager = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._pool = urllib3.PoolManager(
+            num_pools=self.max_hosts,
+            maxsize=max(1, self.per_host),
+            block=True,
+            timeout=urllib3.Timeout(connect=self.timeout, read=self.timeout),
+            retries=urllib3.Retry(total=self.retries, redirect=5, backoff_factor=0.5, raise_on_status=False),
+        )
+
+    @contextmanager
+    def open(self, url: str) -> Iterator[_ResponseBody]:
+        """Abre a URL e entrega o corpo como fluxo (`HttpDownloadError` para status >= 400)."""
+        response = self._pool.request("GET", url, preload_content=False)
+        body = _ResponseBody(response)
+        try:
+            if response.status >= 400:
+                raise HttpDownloadError(url, response.status)
+            yield body
+        finally:
+            if not body.eof:
+                # Corpo não consumido (ex.: objeto já existente): a conexão não pode ser reaproveitada.
+                response.close()
+            response.release_conn()
+
+    def close(self) -> None:
+        """Fecha as conexões mantidas abertas."""
+        self._pool.clear()
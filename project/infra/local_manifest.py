@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from project.application.ports.manifest_port import ManifestEntry
+
+# Nome do arquivo dentro de CACHE_DIR, compartilhado por upload-batch e sample-local.
+MANIFEST_FILENAME = "manifest.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS manifest (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    md5_hash TEXT,
+    origin TEXT,
+    s3_key TEXT,
+    uploaded_at REAL,
+    ingested_at REAL
+)
+"""
+
+# Um arquivo alterado (tamanho ou mtime diferentes) perde os estados anteriores.
+_SAME_FILE = "(manifest.size = excluded.size AND manifest.mtime_ns = excluded.mtime_ns)"
+_UPSERT = f"""
+INSERT INTO manifest (path, size, mtime_ns, md5_hash, origin, s3_key, uploaded_at, ingested_at)
+VALUES (:path, :size, :mtime_ns, :md5_hash, :origin, :s3_key, :uploaded_at, :ingested_at)
+ON CONFLICT (path) DO UPDATE SET
+    md5_hash = COALESCE(excluded.md5_hash, CASE WHEN {_SAME_FILE} THEN manifest.md5_hash END),
+    origin = COALESCE(excluded.origin, CASE WHEN {_SAME_FILE} THEN manifest.origin END),
+    s3_key = COALESCE(excluded.s3_key, CASE WHEN {_SAME_FILE} THEN manifest.s3_key END),
+    uploaded_at = COALESCE(excluded.uploaded_at, CASE WHEN {_SAME_FILE} THEN manifest.uploaded_at END),
+    ingested_at = COALESCE(excluded.ingested_at, CASE WHEN {_SAME_FILE} THEN manifest.ingested_at END),
+    size = excluded.size,
+    mtime_ns = excluded.mtime_ns
+"""
+
+
+@dataclass
+class SqliteManifest:
+    """Manifesto SQLite de arquivos locais (caminho, tamanho, mtime -> md5, origem 1.08, chave S3).
+
+    Permite pular arquivos inalterados com apenas um `stat()`. Usa WAL para
+    que `upload-batch` e `sample-local` compartilhem o mesmo arquivo.
+
+    Exemplo
+    >>> manifest = SqliteManifest(Path(".cache/manifest.sqlite3"))  # doctest: +SKIP
+    >>> manifest.get("nists/tse/a.nst", 1234, 1700000000000000000)  # doctest: +SKIP
+    """
+
+    path: Path
+    _conn: Optional[sqlite3.Connection] = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, path: str, size: int, mtime_ns: int) -> Optional[ManifestEntry]:
+        """Retorna a entrada apenas se tamanho e mtime coincidirem com os registrados."""
+        with self._lock:
+            row = self._connection().execute(
+                """
+                SELECT md5_hash, origin, s3_key, uploaded_at IS NOT NULL, ingested_at IS NOT NULL
+                FROM manifest WHERE path = ? AND size = ? AND mtime_ns = ?
+                """,
+                (path, size, mtime_ns),
+            ).fetchone()
+        if row is None:
+            return None
+        md5_hash, origin, s3_key, uploaded, ingested = row
+        return ManifestEntry(path, size, mtime_ns, md5_hash, origin, s3_key, bool(uploaded), bool(ingested))
+
+    def record_upload(self, entry: ManifestEntry) -> None:
+        self._record(entry, uploaded_at=time.time(), ingested_at=None)
+
+    def record_ingest(self, entry: ManifestEntry) -> None:
+        self._record(entry, uploaded_at=None, ingested_at=time.time())
+
+    def _record(self, entry: ManifestEntry, uploaded_at: Optional[float], ingested_at: Optional[float]) -> None:
+        params = {
+            "path": entry.path,
+            "size": entry.size,
+            "mtime_ns": entry.mtime_ns,
+            "md5_hash": entry.md5_hash,
+            "origin": entry.origin,
+            "s3_key": entry.s3_key,
+            "uploaded_at": uploaded_at,
+            "ingested_at": ingested_at,
+        }
+        with self._lock:
+            self._connection().execute(_UPSERT, params)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
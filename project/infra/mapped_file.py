@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import mmap
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import ContextManager, Iterator, Union
+
+from project.infra.nist_records import BytesLike
+
+
+@contextmanager
+def map_file(path: Union[str, Path]) -> Iterator[BytesLike]:
+    """Mapeia um arquivo local somente para leitura, sem copiá-lo para a memória do processo.
+
+    As páginas são carregadas sob demanda pelo sistema operacional; o parser e
+    o md5 leem direto do mapeamento. O buffer só é válido dentro do `with`.
+    Arquivos vazios (que não podem ser mapeados) resultam em `b""`.
+
+    Exemplo
+    >>> with map_file("nists/exemplo.nst") as raw:  # doctest: +SKIP
+    ...     nist = NistParserService().load(raw)
+    """
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+class MappedFileReader:
+    """`FileReaderPort` baseado em `map_file`: os casos de uso recebem o arquivo mapeado."""
+
+    def open(self, path: Union[str, Path]) -> ContextManager[BytesLike]:
+        return map_file(path)
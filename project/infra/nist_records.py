@@ -0,0 +1,397 @@
+from __future__ import annotations
+
+import mmap
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, Optional, Union
+
+# Separadores ANSI/NIST-ITL
+FS = 0x1C  # fim de registro
+GS = 0x1D  # fim de campo
+RS = 0x1E  # separador de subcampos
+US = 0x1F  # separador de itens
+
+# Registros binários (tipos 3 a 8) começam com LEN de 4 bytes big-endian e IDC de 1 byte.
+BINARY_RECORD_TYPES = frozenset({3, 4, 5, 6, 7, 8})
+
+# Campo que carrega dados de imagem em registros com tags (10, 13, 14, 15, 17...).
+IMAGE_FIELD = 999
+
+# Campo x.011 (algoritmo de compressão) dos registros de imagem com tags.
+COMPRESSION_FIELD = 11
+
+# Bytes fixos antes da imagem em registros binários (LEN, IDC e demais campos do tipo).
+_BINARY_HEADER_BYTES = {3: 18, 4: 18, 5: 18, 6: 18, 7: 5, 8: 12}
+# Posição do byte de compressão (GCA/CGA) nos registros binários tipos 3 a 6.
+_BINARY_COMPRESSION_BYTE = 17
+
+# Assinaturas dos formatos de imagem usados em pacotes ANSI/NIST-ITL.
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\xff\xa0", "wsq"),
+    (b"\x00\x00\x00\x0cjP  \r\n\x87\n", "jp2"),
+    (b"\xff\x4f\xff\x51", "j2k"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"BM", "bmp"),
+)
+
+# Limite de bytes para localizar o ':' após uma tag (ex.: "10.001:").
+_MAX_TAG_LEN = 16
+
+# Códigos de rejeição do validador estrutural (também usados no prefixo de quarentena).
+REJECT_EMPTY = "empty"
+REJECT_CNT = "bad-cnt"
+REJECT_LEN = "bad-len"
+REJECT_IDC = "idc-mismatch"
+REJECT_TRUNCATED = "truncated"
+REJECT_TRAILING = "trailing-bytes"
+
+# Buffers aceitos pelo parser; `mmap` e `memoryview` são lidos sem cópia do payload.
+BytesLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+_FINDERS: dict[bytes, "re.Pattern[bytes]"] = {}
+
+
+class NistFormatError(ValueError):
+    """Erro levantado quando o payload não segue a estrutura ANSI/NIST-ITL."""
+
+
+@dataclass
+class NistRecord:
+    """Registro lógico de um arquivo NIST.
+
+    `fields` contém apenas campos textuais (chave = número do campo); os dados
+    de imagem (campo 999 ou corpo de registros binários) não são decodificados
+    e ficam disponíveis via `data_offset` até `offset + length`.
+    """
+
+    record_type: int
+    idc: Optional[int]
+    offset: int
+    length: int
+    fields: dict[int, str] = field(default_factory=dict)
+    data_offset: Optional[int] = None
+
+
+def _find(raw: BytesLike, needle: bytes, start: int, end: int) -> int:
+    """`raw.find` para qualquer buffer (memoryview não tem `find`; `re` aceita o buffer sem copiá-lo)."""
+    finder = getattr(raw, "find", None)
+    if finder is not None:
+        return finder(needle, start, end)
+    pattern = _FINDERS.get(needle)
+    if pattern is None:
+        pattern = _FINDERS.setdefault(needle, re.compile(re.escape(needle)))
+    match = pattern.search(raw, start, end)
+    return match.start() if match else -1
+
+
+def _parse_tag(tag: bytes) -> tuple[int, int]:
+    """Converte uma tag como b'1.008' ou b'10.01' em (tipo, campo)."""
+    type_part, sep, field_part = tag.partition(b".")
+    if not sep:
+        raise NistFormatError(f"tag inválida: {tag!r}")
+    try:
+        return int(type_part), int(field_part)
+    except ValueError as exc:
+        raise NistFormatError(f"tag inválida: {tag!r}") from exc
+
+
+def _read_tag(raw: BytesLike, pos: int, end: int) -> tuple[int, int, int]:
+    """Lê a tag iniciada em `pos` e retorna (tipo, campo, posição do valor)."""
+    colon = _find(raw, b":", pos, min(end, pos + _MAX_TAG_LEN))
+    if colon < 0:
+        raise NistFormatError(f"tag sem ':' na posição {pos}")
+    type_no, field_no = _parse_tag(bytes(raw[pos:colon]))
+    return type_no, field_no, colon + 1
+
+
+def _declared_length(raw: BytesLike, offset: int, expected_type: int) -> int:
+    """Lê o valor declarado no campo LEN (x.001) sem exigir o registro completo."""
+    size = len(raw)
+    type_no, field_no, value_start = _read_tag(raw, offset, size)
+    if type_no != expected_type or field_no != 1:
+        raise NistFormatError(
+            f"registro tipo {expected_type} em {offset} não começa com {expected_type}.001"
+        )
+    gs = _find(raw, bytes((GS,)), value_start, min(size, value_start + _MAX_TAG_LEN))
+    if gs < 0:
+        raise NistFormatError(f"campo LEN sem terminador na posição {offset}")
+    try:
+        length = int(bytes(raw[value_start:gs]))
+    except ValueError as exc:
+        raise NistFormatError(f"campo LEN inválido na posição {offset}") from exc
+    if length <= 0:
+        raise NistFormatError(f"campo LEN inválido na posição {offset}")
+    return length
+
+
+def _tagged_record_length(raw: BytesLike, offset: int, expected_type: int) -> int:
+    """Lê o campo LEN (x.001) de um registro com tags iniciado em `offset`."""
+    size = len(raw)
+    length = _declared_length(raw, offset, expected_type)
+    if offset + length > size:
+        raise NistFormatError(
+            f"LEN {length} do registro tipo {expected_type} excede o payload ({size} bytes)"
+        )
+    return length
+
+
+def _parse_tagged_fields(raw: BytesLike, start: int, end: int) -> tuple[dict[int, str], Optional[int]]:
+    """Extrai os campos textuais de um registro com tags, saltando o campo de imagem."""
+    fields: dict[int, str] = {}
+    gs = bytes((GS,))
+    pos = start
+    while pos < end:
+        _, field_no, value_start = _read_tag(raw, pos, end)
+        if field_no == IMAGE_FIELD:
+            return fields, value_start
+        sep = _find(raw, gs, value_start, end)
+        if sep < 0:
+            sep = end - 1 if raw[end - 1] == FS else end
+        fields[field_no] = bytes(raw[value_start:sep]).decode("latin-1")
+        pos = sep + 1
+    return fields, None
+
+
+def parse_cnt(value: str) -> list[tuple[int, int]]:
+    """Interpreta o campo 1.03 (CNT) retornando os pares (tipo, IDC) dos registros seguintes.
+
+    Exemplo
+    >>> parse_cnt("1\\x1f2\\x1e2\\x1f0\\x1e10\\x1f1")
+    [(2, 0), (10, 1)]
+    """
+    subfields = value.split(chr(RS))
+    try:
+        entries = [tuple(int(item) for item in sub.split(chr(US))) for sub in subfields]
+    except ValueError as exc:
+        raise NistFormatError(f"campo CNT inválido: {value!r}") from exc
+    if not entries or len(entries[0]) != 2 or entries[0][0] != 1:
+        raise NistFormatError(f"campo CNT inválido: {value!r}")
+    records = entries[1:]
+    if any(len(entry) != 2 for entry in records):
+        raise NistFormatError(f"campo CNT inválido: {value!r}")
+    return [(entry[0], entry[1]) for entry in records]
+
+
+def type1_length(prefix: BytesLike) -> int:
+    """Retorna o tamanho declarado do Tipo-1 (1.001) a partir do início do payload.
+
+    Aceita apenas os primeiros bytes do arquivo, permitindo decidir quanto ler
+    em uma requisição parcial (Range).
+
+    Exemplo
+    >>> type1_length(b"1.001:197\\x1d1.002:0300")
+    197
+    """
+    if not prefix:
+        raise NistFormatError("payload vazio")
+    return _declared_length(prefix, 0, expected_type=1)
+
+
+def read_type1(raw: BytesLike) -> NistRecord:
+    """Lê somente o registro Tipo-1 do payload (custo proporcional ao cabeçalho).
+
+    Exemplo
+    >>> rec = read_type1(b"1.001:29\\x1d1.003:1\\x1f0\\x1d1.008:TSE\\x1c")
+    >>> rec.fields[8]
+    'TSE'
+    """
+    if not raw:
+        raise NistFormatError("payload vazio")
+    length = _tagged_record_length(raw, 0, expected_type=1)
+    fields, _ = _parse_tagged_fields(raw, 0, length)
+    return NistRecord(record_type=1, idc=None, offset=0, length=length, fields=fields)
+
+
+def iter_records(raw: BytesLike, parse_fields: bool = True) -> Iterator[NistRecord]:
+    """Percorre os registros do payload seguindo o CNT (1.03) e os campos LEN.
+
+    Dados de imagem nunca são decodificados: registros binários são saltados
+    pelo LEN de 4 bytes e registros com tags param no campo 999. Apenas os
+    valores textuais são copiados do buffer (`bytes`, `memoryview` ou `mmap`).
+    """
+    header = read_type1(raw)
+    yield header
+    cnt = header.fields.get(3)
+    if cnt is None:
+        raise NistFormatError("registro Tipo-1 sem campo CNT (1.03)")
+
+    size = len(raw)
+    offset = header.length
+    for record_type, idc in parse_cnt(cnt):
+        if offset >= size:
+            raise NistFormatError(
+                f"payload truncado: registro tipo {record_type} ausente em {offset}"
+            )
+        if record_type in BINARY_RECORD_TYPES:
+            if offset + 5 > size:
+                raise NistFormatError(f"registro binário truncado na posição {offset}")
+            length = int.from_bytes(bytes(raw[offset : offset + 4]), "big")
+            if length < 5 or offset + length > size:
+                raise NistFormatError(
+                    f"LEN {length} do registro tipo {record_type} excede o payload ({size} bytes)"
+                )
+            yield NistRecord(
+                record_type=record_type,
+                idc=raw[offset + 4],
+                offset=offset,
+                length=length,
+                data_offset=offset + 5,
+            )
+        else:
+            length = _tagged_record_length(raw, offset, expected_type=record_type)
+            fields: dict[int, str] = {}
+            data_offset = None
+            if parse_fields:
+                fields, data_offset = _parse_tagged_fields(raw, offset, offset + length)
+            yield NistRecord(
+                record_type=record_type,
+                idc=idc,
+                offset=offset,
+                length=length,
+                fields=fields,
+                data_offset=data_offset,
+            )
+        offset += length
+
+
+def structural_error(raw: BytesLike) -> Optional[str]:
+    """Confere CNT (1.03), campos LEN e tamanho real sem extrair campos; retorna o código de rejeição ou None.
+
+    Apenas o Tipo-1 é interpretado: os demais registros são saltados pelo LEN,
+    então o custo independe do tamanho das imagens. Como em
+    `NistParserService.load`, um payload cujo Tipo-1 não pode ser lido
+    (ex.: formatos textuais `1.08:TSE`, `1:008 TSE`) segue o fallback textual
+    e não é rejeitado.
+
+    Exemplo
+    >>> structural_error(b"1.001:29\\x1d1.003:1\\x1f0\\x1d1.008:TSE\\x1c") is None
+    True
+    >>> structural_error(b"1.001:23\\x1d1.003:1\\x1f1\\x1e2\\x1f0\\x1c2.001:50\\x1d2.002:0\\x1c")
+    'truncated'
+    >>> structural_error(b"1.08:TSE") is None
+    True
+    """
+    size = len(raw)
+    if size == 0:
+        return REJECT_EMPTY
+    try:
+        header = read_type1(raw)
+    except NistFormatError:
+        return None
+    length = header.length
+    if raw[length - 1] != FS:
+        return REJECT_LEN
+    try:
+        entries = parse_cnt(header.fields[3])
+    except (KeyError, NistFormatError):
+        return REJECT_CNT
+
+    offset = length
+    for record_type, idc in entries:
+        if offset >= size:
+            return REJECT_TRUNCATED
+        if record_type in BINARY_RECORD_TYPES:
+            if offset + 5 > size:
+                return REJECT_TRUNCATED
+            length = int.from_bytes(bytes(raw[offset : offset + 4]), "big")
+            if length < _BINARY_HEADER_BYTES[record_type]:
+                return REJECT_LEN
+            if raw[offset + 4] != idc:
+                return REJECT_IDC
+        else:
+            try:
+                length = _declared_length(raw, offset, expected_type=record_type)
+            except NistFormatError:
+                # Tag incompleta no fim do arquivo é truncamento, não LEN inválido.
+                return REJECT_TRUNCATED if size - offset <= 2 * _MAX_TAG_LEN else REJECT_LEN
+        if offset + length > size:
+            return REJECT_TRUNCATED
+        if record_type not in BINARY_RECORD_TYPES and raw[offset + length - 1] != FS:
+            return REJECT_LEN
+        offset += length
+    if offset != size:
+        return REJECT_TRAILING
+    return None
+
+
+def image_span(raw: BytesLike, record: NistRecord) -> Optional[tuple[int, int]]:
+    """Retorna (offset, tamanho) dos bytes de imagem do registro no payload, ou None sem imagem.
+
+    Registros binários descontam o cabeçalho fixo do tipo; registros com tags
+    vão do valor do campo 999 até antes do separador de fim de registro.
+    """
+    end = record.offset + record.length
+    if record.record_type in BINARY_RECORD_TYPES:
+        start = record.offset + _BINARY_HEADER_BYTES[record.record_type]
+    elif record.data_offset is None:
+        return None
+    else:
+        start = record.data_offset
+        if raw[end - 1] == FS:
+            end -= 1
+    if start >= end:
+        return None
+    return start, end - start
+
+
+def image_format(raw: BytesLike, record: NistRecord) -> Optional[str]:
+    """Identifica o formato da imagem pela assinatura dos primeiros bytes (`raw` sem compressão).
+
+    Exemplo
+    >>> raw = b"1.001:23\\x1d1.003:1\\x1f1\\x1e4\\x1f0\\x1c" + (22).to_bytes(4, "big") + bytes(14) + b"\\xff\\xd8\\xff\\xe0"
+    >>> image_format(raw, list(iter_records(raw))[1])
+    'jpeg'
+    """
+    span = image_span(raw, record)
+    if span is None:
+        return None
+    start, length = span
+    head = bytes(raw[start : start + min(length, 12)])
+    for signature, name in _IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return name
+    if record.record_type in BINARY_RECORD_TYPES:
+        if record.record_type <= 6 and raw[record.offset + _BINARY_COMPRESSION_BYTE] == 0:
+            return "raw"
+    elif record.fields.get(COMPRESSION_FIELD, "").strip().upper() == "NONE":
+        return "raw"
+    return None
+
+
+def record_data(raw: BytesLike, record: NistRecord) -> memoryview:
+    """Dados de imagem do registro como fatia do buffer, sem cópia (vazia quando não há imagem).
+
+    Com um `mmap`, libere a fatia (`release()` ou `with`) antes de fechar o mapeamento.
+
+    Exemplo
+    >>> raw = b"1.001:23\\x1d1.003:1\\x1f1\\x1e7\\x1f0\\x1c" + (9).to_bytes(4, "big") + b"\\x00JPEG"
+    >>> bytes(record_data(raw, list(iter_records(raw))[1]))
+    b'JPEG'
+    """
+    view = memoryview(raw)
+    span = image_span(raw, record)
+    if span is None:
+        return view[0:0]
+    start, length = span
+    return view[start : start + length]
+
+
+def find_field(raw: BytesLike, type_no: int, field_no: int) -> Optional[str]:
+    """Retorna o valor do primeiro campo `type_no.field_no` sem decodificar imagens.
+
+    Para o Tipo-1 apenas o cabeçalho é lido; para os demais tipos os registros
+    anteriores são saltados usando seus campos LEN.
+
+    Exemplo
+    >>> find_field(b"1.001:29\\x1d1.003:1\\x1f0\\x1d1.008:TSE\\x1c", 1, 8)
+    'TSE'
+    """
+    if type_no == 1:
+        return read_type1(raw).fields.get(field_no)
+    for record in iter_records(raw, parse_fields=False):
+        if record.record_type != type_no or record.record_type in BINARY_RECORD_TYPES:
+            continue
+        fields, _ = _parse_tagged_fields(raw, record.offset, record.offset + record.length)
+        return fields.get(field_no)
+    return None
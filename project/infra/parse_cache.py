@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from project.application.ports.parse_cache_port import ParsedSummary
+from project.application.ports.repository_port import RecordRow
+
+# Nome do arquivo dentro de CACHE_DIR, compartilhado por process, sample e sample-local.
+PARSE_CACHE_FILENAME = "parse-cache.sqlite3"
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS parse_cache (
+        md5_hash TEXT PRIMARY KEY,
+        payload BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        last_used INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_parse_cache_last_used ON parse_cache (last_used)",
+    "CREATE TABLE IF NOT EXISTS parse_cache_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+)
+
+
+def _encode(summary: ParsedSummary) -> bytes:
+    records = [
+        [r.seq, r.record_type, r.idc, r.offset, r.length, r.image_offset, r.image_length, r.image_format]
+        for r in summary.records
+    ]
+    data = [summary.origin, summary.name, summary.sex, summary.birth_date, records]
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(payload: bytes) -> ParsedSummary:
+    origin, name, sex, birth_date, records = json.loads(payload)
+    return ParsedSummary(
+        origin=origin,
+        name=name,
+        sex=sex,
+        birth_date=birth_date,
+        records=tuple(RecordRow(*record) for record in records),
+    )
+
+
+@dataclass
+class SqliteParseCache:
+    """Cache SQLite de resultados de parse por md5, limitado a `max_bytes` com descarte LRU.
+
+    Cada entrada guarda origem (1.08), dados do Tipo-2 e o índice de registros.
+    O arquivo registra a versão do parser (`version`): ao abrir com outra
+    versão, as entradas anteriores são descartadas.
+
+    Exemplo
+    >>> cache = SqliteParseCache(Path(".cache/parse-cache.sqlite3"), version=1)  # doctest: +SKIP
+    >>> cache.get("9e107d9d372bb6826bd81d3542a419d6")  # doctest: +SKIP
+    """
+
+    path: Path
+    version: int
+    max_bytes: int = 256 * 1024 * 1024
+    hits: int = field(default=0, init=False)
+    misses: int = field(default=0, init=False)
+    _conn: Optional[sqlite3.Connection] = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _total: int = field(default=0, init=False, repr=False)
+    _tick: int = field(default=0, init=False, repr=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            row = conn.execute("SELECT value FROM parse_cache_meta WHERE key = 'parser_version'").fetchone()
+            if row is None or row[0] != str(self.version):
+                # Parser alterado: resultados antigos podem divergir do parse atual.
+                conn.execute("DELETE FROM parse_cache")
+                conn.execute(
+                    "INSERT OR REPLACE INTO parse_cache_meta (key, value) VALUES ('parser_version', ?)",
+                    (str(self.version),),
+                )
+            # Total estimado por processo: gravações de outros processos só entram na próxima abertura.
+            self._total, self._tick = conn.execute(
+                "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_used), 0) FROM parse_cache"
+            ).fetchone()
+            self._conn = conn
+        return self._conn
+
+    def get(self, md5_hash: str) -> Optional[ParsedSummary]:
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT payload FROM parse_cache WHERE md5_hash = ?", (md5_hash,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._tick += 1
+            conn.execute("UPDATE parse_cache SET last_used = ? WHERE md5_hash = ?", (self._tick, md5_hash))
+            self.hits += 1
+        return _decode(row[0])
+
+    def put(self, md5_hash: str, summary: ParsedSummary) -> None:
+        payload = _encode(summary)
+        with self._lock:
+            conn = self._connection()
+            total = self._total
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT size FROM parse_cache WHERE md5_hash = ?", (md5_hash,)).fetchone()
+                self._tick += 1
+                conn.execute(
+                    "INSERT OR REPLACE INTO parse_cache (md5_hash, payload, size, last_used) VALUES (?, ?, ?, ?)",
+                    (md5_hash, payload, len(payload), self._tick),
+                )
+                self._total += len(payload) - (row[0] if row else 0)
+                if self._total > self.max_bytes:
+                    self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._total = total
+                raise
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Remove as entradas usadas há mais tempo até o total caber em `max_bytes`."""
+        excess = self._total - self.max_bytes
+        victims: list[tuple[str]] = []
+        for md5_hash, size in conn.execute("SELECT md5_hash, size FROM parse_cache ORDER BY last_used"):
+            if excess <= 0:
+                break
+            victims.append((md5_hash,))
+            excess -= size
+            self._total -= size
+        conn.executemany("DELETE FROM parse_cache WHERE md5_hash = ?", victims)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Optional
+
+from project.application.services.checksum_service import ChecksumService
+from project.application.services.nist_parser_service import (
+    NistParserService,
+    OriginBase,
+    ParsedNist,
+    Person,
+)
+
+
+@dataclass
+class AnalysisResult:
+    """Resultado compacto devolvido pelos workers (sem o payload bruto)."""
+
+    md5_hash: str
+    nist: ParsedNist
+    person: Person
+    origin_base: OriginBase
+
+
+# Serviços instanciados uma vez por processo worker (ver _init_worker).
+_WORKER_PARSER: Optional[NistParserService] = None
+_WORKER_CHECKSUM: Optional[ChecksumService] = None
+
+
+def _init_worker(parser: NistParserService, checksum: ChecksumService) -> None:
+    global _WORKER_PARSER, _WORKER_CHECKSUM
+    _WORKER_PARSER = parser
+    _WORKER_CHECKSUM = checksum
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Abre um segmento existente sem registrá-lo novamente no resource tracker (3.13+)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _analyze_shared(name: str, size: int) -> AnalysisResult:
+    """Calcula md5 e parseia o payload lido diretamente da memória compartilhada."""
+    parser = _WORKER_PARSER or NistParserService()
+    checksum = _WORKER_CHECKSUM or ChecksumService()
+    shm = _attach(name)
+    try:
+        # Sem cópia: md5 e parser leem a memoryview do segmento.
+        raw = shm.buf[:size]
+        try:
+            md5_hash = checksum.md5_bytes(raw)
+            nist = parser.load(raw)
+            person, origin_base = parser.parse(nist)
+            # O payload já está no processo orquestrador; não é devolvido pelo pipe.
+            nist.raw = b""
+        finally:
+            # O segmento só pode ser fechado sem views exportadas.
+            raw.release()
+    finally:
+        shm.close()
+    return AnalysisResult(md5_hash=md5_hash, nist=nist, person=person, origin_base=origin_base)
+
+
+@dataclass
+class ProcessPoolAnalyzer:
+    """Executa md5 + parse em um pool de processos, fora do GIL do orquestrador.
+
+    Os payloads são entregues aos workers via `multiprocessing.shared_memory`
+    em vez de serem serializados (pickle) a cada chamada.
+
+    Exemplo
+    >>> analyzer = ProcessPoolAnalyzer(workers=2)  # doctest: +SKIP
+    >>> analyzer.analyze(raw).md5_hash  # doctest: +SKIP
+    >>> analyzer.close()  # doctest: +SKIP
+    """
+
+    workers: int = 2
+    parser: NistParserService = field(default_factory=NistParserService)
+    checksum: ChecksumService = field(default_factory=ChecksumService)
+    _executor: Optional[ProcessPoolExecutor] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._executor = ProcessPoolExecutor(
+            max_workers=max(1, self.workers),
+            initializer=_init_worker,
+            initargs=(self.parser, self.checksum),
+        )
+
+    def analyze(self, raw: bytes) -> AnalysisResult:
+        """Envia o payload a um worker e devolve md5, índice de campos e entidades."""
+        if self._executor is None:
+            raise RuntimeError("ProcessPoolAnalyzer já foi encerrado")
+        size = len(raw)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        try:
+            shm.buf[:size] = raw
+            result = self._executor.submit(_analyze_shared, shm.name, size).result()
+        finally:
+            shm.close()
+            shm.unlink()
+        result.nist.raw = raw
+        return result
+
+    def close(self) -> None:
+        """Encerra os processos do pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self) -> "ProcessPoolAnalyzer":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Protocol, Sequence
+
+# Prefixos cujas chaves decidem se um upload é duplicado (pendentes e já lidos).
+DEFAULT_INDEX_PREFIXES = ("nist/", "nist-lidos/")
+
+_MAGIC = b"MKIX"
+_FORMAT_VERSION = 2
+_HEADER = struct.Struct(">4sHIIQd")
+
+
+class _KeyLister(Protocol):
+    def list_keys(self, prefix: str, start_after: Optional[str] = None) -> Iterator[str]: ...
+
+    def object_exists(self, key: str) -> bool: ...
+
+
+@dataclass
+class BloomFilter:
+    """Filtro de Bloom simples (hash duplo sobre blake2b) para chaves S3.
+
+    Exemplo
+    >>> bloom = BloomFilter.for_capacity(1000)
+    >>> bloom.add("nist/TSE/1.nst")
+    >>> "nist/TSE/1.nst" in bloom
+    True
+    """
+
+    size_bits: int
+    hashes: int
+    bits: bytearray = field(repr=False, default_factory=bytearray)
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.bits:
+            self.bits = bytearray((self.size_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = 0.01) -> "BloomFilter":
+        """Dimensiona o filtro para `capacity` chaves com a taxa de falso positivo desejada."""
+        capacity = max(1, capacity)
+        size_bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        hashes = max(1, round(size_bits / capacity * math.log(2)))
+        return cls(size_bits=size_bits, hashes=hashes)
+
+    def _positions(self, key: str) -> Iterator[int]:
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        first, second = struct.unpack(">QQ", digest)
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size_bits
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+@dataclass
+class S3KeyIndex:
+    """Índice local de chaves existentes no bucket, usado no lugar de HEADs por arquivo.
+
+    O índice é montado a partir da listagem dos prefixos e gravado em `path`
+    junto com a maior chave listada de cada prefixo. No primeiro uso de cada
+    execução, um índice gravado há menos de `max_age` segundos é atualizado
+    listando apenas as chaves posteriores a essa marca (`start_after`); mais
+    antigo que isso, a listagem é refeita por completo.
+
+    Um acerto no filtro é confirmado com `object_exists` (falso positivo ou
+    objeto removido/movido desde a listagem). Uma ausência só dispensa o HEAD
+    quando a posição da chave foi listada nesta execução (listagem completa ou
+    chave posterior à marca anterior); as demais ausências são confirmadas no
+    S3, pois outra máquina pode ter enviado a chave desde a última listagem.
+    """
+
+    s3: _KeyLister
+    path: Optional[Path] = None
+    prefixes: Sequence[str] = DEFAULT_INDEX_PREFIXES
+    capacity: int = 2_000_000
+    max_age: float = 3600.0
+    force_refresh: bool = False
+    confirmations: int = field(default=0, init=False)
+    _marks: dict[str, Optional[str]] = field(default_factory=dict, init=False, repr=False)
+    _fresh_after: dict[str, str] = field(default_factory=dict, init=False, repr=False)
+    _bloom: Optional[BloomFilter] = field(default=None, init=False, repr=False)
+    _built_at: float = field(default=0.0, init=False, repr=False)
+    _dirty: bool = field(default=False, init=False, repr=False)
+    _ready: bool = field(default=False, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _build_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def load_or_build(self, force: bool = False) -> "S3KeyIndex":
+        """Carrega o índice gravado e lista só as chaves novas; se ausente/expirado (ou `force`), refaz a listagem."""
+        if force or not self._load() or time.time() - self._built_at >= self.max_age:
+            self.rebuild()
+        else:
+            self.refresh()
+        self._ready = True
+        return self
+
+    def _ensure(self) -> None:
+        if self._ready:
+            return
+        with self._build_lock:
+            if not self._ready:
+                self.load_or_build(force=self.force_refresh)
+
+    def rebuild(self) -> None:
+        """Refaz o filtro percorrendo a listagem dos prefixos (uma requisição a cada 1000 chaves)."""
+        # Um índice anterior maior que a capacidade configurada dimensiona o novo filtro.
+        previous = self._bloom.count if self._bloom is not None else 0
+        bloom = BloomFilter.for_capacity(max(self.capacity, int(previous * 1.25)))
+        built_at = time.time()
+        marks: dict[str, Optional[str]] = {}
+        for prefix in self.prefixes:
+            marks[prefix] = None
+            # A listagem vem em ordem lexicográfica: a última chave é a marca do prefixo.
+            for key in self.s3.list_keys(prefix):
+                bloom.add(key)
+                marks[prefix] = key
+        with self._lock:
+            self._bloom, self._built_at, self._dirty = bloom, built_at, True
+            self._marks = marks
+            self._fresh_after = {prefix: "" for prefix in self.prefixes}
+        self.save()
+
+    def refresh(self) -> None:
+        """Acrescenta ao filtro as chaves listadas após a marca de cada prefixo (atualização incremental)."""
+        with self._lock:
+            marks = dict(self._marks)
+        fresh_after: dict[str, str] = {}
+        added: list[str] = []
+        for prefix in self.prefixes:
+            mark = marks.get(prefix)
+            fresh_after[prefix] = mark or ""
+            for key in self.s3.list_keys(prefix, start_after=mark):
+                added.append(key)
+                marks[prefix] = key
+        with self._lock:
+            if self._bloom is None:
+                self._bloom = BloomFilter.for_capacity(self.capacity)
+            for key in added:
+                self._bloom.add(key)
+            self._dirty = self._dirty or bool(added) or marks != self._marks
+            self._marks = marks
+            self._fresh_after = fresh_after
+        self.save()
+
+    def add(self, key: str) -> None:
+        """Registra uma chave enviada nesta execução."""
+        self._ensure()
+        with self._lock:
+            if self._bloom is None:
+                self._bloom = BloomFilter.for_capacity(self.capacity)
+                self._built_at = time.time()
+            self._bloom.add(key)
+            self._dirty = True
+
+    def might_exist(self, key: str) -> bool:
+        with self._lock:
+            return self._bloom is None or key in self._bloom
+
+    def _listed_this_run(self, key: str) -> bool:
+        """True se a posição da chave foi coberta por uma listagem feita nesta execução."""
+        with self._lock:
+            for prefix, fresh_after in self._fresh_after.items():
+                if key.startswith(prefix):
+                    return key > fresh_after
+        return False
+
+    def exists_any(self, keys: Iterable[str]) -> bool:
+        """True se alguma das chaves existir no bucket, consultando o S3 só quando o índice não basta.
+
+        Se um acerto não se confirmar, o índice está desatualizado para esse
+        objeto (ex.: movido para nist-lidos/) e as demais chaves são checadas no S3.
+        """
+        self._ensure()
+        stale = False
+        for key in keys:
+            hit = self.might_exist(key)
+            if not (stale or hit) and self._listed_this_run(key):
+                continue
+            with self._lock:
+                self.confirmations += 1
+            if self.s3.object_exists(key):
+                return True
+            stale = stale or hit
+        return False
+
+    def save(self) -> None:
+        """Grava o filtro em `path` (escrita atômica) quando houve alterações."""
+        with self._lock:
+            if self.path is None or self._bloom is None or not self._dirty:
+                return
+            bloom, built_at = self._bloom, self._built_at
+            header = _HEADER.pack(_MAGIC, _FORMAT_VERSION, bloom.size_bits, bloom.hashes, bloom.count, built_at)
+            marks = json.dumps(self._marks).encode("utf-8")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_bytes(header + bytes(bloom.bits) + marks)
+            tmp.replace(self.path)
+            self._dirty = False
+
+    def _load(self) -> bool:
+        if self.path is None or not self.path.exists():
+            return False
+        data = self.path.read_bytes()
+        if len(data) < _HEADER.size:
+            return False
+        magic, version, size_bits, hashes, count, built_at = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            return False
+        bits_end = _HEADER.size + (size_bits + 7) // 8
+        bits = bytearray(data[_HEADER.size : bits_end])
+        try:
+            marks = json.loads(data[bits_end:])
+        except ValueError:
+            return False
+        if len(bits) != (size_bits + 7) // 8 or not isinstance(marks, dict):
+            return False
+        with self._lock:
+            self._bloom = BloomFilter(size_bits=size_bits, hashes=hashes, bits=bits, count=count)
+            self._built_at = built_at
+            self._marks = marks
+        return True
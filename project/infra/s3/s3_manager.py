@@ -1,24 +1,114 @@
 from __future__ import annotations
 
 import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from itertools import islice
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, TypeVar
 
 from minio import Minio
-from minio.commonconfig import CopySource
-from minio.error import S3Error
+from minio.commonconfig import CopySource, Tags
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error, ServerError
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
 
-from project.application.ports.s3_port import S3Port
+from project.application.ports.s3_port import DeleteResult, MoveResult, ObjectInfo, S3Port
+from project.application.services.checksum_service import Md5Digest
+from project.infra.nist_records import BytesLike, NistFormatError, find_field, type1_length
 
-_CONTROL_SEPARATORS = ("\x1d", "\x1e", "\x1f")
+# Quebras de linha da varredura textual: as de `str.splitlines` no latin-1 mais os separadores GS/RS/US.
+_TEXT_LINE = re.compile(rb"[^\n\r\x0b\x0c\x1c\x1d\x1e\x1f\x85]+")
 
+# Janela inicial da leitura parcial do cabeçalho; o Tipo-1 costuma ter poucas centenas de bytes.
+DEFAULT_HEADER_BYTES = 1024
 
-def _sanitize_text_payload(nist_bytes: bytes) -> str:
-    """Decodifica o payload NIST para texto substituindo separadores de controle por quebras de linha."""
-    text = nist_bytes.decode("latin-1", errors="ignore")
-    for sep in _CONTROL_SEPARATORS:
-        text = text.replace(sep, "\n")
-    return text
+# Chaves por página da listagem; 1000 é o máximo devolvido pelo S3 em uma requisição.
+DEFAULT_LIST_PAGE_SIZE = 1000
+
+# Arquivos acima deste tamanho são enviados em multipart (o S3 exige partes de ao menos 5 MiB).
+DEFAULT_MULTIPART_THRESHOLD = 16 * 1024 * 1024
+MIN_MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
+# Blocos entregues por `iter_bytes` (leitura do corpo com MD5 incremental).
+DEFAULT_STREAM_CHUNK_SIZE = 256 * 1024
+
+# DeleteObjects aceita até 1000 chaves por requisição.
+DELETE_BATCH_SIZE = 1000
+DEFAULT_DELETE_IN_FLIGHT = 4
+MAX_DELETE_ERRORS = 100
+
+# Códigos S3 que indicam falha temporária do servidor (vale repetir a requisição).
+TRANSIENT_S3_CODES = frozenset(
+    {"InternalError", "ServiceUnavailable", "SlowDown", "RequestTimeout", "OperationAborted", "XMinioServerNotInitialized"}
+)
+
+# Tag aplicada pela estratégia `mark` aos objetos processados.
+PROCESSED_TAG = "mitra-status"
+PROCESSED_TAG_VALUE = "processed"
+
+_T = TypeVar("_T")
+
+
+class UploadChecksumError(IOError):
+    """Erro levantado quando o ETag devolvido pelo S3 difere do MD5 enviado."""
+
+    def __init__(self, key: str, md5_hash: str, etag: str) -> None:
+        super().__init__(f"MD5 divergente no upload de {key}: enviado {md5_hash}, ETag {etag}")
+        self.key = key
+
+
+class _DigestingReader:
+    """Repassa as leituras do cliente MinIO calculando o MD5 do que foi enviado."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self._stream = stream
+        self.digest = Md5Digest()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.digest.update(data)
+        return data
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """True para erros de rede, 5xx e códigos S3 temporários."""
+    if isinstance(exc, S3Error):
+        return exc.code in TRANSIENT_S3_CODES
+    return isinstance(exc, (ServerError, Urllib3HTTPError, OSError))
+
+
+def _etag_is_content_md5(headers: object) -> bool:
+    """False quando a resposta indica SSE-KMS ou SSE-C, cujo ETag não é o MD5 do conteúdo."""
+    if not headers:
+        return True
+    if headers.get("x-amz-server-side-encryption-customer-algorithm"):
+        return False
+    return not str(headers.get("x-amz-server-side-encryption", "")).startswith("aws:kms")
+
+
+@dataclass
+class _DeleteBatch:
+    """Resultado de um lote enviado ao DeleteObjects."""
+
+    keys: list[str]
+    errors: dict[str, str]
+
+    @property
+    def removed(self) -> int:
+        return len(self.keys) - len(self.errors)
+
+
+def _iter_text_lines(nist_bytes: BytesLike) -> Iterator[str]:
+    """Percorre as linhas não vazias do payload tratando separadores de controle como quebras de linha.
+
+    A busca ocorre direto no buffer (inclusive `mmap`); só cada linha é decodificada.
+    """
+    for match in _TEXT_LINE.finditer(nist_bytes):
+        line = match.group().decode("latin-1").strip()
+        if line:
+            yield line
 
 
 def _tag_matches(tag: str, type_no: int, field_no: int) -> bool:
@@ -35,16 +125,29 @@ def _tag_matches(tag: str, type_no: int, field_no: int) -> bool:
     return field_value == str(field_no)
 
 
-def _extract_field(nist_bytes: bytes, type_no: int, field_no: int) -> Optional[str]:
-    """Localiza um campo NIST tolerando variantes como 1:008, 1.08, 1.0008."""
+def _extract_field(nist_bytes: BytesLike, type_no: int, field_no: int) -> Optional[str]:
+    """Localiza um campo NIST tolerando variantes como 1:008, 1.08, 1.0008.
+
+    Payloads ANSI/NIST-ITL válidos são percorridos pelos campos CNT/LEN, sem
+    decodificar imagens; a varredura textual fica apenas como fallback para
+    conteúdos fora da estrutura.
+    """
     if not nist_bytes:
         return None
 
-    text = _sanitize_text_payload(nist_bytes)
-    for raw_line in text.splitlines():
-        line = raw_line.strip()
-        if not line:
-            continue
+    try:
+        value = find_field(nist_bytes, type_no, field_no)
+    except NistFormatError:
+        return _scan_text_field(nist_bytes, type_no, field_no)
+    if value is None:
+        return None
+    cleaned = value.strip(" \t\r\n|;,")
+    return cleaned or None
+
+
+def _scan_text_field(nist_bytes: BytesLike, type_no: int, field_no: int) -> Optional[str]:
+    """Varre o payload inteiro como texto procurando a tag (formato livre/legado)."""
+    for line in _iter_text_lines(nist_bytes):
         match = re.match(r"^\s*([0-9][0-9\s:.\-]*[0-9])\s*[:=\-]?\s*(.*)$", line)
         if not match:
             continue
@@ -55,7 +158,33 @@ def _extract_field(nist_bytes: bytes, type_no: int, field_no: int) -> Optional[s
     return None
 
 
-def _field_1_008(nist_bytes: bytes) -> Optional[str]:
+def _index_text_fields(nist_bytes: BytesLike) -> dict[tuple[int, int], str]:
+    """Indexa, em uma única varredura textual, todas as tags separadas (ex.: 1:008, 2.030).
+
+    Usado apenas como fallback para payloads fora da estrutura ANSI/NIST-ITL;
+    mantém a primeira ocorrência de cada (tipo, campo).
+
+    Exemplo
+    >>> _index_text_fields(b"1:008 TSE\\n2.030=MARIA")
+    {(1, 8): 'TSE', (2, 30): 'MARIA'}
+    """
+    index: dict[tuple[int, int], str] = {}
+    if not nist_bytes:
+        return index
+    for line in _iter_text_lines(nist_bytes):
+        match = re.match(r"^\s*([0-9][0-9\s:.\-]*[0-9])\s*[:=\-]?\s*(.*)$", line)
+        if not match:
+            continue
+        parts = re.split(r"[^0-9]+", match.group(1))
+        if len(parts) != 2:
+            continue
+        cleaned = match.group(2).strip(" \t\r\n|;,")
+        if cleaned:
+            index.setdefault((int(parts[0]), int(parts[1])), cleaned)
+    return index
+
+
+def _field_1_008(nist_bytes: BytesLike) -> Optional[str]:
     """Extrai o campo 1:008 (origem) do payload NIST, aceitando variações de formato.
 
     Exemplo
@@ -77,16 +206,50 @@ class MinioS3Adapter(S3Port):
 
     client: Minio
     bucket: str
+    move_workers: int = 8
+    multipart_threshold: int = DEFAULT_MULTIPART_THRESHOLD
+    max_retries: int = 3
+    retry_backoff: float = 0.5
 
-    def list_nists(self) -> Sequence[str]:
-        """Retorna chaves do S3 sob nist/ terminadas com .nst."""
-        objs = self.client.list_objects(self.bucket, prefix="nist/", recursive=True)
-        keys: list[str] = []
+    def list_nists(
+        self, start_after: Optional[str] = None, page_size: int = DEFAULT_LIST_PAGE_SIZE
+    ) -> Iterator[str]:
+        """Percorre, sob demanda, as chaves do S3 sob nist/ terminadas com .nst."""
+        for info in self.list_nist_objects(start_after=start_after, page_size=page_size):
+            yield info.key
+
+    def list_nist_objects(
+        self, start_after: Optional[str] = None, page_size: int = DEFAULT_LIST_PAGE_SIZE
+    ) -> Iterator[ObjectInfo]:
+        """Percorre objetos .nst sob nist/ trazendo ETag e tamanho da própria listagem.
+
+        Uma única listagem sob demanda, iniciada após `start_after`, pede
+        `page_size` chaves por requisição (`max-keys`, até 1000) e segue a
+        paginação do S3 em ordem lexicográfica. Nenhuma lista completa do bucket
+        é mantida em memória.
+        """
+        # `list_objects` fixa 1000 chaves por requisição; `_list_objects` aceita o `max-keys`.
+        objs = self.client._list_objects(
+            self.bucket,
+            prefix="nist/",
+            start_after=start_after,
+            max_keys=max(1, min(page_size, DEFAULT_LIST_PAGE_SIZE)),
+            encoding_type="url",
+        )
         for obj in objs:
-            key = getattr(obj, "object_name", None) or getattr(obj, "object_name", "")
+            key = getattr(obj, "object_name", None) or ""
             if key.endswith(".nst"):
-                keys.append(key)
-        return keys
+                etag = getattr(obj, "etag", None)
+                yield ObjectInfo(
+                    key=key,
+                    etag=etag.strip('"') if etag else None,
+                    size=getattr(obj, "size", None),
+                )
+
+    def list_keys(self, prefix: str, start_after: Optional[str] = None) -> Iterator[str]:
+        """Percorre, sob demanda, todas as chaves sob o prefixo informado."""
+        for obj in self.client.list_objects(self.bucket, prefix=prefix, recursive=True, start_after=start_after):
+            yield getattr(obj, "object_name", None) or ""
 
     def read_bytes(self, key: str) -> bytes:
         """Lê bytes brutos de um objeto no S3."""
@@ -98,15 +261,161 @@ class MinioS3Adapter(S3Port):
             resp.release_conn()
         return data
 
+    def iter_bytes(self, key: str, chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+        """Entrega o conteúdo do objeto em blocos à medida que chegam da rede."""
+        resp = self.client.get_object(self.bucket, key)
+        try:
+            yield from resp.stream(chunk_size)
+        finally:
+            resp.close()
+            resp.release_conn()
+
+    def _read_range(self, key: str, offset: int, length: int) -> bytes:
+        """Lê um intervalo de bytes do objeto (HTTP Range)."""
+        resp = self.client.get_object(self.bucket, key, offset=offset, length=length)
+        try:
+            data = resp.read()
+        finally:
+            resp.close()
+            resp.release_conn()
+        return data
+
+    def read_header(self, key: str, max_bytes: int = DEFAULT_HEADER_BYTES) -> bytes:
+        """Lê somente o registro Tipo-1 do objeto sem baixar os dados de imagem.
+
+        A primeira requisição traz até `max_bytes`; se o LEN (1.001) indicar um
+        Tipo-1 maior que a janela, uma segunda requisição busca apenas o restante.
+        Payloads fora da estrutura ANSI/NIST-ITL (legados ou texto) não informam
+        onde o Tipo-1 termina: se a janela veio cheia, o restante do objeto é lido
+        para que o 1.08 não se perca além dela.
+        """
+        data = self._read_range(key, 0, max_bytes)
+        try:
+            length = type1_length(data)
+        except NistFormatError:
+            if len(data) >= max_bytes:
+                data += self._read_range(key, len(data), 0)
+            return data
+        if length > len(data) and len(data) >= max_bytes:
+            data += self._read_range(key, len(data), length - len(data))
+        return data[:length]
+
     def move_processed(self, key: str, dest_key: str) -> None:
         """Move um objeto realizando cópia e, na sequência, removendo a origem."""
+        self._with_retry(self._copy, key, dest_key)
+        self._with_retry(self.client.remove_object, self.bucket, key)
+
+    def mark_processed(self, key: str) -> None:
+        """Marca o objeto com a tag `mitra-status=processed` (sem reescrever os dados).
+
+        A tag permite, por exemplo, regras de ciclo de vida no MinIO; a exclusão
+        das próximas listagens é feita pelo estado em `tb_nist_ingest`.
+        """
+        tags = Tags.new_object_tags()
+        tags[PROCESSED_TAG] = PROCESSED_TAG_VALUE
+        self._with_retry(self.client.set_object_tags, self.bucket, key, tags)
+
+    def move_many(self, moves: Iterable[tuple[str, str]], max_workers: Optional[int] = None) -> MoveResult:
+        """Move vários objetos: cópias server-side concorrentes e remoção das origens em lote.
+
+        Até `max_workers` cópias ficam em andamento ao mesmo tempo; as origens
+        copiadas são removidas com DeleteObjects em lotes de até 1000 chaves.
+        Falhas temporárias são repetidas até `max_retries` vezes. Uma origem que
+        não pôde ser removida aparece em `failed`, embora o destino já exista.
+        """
+        result = MoveResult()
+        destinations: dict[str, str] = {}
+        copied: list[str] = []
+        workers = max(1, max_workers or self.move_workers)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="s3-move") as pool:
+            copies: dict[Future, str] = {}
+            deletes: list[Future] = []
+
+            def collect(done: Iterable[Future]) -> None:
+                for future in done:
+                    key = copies.pop(future)
+                    try:
+                        future.result()
+                    except Exception as exc:
+                        result.failed[key] = str(exc)
+                        continue
+                    copied.append(key)
+                    if len(copied) >= DELETE_BATCH_SIZE:
+                        deletes.append(pool.submit(self._delete_batch, copied[:]))
+                        copied.clear()
+
+            for key, dest_key in moves:
+                if len(copies) >= workers * 2:
+                    done, _ = wait(copies, return_when=FIRST_COMPLETED)
+                    collect(done)
+                destinations[key] = dest_key
+                copies[pool.submit(self._with_retry, self._copy, key, dest_key)] = key
+            collect(list(copies))
+            if copied:
+                deletes.append(pool.submit(self._delete_batch, copied[:]))
+            for future in deletes:
+                batch = future.result()
+                for key in batch.keys:
+                    if key in batch.errors:
+                        result.failed[key] = f"copiado, mas origem não removida: {batch.errors[key]}"
+                    else:
+                        result.moved.append(key)
+                        result.destinations[key] = destinations[key]
+        return result
+
+    def _copy(self, key: str, dest_key: str) -> None:
         self.client.copy_object(self.bucket, dest_key, CopySource(self.bucket, key))
-        self.client.remove_object(self.bucket, key)
+
+    def _with_retry(self, func: Callable[..., _T], *args: object) -> _T:
+        """Executa `func` repetindo falhas temporárias com espera exponencial."""
+        attempt = 0
+        while True:
+            try:
+                return func(*args)
+            except Exception as exc:
+                if attempt >= self.max_retries or not _is_transient(exc):
+                    raise
+            time.sleep(self.retry_backoff * (2**attempt))
+            attempt += 1
 
     def upload_bytes(self, key: str, raw: bytes) -> None:
         """Envia bytes para a chave informada."""
         self.client.put_object(self.bucket, key, data=raw, length=len(raw))
 
+    def upload_file(self, key: str, path: Path) -> str:
+        """Envia um arquivo local a partir do disco, sem carregá-lo inteiro na memória.
+
+        Arquivos maiores que `multipart_threshold` usam upload multipart com
+        partes desse tamanho enviadas em paralelo pelo cliente MinIO. Retorna o
+        MD5 (hex) calculado durante a leitura.
+        """
+        with Path(path).open("rb") as handle:
+            return self._put_digesting(key, handle, Path(path).stat().st_size)
+
+    def upload_stream(self, key: str, stream: BinaryIO) -> str:
+        """Envia um fluxo de tamanho desconhecido lendo uma parte por vez.
+
+        Fluxos menores que uma parte seguem em um único PUT; os demais viram
+        upload multipart com partes de `multipart_threshold` bytes. Retorna o
+        MD5 (hex) calculado durante o envio.
+        """
+        return self._put_digesting(key, stream, -1)
+
+    def _put_digesting(self, key: str, stream: BinaryIO, length: int) -> str:
+        part_size = max(MIN_MULTIPART_PART_SIZE, self.multipart_threshold)
+        reader = _DigestingReader(stream)
+        result = self.client.put_object(self.bucket, key, data=reader, length=length, part_size=part_size)
+        md5_hash = reader.digest.finalize()
+        if not _etag_is_content_md5(getattr(result, "http_headers", None)):
+            return md5_hash
+        # Em uploads de parte única (sem SSE-KMS/SSE-C) o ETag é o MD5 do conteúdo recebido pelo servidor.
+        etag = ObjectInfo(key=key, etag=getattr(result, "etag", None)).single_part_md5
+        if etag is not None and etag != md5_hash:
+            # Não deixa no bucket um objeto cujo conteúdo diverge do arquivo local.
+            self.delete_object(key)
+            raise UploadChecksumError(key, md5_hash, etag)
+        return md5_hash
+
     def object_exists(self, key: str) -> bool:
         """Retorna True se o objeto existir no bucket."""
         try:
@@ -119,12 +428,78 @@ class MinioS3Adapter(S3Port):
         """Remove um objeto específico do bucket."""
         self.client.remove_object(self.bucket, key)
 
-    def delete_prefix(self, prefix: str) -> int:
-        """Remove todos os objetos que começam com o prefixo informado."""
-        removed = 0
+    def delete_prefix(
+        self,
+        prefix: str,
+        dry_run: bool = False,
+        batch_size: int = DELETE_BATCH_SIZE,
+        max_in_flight: int = DEFAULT_DELETE_IN_FLIGHT,
+    ) -> DeleteResult:
+        """Remove os objetos com o prefixo usando a API de remoção múltipla (DeleteObjects).
+
+        A listagem é consumida sob demanda e dividida em lotes de até `batch_size`
+        chaves; até `max_in_flight` lotes são enviados em paralelo. Com
+        `dry_run=True` apenas conta os objetos listados.
+        """
         objects = self.client.list_objects(self.bucket, prefix=prefix, recursive=True)
-        for obj in objects:
-            key = getattr(obj, "object_name", None) or getattr(obj, "object_name", "")
-            self.client.remove_object(self.bucket, key)
-            removed += 1
-        return removed
+        keys = (getattr(obj, "object_name", None) or "" for obj in objects)
+        if dry_run:
+            return DeleteResult(listed=sum(1 for _ in keys), dry_run=True)
+
+        result = DeleteResult()
+        batch_size = max(1, min(batch_size, DELETE_BATCH_SIZE))
+        with ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="s3-delete") as pool:
+            pending: set[Future] = set()
+            while True:
+                batch = list(islice(keys, batch_size))
+                if not batch:
+                    break
+                result.listed += len(batch)
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _merge_delete(result, future.result())
+                pending.add(pool.submit(self._delete_batch, batch))
+            for future in pending:
+                _merge_delete(result, future.result())
+        return result
+
+    def _delete_batch(self, keys: list[str]) -> _DeleteBatch:
+        """Envia um lote ao DeleteObjects e retorna o lote com os erros por chave.
+
+        Chaves com erro temporário são reenviadas até `max_retries` vezes.
+        """
+        errors: dict[str, str] = {}
+        remaining = list(keys)
+        attempt = 0
+        while remaining:
+            retry: list[str] = []
+            try:
+                for error in self.client.remove_objects(self.bucket, [DeleteObject(key) for key in remaining]):
+                    name = getattr(error, "name", None) or ""
+                    code = getattr(error, "code", "")
+                    errors[name] = f"{code}: {getattr(error, 'message', '')}"
+                    if code in TRANSIENT_S3_CODES:
+                        retry.append(name)
+            except Exception as exc:
+                # Falha da requisição inteira: nenhuma chave pendente é considerada removida.
+                errors.update({key: str(exc) for key in remaining})
+                retry = list(remaining) if _is_transient(exc) else []
+            if not retry or attempt >= self.max_retries:
+                break
+            time.sleep(self.retry_backoff * (2**attempt))
+            attempt += 1
+            for key in retry:
+                errors.pop(key, None)
+            remaining = retry
+        return _DeleteBatch(keys=keys, errors=errors)
+
+
+def _merge_delete(result: DeleteResult, batch: _DeleteBatch) -> None:
+    result.removed += batch.removed
+    result.failed += len(batch.errors)
+    # Guarda apenas uma amostra dos erros; as contagens continuam exatas.
+    for key, message in batch.errors.items():
+        if len(result.errors) >= MAX_DELETE_ERRORS:
+            break
+        result.errors[key] = message
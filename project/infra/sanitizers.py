@@ -2,62 +2,137 @@ from __future__ import annotations
 
 import re
 import unicodedata
-from datetime import date, datetime
-from typing import Optional
+from datetime import date
+from functools import lru_cache
+from typing import Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Valores distintos mantidos em cache por função (nomes, datas e códigos se repetem entre arquivos).
+_CACHE_SIZE = 65_536
+
+
+def _build_accent_table() -> dict[int, str]:
+    """Tabela de `str.translate` com a decomposição sem acentos dos caracteres latinos."""
+    table: dict[int, str] = {}
+    for code in range(0x00C0, 0x0250):
+        char = chr(code)
+        stripped = "".join(ch for ch in unicodedata.normalize("NFKD", char) if not unicodedata.combining(ch))
+        if stripped != char:
+            table[code] = stripped
+    return table
+
+
+_ACCENT_TABLE = _build_accent_table()
+
+
+def _strip_accents(value: str) -> str:
+    text = value.translate(_ACCENT_TABLE)
+    if text.isascii():
+        return text
+    # Fora do alfabeto latino (ex.: ligaduras, largura total): decomposição completa.
+    normalized = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in normalized if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _sanitize_text(value: str) -> str:
+    return " ".join(_strip_accents(value).split()).upper()
 
 
 def sanitize_text(value: Optional[str]) -> str:
     """Remove acentos, normaliza espacos e retorna a string em maiusculas."""
     if value is None:
         return ""
+    return _sanitize_text(value)
+
 
-    normalized = unicodedata.normalize("NFKD", value)
-    without_accents = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-    single_spaced = re.sub(r"\s+", " ", without_accents)
-    return single_spaced.strip().upper()
+# Formatos aceitos, identificados pelo formato da string: AAAAMMDD, AAAA-MM-DD,
+# AAAA/MM/DD, DD/MM/AAAA, DD-MM-AAAA e DD.MM.AAAA.
+_YEAR_FIRST = re.compile(r"(\d{4})([-/])(\d{1,2})\2(\d{1,2})")
+_DAY_FIRST = re.compile(r"(\d{1,2})([-/.])(\d{1,2})\2(\d{4})")
 
 
-_DATE_FORMATS = (
-    "%Y%m%d",
-    "%Y-%m-%d",
-    "%Y/%m/%d",
-    "%d/%m/%Y",
-    "%d-%m-%Y",
-    "%d.%m.%Y",
-)
+@lru_cache(maxsize=_CACHE_SIZE)
+def _parse_date(text: str) -> Optional[date]:
+    if len(text) == 8 and text.isascii() and text.isdigit():
+        year, month, day = text[:4], text[4:6], text[6:]
+    elif match := _YEAR_FIRST.fullmatch(text):
+        year, _, month, day = match.groups()
+    elif match := _DAY_FIRST.fullmatch(text):
+        day, _, month, year = match.groups()
+    else:
+        return None
+    try:
+        return date(int(year), int(month), int(day))
+    except ValueError:
+        return None
 
 
 def parse_date(value: Optional[str]) -> Optional[date]:
     """Interpreta datas em multiplos formatos, retornando date ou None."""
     if value is None:
         return None
-
     text = str(value).strip()
     if not text:
         return None
+    return _parse_date(text)
 
-    for fmt in _DATE_FORMATS:
-        try:
-            return datetime.strptime(text, fmt).date()
-        except ValueError:
-            continue
-    return None
+
+_SEX_CODES = {
+    "M": "M",
+    "MALE": "M",
+    "MASC": "M",
+    "MASCULINO": "M",
+    "1": "M",
+    "F": "F",
+    "FEMALE": "F",
+    "FEM": "F",
+    "FEMININO": "F",
+    "2": "F",
+}
 
 
 def normalize_sex(value: Optional[str]) -> str:
     """Normaliza codigos de sexo para 'M', 'F' ou 'U'."""
     if value is None:
         return "U"
+    return _SEX_CODES.get(str(value).strip().upper(), "U")
+
+
+def _batch(func: Callable[[Optional[str]], T], values: Iterable[Optional[str]]) -> list[T]:
+    """Aplica `func` a cada valor, calculando uma única vez os valores repetidos do lote."""
+    memo: dict[Optional[str], T] = {}
+    result = []
+    for value in values:
+        try:
+            converted = memo[value]
+        except KeyError:
+            converted = memo[value] = func(value)
+        result.append(converted)
+    return result
+
+
+def sanitize_texts(values: Iterable[Optional[str]]) -> list[str]:
+    """Versao em lote de `sanitize_text`, na ordem recebida.
+
+    Exemplo
+    >>> sanitize_texts(["Jo\\u00e3o", None, "Jo\\u00e3o"])
+    ['JOAO', '', 'JOAO']
+    """
+    return _batch(sanitize_text, values)
+
+
+def parse_dates(values: Iterable[Optional[str]]) -> list[Optional[date]]:
+    """Versao em lote de `parse_date`, na ordem recebida.
 
-    text = str(value).strip().upper()
-    if text in {"M", "MALE", "MASC", "MASCULINO"}:
-        return "M"
-    if text in {"F", "FEMALE", "FEM", "FEMININO"}:
-        return "F"
+    Exemplo
+    >>> [str(d) for d in parse_dates(["19870115", "15/01/1987", "x"])]
+    ['1987-01-15', '1987-01-15', 'None']
+    """
+    return _batch(parse_date, values)
 
-    if text == "1":
-        return "M"
-    if text == "2":
-        return "F"
 
-    return "U"
+def normalize_sexes(values: Iterable[Optional[str]]) -> list[str]:
+    """Versao em lote de `normalize_sex`, na ordem recebida."""
+    return _batch(normalize_sex, values)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Iterator, Optional, Protocol
+
+# Bytes lidos do índice por vez; a memória usada não depende do tamanho do índice.
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Readable(Protocol):
+    def read(self, size: int = -1) -> bytes: ...
+
+
+class UrlIndexError(ValueError):
+    """Erro levantado quando o índice de URLs não está no formato esperado."""
+
+
+def _decoded_chunks(stream: _Readable, chunk_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+            return
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+
+def iter_text_index(stream: _Readable, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple[str, Optional[str]]]:
+    """Percorre um índice texto (uma URL por linha) à medida que os bytes chegam.
+
+    Exemplo
+    >>> import io
+    >>> list(iter_text_index(io.BytesIO(b"https://a/1.nst\\n\\nhttps://a/2.nst")))
+    [('https://a/1.nst', None), ('https://a/2.nst', None)]
+    """
+    pending = ""
+    for text in _decoded_chunks(stream, chunk_size):
+        lines = (pending + text).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            url = line.strip()
+            if url:
+                yield url, None
+    url = pending.strip()
+    if url:
+        yield url, None
+
+
+def iter_json_index(stream: _Readable, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple[str, Optional[str]]]:
+    """Percorre um array JSON de URLs (ou objetos com `url`/`filename`) elemento a elemento.
+
+    Apenas o elemento em decodificação fica na memória. Elementos de outros
+    tipos são ignorados, como na leitura completa anterior.
+
+    Exemplo
+    >>> import io
+    >>> payload = b'["https://a/1.nst", {"url": "https://a/2", "filename": "x.nst"}, 3]'
+    >>> list(iter_json_index(io.BytesIO(payload), chunk_size=7))
+    [('https://a/1.nst', None), ('https://a/2', 'x.nst')]
+    """
+    decoder = json.JSONDecoder()
+    chunks = _decoded_chunks(stream, chunk_size)
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        text = next(chunks, None)
+        if text is None:
+            eof = True
+            return False
+        buffer = buffer[pos:] + text
+        pos = 0
+        return True
+
+    def skip_whitespace() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                return None
+
+    if skip_whitespace() != "[":
+        raise UrlIndexError("Índice JSON inválido: esperado array")
+    pos += 1
+    expect_value = True
+    while True:
+        char = skip_whitespace()
+        if char is None:
+            raise UrlIndexError("Índice JSON truncado: array não fechado")
+        if char == "]":
+            return
+        if not expect_value:
+            if char != ",":
+                raise UrlIndexError(f"Índice JSON inválido: esperado ',' ou ']' e encontrado {char!r}")
+            pos += 1
+            expect_value = True
+            continue
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if fill():
+                    continue
+                raise UrlIndexError("Índice JSON inválido: elemento malformado") from None
+            # Um número no fim do buffer pode continuar no próximo bloco.
+            if end == len(buffer) and fill():
+                continue
+            break
+        pos = end
+        expect_value = False
+        if isinstance(item, str):
+            yield item, None
+        elif isinstance(item, dict) and "url" in item:
+            yield str(item["url"]), item.get("filename")
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+# Nome do arquivo dentro de CACHE_DIR usado por upload-url-index.
+URL_JOURNAL_FILENAME = "url-journal.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS url_done (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    s3_key TEXT,
+    finished_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class SqliteUrlJournal:
+    """Diário SQLite das URLs concluídas, consultado antes de cada download.
+
+    As URLs ficam em disco (e não em um conjunto na memória), então o consumo
+    não cresce com o tamanho do índice. Falhas não são registradas e voltam a
+    ser tentadas na próxima execução.
+
+    Exemplo
+    >>> journal = SqliteUrlJournal(Path(".cache/url-journal.sqlite3"))  # doctest: +SKIP
+    >>> journal.is_done("https://exemplo/arquivo.nst")  # doctest: +SKIP
+    False
+    """
+
+    path: Path
+    _conn: Optional[sqlite3.Connection] = field(default=None, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def is_done(self, url: str) -> bool:
+        with self._lock:
+            row = self._connection().execute("SELECT 1 FROM url_done WHERE url = ?", (url,)).fetchone()
+        return row is not None
+
+    def mark_done(self, url: str, status: str, key: Optional[str]) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO url_done (url, status, s3_key, finished_at) VALUES (?, ?, ?, ?)",
+                (url, status, key, time.time()),
+            )
+
+    def clear(self) -> None:
+        """Esquece todas as URLs concluídas (recomeça o índice do zero)."""
+        with self._lock:
+            self._connection().execute("DELETE FROM url_done")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,6 +1,8 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 
 def pytest_sessionstart(session):
     # Garante que o pacote em ./project seja importável como raiz
@@ -9,3 +11,68 @@ def pytest_sessionstart(session):
     if str(project_dir) not in sys.path:
         sys.path.insert(0, str(project_dir))
 
+
+
+class _LocalHttpServer:
+    """Servidor HTTP/1.1 local (keep-alive) que entrega `routes` e registra conexões e concorrência."""
+
+    def __init__(self) -> None:
+        import threading
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.routes: dict[str, bytes] = {}
+        self.delay = 0.0
+        self.client_ports: set[int] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        state = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):  # noqa: ANN002
+                pass
+
+            def do_GET(self) -> None:  # noqa: N802
+                import time
+
+                with state._lock:
+                    state.client_ports.add(self.client_address[1])
+                    state.in_flight += 1
+                    state.max_in_flight = max(state.max_in_flight, state.in_flight)
+                try:
+                    time.sleep(state.delay)
+                    body = state.routes.get(self.path)
+                    if body is None:
+                        self.send_response(404)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with state._lock:
+                        state.in_flight -= 1
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def http_server():
+    server = _LocalHttpServer()
+    yield server
+    server.close()
@@ -8,3 +8,21 @@ def test_md5_bytes_matches_known_values() -> None:
 
     assert checksum.md5_bytes(b"") == "d41d8cd98f00b204e9800998ecf8427e"
     assert checksum.md5_bytes(b"abc") == "900150983cd24fb0d6963f7d28e17f72"
+
+
+def test_incremental_md5_matches_whole_buffer_and_content_md5() -> None:
+    checksum = ChecksumService()
+    digest = checksum.new_md5()
+
+    for chunk in (b"a", b"", b"bc"):
+        digest.update(chunk)
+
+    assert digest.finalize() == checksum.md5_bytes(b"abc")
+    assert digest.size == 3
+    assert digest.content_md5() == "kAFQmDzST7DWlj99KOF/cg=="
+
+
+def test_md5_bytes_accepts_memoryview() -> None:
+    checksum = ChecksumService()
+
+    assert checksum.md5_bytes(memoryview(b"xabcx")[1:4]) == checksum.md5_bytes(b"abc")
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from project.application.ports.s3_port import DeleteResult
 from project.application.usecases.delete_nist_usecase import DeleteNistUseCase
 
 
@@ -13,9 +14,11 @@ class DummyS3:
     def delete_object(self, key: str) -> None:
         self.removed_keys.append(key)
 
-    def delete_prefix(self, prefix: str) -> int:
+    def delete_prefix(self, prefix: str, dry_run: bool = False) -> DeleteResult:
         self.removed_prefixes.append(prefix)
-        return 2
+        if dry_run:
+            return DeleteResult(listed=2, dry_run=True)
+        return DeleteResult(listed=2, removed=2)
 
 
 def test_delete_by_key_calls_port() -> None:
@@ -31,9 +34,9 @@ def test_delete_by_prefix_returns_count() -> None:
     dummy = DummyS3(removed_keys=[], removed_prefixes=[])
     usecase = DeleteNistUseCase(s3=dummy)
 
-    removed = usecase.delete_by_prefix("nist/")
+    result = usecase.delete_by_prefix("nist/")
 
-    assert removed == 2
+    assert result.removed == 2
     assert dummy.removed_prefixes == ["nist/"]
 
 
@@ -41,7 +44,16 @@ def test_delete_all_uses_empty_prefix() -> None:
     dummy = DummyS3(removed_keys=[], removed_prefixes=[])
     usecase = DeleteNistUseCase(s3=dummy)
 
-    removed = usecase.delete_all()
+    result = usecase.delete_all()
 
-    assert removed == 2
+    assert result.removed == 2
     assert dummy.removed_prefixes == [""]
+
+
+def test_delete_all_dry_run_only_counts() -> None:
+    dummy = DummyS3(removed_keys=[], removed_prefixes=[])
+    usecase = DeleteNistUseCase(s3=dummy)
+
+    result = usecase.delete_all(dry_run=True)
+
+    assert (result.listed, result.removed, result.dry_run) == (2, 0, True)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from project.infra.http_downloader import HttpDownloadError, HttpDownloader
+
+
+def test_connections_are_reused_between_downloads(http_server) -> None:  # noqa: ANN001
+    http_server.routes = {f"/{i}.nst": bytes([i]) * 10 for i in range(3)}
+    downloader = HttpDownloader(per_host=1)
+
+    bodies = []
+    for i in range(3):
+        with downloader.open(http_server.url(f"/{i}.nst")) as body:
+            bodies.append(body.read())
+
+    assert bodies == [bytes([i]) * 10 for i in range(3)]
+    assert len(http_server.client_ports) == 1
+    downloader.close()
+
+
+def test_per_host_limit_bounds_concurrent_requests(http_server) -> None:  # noqa: ANN001
+    http_server.routes = {f"/{i}.nst": b"x" for i in range(8)}
+    http_server.delay = 0.05
+    downloader = HttpDownloader(per_host=2)
+
+    def fetch(i: int) -> bytes:
+        with downloader.open(http_server.url(f"/{i}.nst")) as body:
+            return body.read()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert list(pool.map(fetch, range(8))) == [b"x"] * 8
+
+    assert http_server.max_in_flight == 2
+    downloader.close()
+
+
+def test_error_status_raises(http_server) -> None:  # noqa: ANN001
+    downloader = HttpDownloader(retries=0)
+
+    with pytest.raises(HttpDownloadError) as info:
+        with downloader.open(http_server.url("/ausente.nst")):
+            pass
+
+    assert info.value.status == 404
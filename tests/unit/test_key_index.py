@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from project.infra.s3.key_index import BloomFilter, S3KeyIndex
+
+
+class DummyS3:
+    def __init__(self, keys: list[str]) -> None:
+        self.keys = set(keys)
+        self.list_calls: list[str] = []
+        self.list_after: list[str | None] = []
+        self.head_calls: list[str] = []
+
+    def list_keys(self, prefix: str, start_after: str | None = None):  # noqa: ANN201
+        self.list_calls.append(prefix)
+        self.list_after.append(start_after)
+        return (key for key in sorted(self.keys) if key.startswith(prefix) and key > (start_after or ""))
+
+    def object_exists(self, key: str) -> bool:
+        self.head_calls.append(key)
+        return key in self.keys
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = BloomFilter.for_capacity(500)
+    keys = [f"nist/TSE/{i}.nst" for i in range(500)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"nist/OUT/{i}.nst" in bloom for i in range(2000))
+    assert false_positives < 100
+
+
+def test_misses_need_no_request_and_hits_are_confirmed() -> None:
+    s3 = DummyS3(["nist/TSE/a.nst", "nist-lidos/TSE/b.nst"])
+    index = S3KeyIndex(s3, capacity=100)
+
+    assert index.exists_any(["nist/TSE/new.nst", "nist-lidos/TSE/new.nst"]) is False
+    assert s3.head_calls == []
+    assert index.exists_any(["nist/TSE/b.nst", "nist-lidos/TSE/b.nst"]) is True
+    assert s3.head_calls == ["nist-lidos/TSE/b.nst"]
+    assert s3.list_calls == ["nist/", "nist-lidos/"]
+
+
+def test_stale_hit_falls_back_to_checking_remaining_keys() -> None:
+    s3 = DummyS3(["nist/TSE/a.nst"])
+    index = S3KeyIndex(s3, capacity=100)
+    index.load_or_build()
+    # Objeto movido depois da listagem: o índice ainda aponta para nist/.
+    s3.keys = {"nist-lidos/TSE/a.nst"}
+
+    assert index.exists_any(["nist/TSE/a.nst", "nist-lidos/TSE/a.nst"]) is True
+    assert s3.head_calls == ["nist/TSE/a.nst", "nist-lidos/TSE/a.nst"]
+
+
+def test_index_is_persisted_and_reused_until_it_expires(tmp_path: Path) -> None:
+    path = tmp_path / "index.bin"
+    s3 = DummyS3(["nist/TSE/a.nst"])
+    first = S3KeyIndex(s3, path=path, capacity=100)
+    first.add("nist/TSE/uploaded.nst")
+    first.save()
+
+    reused = S3KeyIndex(s3, path=path, capacity=100)
+    assert reused.exists_any(["nist/TSE/uploaded.nst"]) is False  # confirmado no S3 (não existe lá)
+    # Reaproveitado: só as chaves posteriores à última listada são pedidas.
+    assert s3.list_calls == ["nist/", "nist-lidos/"] * 2
+    assert s3.list_after == [None, None, "nist/TSE/a.nst", None]
+    assert s3.head_calls == ["nist/TSE/uploaded.nst"]
+
+    expired = S3KeyIndex(s3, path=path, capacity=100, max_age=0)
+    expired.exists_any(["nist/TSE/x.nst"])
+    assert s3.list_calls == ["nist/", "nist-lidos/"] * 3
+    assert s3.list_after[-2:] == [None, None]
+
+
+def test_reused_index_confirms_misses_before_the_mark_and_trusts_the_delta(tmp_path: Path) -> None:
+    path = tmp_path / "index.bin"
+    s3 = DummyS3(["nist/TSE/m.nst"])
+    S3KeyIndex(s3, path=path, capacity=100).load_or_build()
+    # Enviados por outra máquina depois da listagem: um antes e outro depois da marca.
+    s3.keys |= {"nist/TSE/b.nst", "nist/TSE/z.nst"}
+
+    reused = S3KeyIndex(s3, path=path, capacity=100)
+    assert reused.exists_any(["nist/TSE/b.nst"]) is True
+    assert s3.head_calls == ["nist/TSE/b.nst"]
+    assert reused.exists_any(["nist/TSE/z.nst"]) is True  # listado no delta e confirmado
+    assert reused.exists_any(["nist/TSE/y.nst"]) is False
+    assert s3.head_calls == ["nist/TSE/b.nst", "nist/TSE/z.nst"]
+    assert reused.exists_any(["nist/TSE/c.nst"]) is False  # anterior à marca: consulta o S3
+    assert s3.head_calls[-1] == "nist/TSE/c.nst"
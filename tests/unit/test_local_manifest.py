@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from project.application.ports.manifest_port import ManifestEntry
+from project.infra.local_manifest import SqliteManifest
+
+
+def test_get_requires_same_size_and_mtime(tmp_path: Path) -> None:
+    manifest = SqliteManifest(tmp_path / "manifest.sqlite3")
+    manifest.record_upload(ManifestEntry("a.nst", 10, 100, "md5a", "TSE", "nist/TSE/a.nst"))
+
+    entry = manifest.get("a.nst", 10, 100)
+
+    assert entry == ManifestEntry("a.nst", 10, 100, "md5a", "TSE", "nist/TSE/a.nst", uploaded=True, ingested=False)
+    assert manifest.get("a.nst", 11, 100) is None
+    assert manifest.get("a.nst", 10, 101) is None
+    manifest.close()
+
+
+def test_states_accumulate_and_reset_when_file_changes(tmp_path: Path) -> None:
+    manifest = SqliteManifest(tmp_path / "manifest.sqlite3")
+    manifest.record_upload(ManifestEntry("a.nst", 10, 100, "md5a", "TSE", "nist/TSE/a.nst"))
+    manifest.record_ingest(ManifestEntry("a.nst", 10, 100, None, None, "local/a.nst"))
+
+    both = manifest.get("a.nst", 10, 100)
+    assert both is not None and both.uploaded and both.ingested and both.md5_hash == "md5a"
+
+    manifest.record_ingest(ManifestEntry("a.nst", 12, 200, "md5b", "PF", "local/a.nst"))
+    changed = manifest.get("a.nst", 12, 200)
+    assert changed is not None and changed.ingested and not changed.uploaded
+    assert changed.md5_hash == "md5b"
+    manifest.close()
+
+
+def test_manifest_persists_between_instances(tmp_path: Path) -> None:
+    path = tmp_path / "cache" / "manifest.sqlite3"
+    first = SqliteManifest(path)
+    first.record_ingest(ManifestEntry("a.nst", 10, 100, "md5a"))
+    first.close()
+
+    entry = SqliteManifest(path).get("a.nst", 10, 100)
+
+    assert entry is not None and entry.ingested
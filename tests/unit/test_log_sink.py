@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import pytest
+
+from project.infra.db.log_sink import BufferedLogSink
+
+
+class RecordingManager:
+    """Captura as linhas enviadas via COPY para findface.tb_log."""
+
+    def __init__(self, gate: threading.Event | None = None) -> None:
+        self.batches: list[list[tuple[object, ...]]] = []
+        self.gate = gate
+
+    @contextmanager
+    def connection(self) -> Iterator[object]:
+        if self.gate is not None:
+            self.gate.wait(timeout=2)
+        manager = self
+
+        class _Copy:
+            def __init__(self) -> None:
+                self.rows: list[tuple[object, ...]] = []
+
+            def __enter__(self) -> "_Copy":
+                return self
+
+            def __exit__(self, *exc: object) -> None:
+                manager.batches.append(self.rows)
+
+            def write_row(self, row: tuple[object, ...]) -> None:
+                self.rows.append(row)
+
+        class _Cursor:
+            def __enter__(self) -> "_Cursor":
+                return self
+
+            def __exit__(self, *exc: object) -> None:
+                return None
+
+            def copy(self, sql: str) -> _Copy:
+                assert sql.startswith("COPY findface.tb_log")
+                return _Copy()
+
+        class _Conn:
+            def cursor(self) -> _Cursor:
+                return _Cursor()
+
+        yield _Conn()
+
+    @property
+    def rows(self) -> list[tuple[object, ...]]:
+        return [row for batch in self.batches for row in batch]
+
+
+def test_close_flushes_pending_entries() -> None:
+    manager = RecordingManager()
+    sink = BufferedLogSink(manager, flush_size=100, flush_interval=60)
+
+    sink.write("INFO", "a")
+    sink.write("ERROR", "b")
+    sink.close()
+
+    assert [(level, message) for level, message, _ in manager.rows] == [("INFO", "a"), ("ERROR", "b")]
+    assert len(manager.batches) == 1
+
+
+def test_flushes_in_background_when_size_threshold_reached() -> None:
+    manager = RecordingManager()
+    sink = BufferedLogSink(manager, flush_size=3, flush_interval=60)
+
+    for i in range(3):
+        sink.write("INFO", str(i))
+    for _ in range(200):
+        if manager.rows:
+            break
+        threading.Event().wait(0.01)
+
+    assert len(manager.rows) == 3
+    sink.close()
+
+
+def test_drop_policy_discards_entries_when_buffer_is_full() -> None:
+    gate = threading.Event()
+    manager = RecordingManager(gate=gate)
+    sink = BufferedLogSink(manager, max_buffer=2, flush_size=1000, flush_interval=60, on_full="drop")
+
+    sink.write("INFO", "0")
+    sink.write("INFO", "1")
+    # Buffer cheio acorda a thread de gravacao, que fica presa no banco (gate).
+    for _ in range(200):
+        if not sink._buffer:
+            break
+        threading.Event().wait(0.01)
+    for i in range(2, 5):
+        sink.write("INFO", str(i))
+    gate.set()
+    sink.close()
+
+    assert sink.dropped == 1
+    assert [message for _, message, _ in manager.rows] == ["0", "1", "2", "3"]
+
+
+def test_flush_policy_blocks_until_space_is_available() -> None:
+    manager = RecordingManager()
+    sink = BufferedLogSink(manager, max_buffer=2, flush_size=1000, flush_interval=60, on_full="flush")
+
+    for i in range(5):
+        sink.write("INFO", str(i))
+    sink.close()
+
+    assert sink.dropped == 0
+    assert [message for _, message, _ in manager.rows] == ["0", "1", "2", "3", "4"]
+
+
+def test_write_after_close_is_persisted_synchronously() -> None:
+    manager = RecordingManager()
+    sink = BufferedLogSink(manager)
+    sink.close()
+
+    sink.write("INFO", "late")
+
+    assert [message for _, message, _ in manager.rows] == ["late"]
+
+
+def test_writer_blocked_by_full_buffer_is_persisted_when_closed() -> None:
+    gate = threading.Event()
+    manager = RecordingManager(gate=gate)
+    sink = BufferedLogSink(manager, max_buffer=1, flush_size=1000, flush_interval=60, on_full="flush")
+    waiting = threading.Event()
+    wait_for = sink._cond.wait_for
+
+    def delayed_wait_for(predicate, timeout=None):  # noqa: ANN001, ANN202
+        if threading.current_thread() is sink._thread:
+            return wait_for(predicate, timeout)
+        waiting.set()
+        result = wait_for(predicate, timeout)
+        # Acordado pelo close: só retoma depois que a thread gravou o último lote e saiu.
+        while sink._thread.is_alive():
+            sink._cond.wait(0.01)
+        return result
+
+    sink.write("INFO", "0")
+    for _ in range(200):
+        if not sink._buffer:
+            break
+        threading.Event().wait(0.01)
+    sink.write("INFO", "1")
+    sink._cond.wait_for = delayed_wait_for
+    writer = threading.Thread(target=sink.write, args=("INFO", "2"))
+    writer.start()
+    assert waiting.wait(timeout=2)
+    closer = threading.Thread(target=sink.close)
+    closer.start()
+    gate.set()
+    closer.join(timeout=2)
+    writer.join(timeout=2)
+
+    assert [message for _, message, _ in manager.rows] == ["0", "1", "2"]
+
+
+def test_invalid_policy_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        BufferedLogSink(RecordingManager(), on_full="ignore")
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterator
+
+import pytest
+
+from project.infra.db import migrations
+from project.infra.db.migrations import LATEST_VERSION, MIGRATIONS, SchemaMigrator
+
+
+@pytest.fixture(autouse=True)
+def _reset_schema_cache() -> Iterator[None]:
+    migrations._VERIFIED.clear()
+    yield
+    migrations._VERIFIED.clear()
+
+
+class FakeDatabase:
+    """Simula apenas o necessario de findface.schema_version."""
+
+    def __init__(self, versions: list[int] | None = None) -> None:
+        self.versions = versions
+        self.statements: list[str] = []
+        self.connections = 0
+
+
+class FakeCursor:
+    def __init__(self, db: FakeDatabase) -> None:
+        self.db = db
+        self._row: tuple[object, ...] | None = None
+
+    def __enter__(self) -> "FakeCursor":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def execute(self, sql: str, params: object = None) -> None:
+        text = " ".join(sql.split())
+        self.db.statements.append(text)
+        if text.startswith("SELECT to_regclass"):
+            self._row = (self.db.versions is not None,)
+        elif text.startswith("CREATE TABLE IF NOT EXISTS findface.schema_version"):
+            if self.db.versions is None:
+                self.db.versions = []
+        elif text.startswith("SELECT COALESCE(MAX(version), 0)"):
+            self._row = (max(self.db.versions or [0]),)
+        elif text.startswith("INSERT INTO findface.schema_version"):
+            self.db.versions.append(params[0])
+
+    def fetchone(self) -> tuple[object, ...] | None:
+        return self._row
+
+
+class FakeManager:
+    def __init__(self, db: FakeDatabase) -> None:
+        self.db = db
+
+    @contextmanager
+    def connection(self) -> Iterator[object]:
+        self.db.connections += 1
+
+        class _Conn:
+            def cursor(inner) -> FakeCursor:  # noqa: N805
+                return FakeCursor(self.db)
+
+        yield _Conn()
+
+
+def test_migrations_are_ordered_and_unique() -> None:
+    versions = [m.version for m in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert LATEST_VERSION == versions[-1]
+
+
+def test_migrate_applies_all_pending_versions_on_empty_database() -> None:
+    db = FakeDatabase()
+    migrator = SchemaMigrator(FakeManager(db))
+
+    applied = migrator.migrate()
+
+    assert applied == [m.version for m in MIGRATIONS]
+    assert migrator.current_version() == LATEST_VERSION
+    assert db.statements[0].startswith("SELECT pg_advisory_xact_lock")
+
+
+def test_migrate_is_noop_when_up_to_date() -> None:
+    db = FakeDatabase(versions=[m.version for m in MIGRATIONS])
+    migrator = SchemaMigrator(FakeManager(db))
+
+    assert migrator.migrate() == []
+    assert not any(s.startswith("CREATE TABLE IF NOT EXISTS findface.tb_nist_ingest") for s in db.statements)
+
+
+def test_ensure_checks_database_only_once_per_process() -> None:
+    db = FakeDatabase(versions=[m.version for m in MIGRATIONS])
+    manager = FakeManager(db)
+
+    SchemaMigrator(manager).ensure()
+    SchemaMigrator(manager).ensure()
+
+    assert db.connections == 1
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+from project.application.ports.s3_port import MoveResult
+from project.application.services.nist_parser_service import NistParserService, ParsedNist
 from project.application.usecases.move_processed_usecase import MoveProcessedUseCase
 
 
 class DummyS3:
     def __init__(self) -> None:
         self.moves: list[tuple[str, str]] = []
+        self.header_reads: list[str] = []
+
+    def read_header(self, key: str) -> bytes:
+        self.header_reads.append(key)
+        return b"1.001:29\x1d1.003:1\x1f0\x1d1.008:TSE\x1c"
 
     def move_processed(self, key: str, dest: str) -> None:
         self.moves.append((key, dest))
 
 
 class DummyParser:
-    def destination_key_for_processed(self, key: str, raw: bytes) -> str:  # noqa: ARG002
+    def destination_key_for_processed(self, key: str, nist: object) -> str:  # noqa: ARG002
         return f"nist-lidos/TSE/{key.split('/')[-1]}"
 
 
@@ -21,7 +28,50 @@ def test_execute_moves_object_and_returns_destination() -> None:
     parser = DummyParser()
     usecase = MoveProcessedUseCase(s3=s3, nist_tools=parser)
 
-    dest = usecase.execute("nist/TSE/116908146.nst", b"...")
+    dest = usecase.execute("nist/TSE/116908146.nst", ParsedNist(raw=b"..."))
 
     assert dest == "nist-lidos/TSE/116908146.nst"
     assert s3.moves == [("nist/TSE/116908146.nst", "nist-lidos/TSE/116908146.nst")]
+
+
+def test_execute_by_key_routes_using_header_only() -> None:
+    s3 = DummyS3()
+    usecase = MoveProcessedUseCase(s3=s3, nist_tools=NistParserService())
+
+    dest = usecase.execute_by_key("nist/unknown/116908146.nst")
+
+    assert dest == "nist-lidos/TSE/116908146.nst"
+    assert s3.header_reads == ["nist/unknown/116908146.nst"]
+    assert s3.moves == [("nist/unknown/116908146.nst", "nist-lidos/TSE/116908146.nst")]
+
+
+class BatchS3(DummyS3):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[list[tuple[str, str]]] = []
+
+    def read_header(self, key: str) -> bytes:
+        if key.endswith("broken.nst"):
+            raise RuntimeError("range failed")
+        return super().read_header(key)
+
+    def move_many(self, moves):  # noqa: ANN001, ANN201
+        batch = list(moves)
+        self.batches.append(batch)
+        return MoveResult(moved=[src for src, _ in batch])
+
+
+def test_execute_many_by_key_moves_in_one_batch_and_reports_header_failures() -> None:
+    s3 = BatchS3()
+    usecase = MoveProcessedUseCase(s3=s3, nist_tools=NistParserService(), header_workers=2)
+
+    result = usecase.execute_many_by_key(["nist/unknown/1.nst", "nist/unknown/broken.nst", "nist/unknown/2.nst"])
+
+    assert s3.batches == [
+        [
+            ("nist/unknown/1.nst", "nist-lidos/TSE/1.nst"),
+            ("nist/unknown/2.nst", "nist-lidos/TSE/2.nst"),
+        ]
+    ]
+    assert result.moved == ["nist/unknown/1.nst", "nist/unknown/2.nst"]
+    assert result.failed == {"nist/unknown/broken.nst": "range failed"}
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from pathlib import Path
+
 from project.application.services.nist_parser_service import (
     NistParserService,
     OriginBase,
+    ParsedNist,
     Person,
 )
 
@@ -11,17 +14,51 @@ def test_parse_returns_entities_with_sanitized_origin() -> None:
     raw = b"1:008 TSe \n"
     parser = NistParserService()
 
-    person, origin_base = parser.parse(raw)
+    person, origin_base = parser.parse(parser.load(raw))
 
     assert isinstance(person, Person)
     assert isinstance(origin_base, OriginBase)
     assert origin_base.origin == "TSE"
 
 
+def test_parse_fills_person_from_type2_fields() -> None:
+    raw = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()
+    parser = NistParserService()
+
+    person, _ = parser.parse(parser.load(raw))
+
+    assert person == Person(name="MARIA LUCIA SANTOS", sex="F", birth_date="1954-06-30")
+
+
+def test_restore_rebuilds_parse_result_from_summary() -> None:
+    raw = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()
+    parser = NistParserService()
+    nist = parser.load(raw)
+    person, origin_base = parser.parse(nist)
+
+    summary = parser.summarize(nist, person, nist.record_rows())
+    cached_nist, cached_person, cached_origin = parser.restore(raw, summary)
+
+    assert cached_person == person
+    assert cached_origin == origin_base
+    assert cached_nist.origin == nist.origin
+    assert cached_nist.record_rows() == nist.record_rows()
+    key = "nist/BR/TSE/116528666.nst"
+    assert parser.destination_key_for_processed(key, cached_nist) == parser.destination_key_for_processed(key, nist)
+
+
+def test_parse_leaves_person_empty_without_type2() -> None:
+    parser = NistParserService()
+
+    person, _ = parser.parse(parser.load(b"1:008 TSE\n"))
+
+    assert person == Person()
+
+
 def test_parse_defaults_when_origin_missing() -> None:
     parser = NistParserService()
 
-    _, origin_base = parser.parse(b"no markers here")
+    _, origin_base = parser.parse(parser.load(b"no markers here"))
 
     assert origin_base.origin == "UNKNOWN"
 
@@ -30,7 +67,7 @@ def test_compose_key_for_upload_builds_path() -> None:
     raw = b"1:008 TSE\n"
     parser = NistParserService()
 
-    key = parser.compose_key_for_upload("116908146.nst", raw)
+    key = parser.compose_key_for_upload("116908146.nst", parser.load(raw))
 
     assert key == "nist/TSE/116908146.nst"
 
@@ -39,7 +76,7 @@ def test_destination_key_for_processed_uses_filename_from_source_key() -> None:
     raw = b"1:008 TSE\n"
     parser = NistParserService()
 
-    destination = parser.destination_key_for_processed("some/prefix/116908146.nst", raw)
+    destination = parser.destination_key_for_processed("some/prefix/116908146.nst", parser.load(raw))
 
     assert destination == "nist-lidos/TSE/116908146.nst"
 
@@ -47,6 +84,75 @@ def test_destination_key_for_processed_uses_filename_from_source_key() -> None:
 def test_destination_key_for_processed_handles_missing_marker() -> None:
     parser = NistParserService()
 
-    destination = parser.destination_key_for_processed("some/prefix/116908146.nst", b"no markers")
+    destination = parser.destination_key_for_processed("some/prefix/116908146.nst", parser.load(b"no markers"))
 
     assert destination == "nist-lidos/unknown/116908146.nst"
+
+
+def test_validate_accepts_legacy_text_payloads_that_load_parses() -> None:
+    parser = NistParserService()
+
+    for raw in (b"1.08:TSE", b"1.0008=TSE", b"1.008: TSE\r\n1.009: 123"):
+        assert parser.validate(raw) is None
+        assert parser.load(raw).origin == "TSE"
+
+
+def test_quarantine_key_keeps_path_below_nist_prefix() -> None:
+    parser = NistParserService()
+
+    assert parser.quarantine_key("nist/BR/TSE/1.nst", "truncated") == "nist-quarentena/truncated/BR/TSE/1.nst"
+    assert parser.quarantine_key("outro/1.nst", "bad-cnt") == "nist-quarentena/bad-cnt/1.nst"
+
+
+def test_load_indexes_every_record_in_one_pass() -> None:
+    raw = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()
+    parser = NistParserService()
+
+    nist = parser.load(raw)
+
+    assert isinstance(nist, ParsedNist)
+    assert nist.raw is raw
+    assert [r.record_type for r in nist.records][:3] == [1, 2, 10]
+    assert nist.origin == "BR/TSE"
+    assert nist.get(2, 30) == "MARIA LUCIA SANTOS"
+    assert nist.get(2, 35) == "19540630"
+    assert nist.get(2, 39) == "2"
+    assert nist.get(10, 3) == "FACE"
+    assert nist.get(14, 1) is None
+
+
+def test_record_rows_index_records_and_image_ranges() -> None:
+    raw = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()
+
+    rows = NistParserService().load(raw).record_rows()
+
+    assert [row.seq for row in rows] == list(range(len(rows)))
+    assert rows[0].image_offset is None
+    face = rows[2]
+    assert (face.record_type, face.idc, face.image_format) == (10, 1, "jpeg")
+    assert face.offset < face.image_offset < face.offset + face.length
+    assert raw[face.image_offset : face.image_offset + 2] == b"\xff\xd8"
+    fingerprints = [row for row in rows if row.record_type == 4]
+    assert fingerprints and all(row.image_format == "wsq" for row in fingerprints)
+    assert all(row.image_offset == row.offset + 18 for row in fingerprints)
+    assert ParsedNist(raw=b"texto livre").record_rows() == []
+
+
+def test_load_falls_back_to_text_index_for_free_form_payload() -> None:
+    parser = NistParserService()
+
+    nist = parser.load(b"1:008 TSE\n2.030=MARIA\n")
+
+    assert nist.records == []
+    assert nist.origin == "TSE"
+    assert nist.get(2, 30) == "MARIA"
+    assert parser.load(memoryview(b"1:008 TSE\x1d2.030=MARIA")).fields == nist.fields
+
+
+def test_load_header_indexes_type1_fields_only() -> None:
+    parser = NistParserService()
+
+    nist = parser.load_header(b"1.001:29\x1d1.003:1\x1f0\x1d1.008:TSE\x1c")
+
+    assert [r.record_type for r in nist.records] == [1]
+    assert nist.origin == "TSE"
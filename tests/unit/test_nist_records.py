@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from project.infra.nist_records import (
+    NistFormatError,
+    find_field,
+    image_format,
+    image_span,
+    iter_records,
+    parse_cnt,
+    read_type1,
+    record_data,
+    structural_error,
+)
+from project.infra.mapped_file import map_file
+
+NISTS_DIR = Path(__file__).resolve().parents[2] / "nists"
+
+GS, FS, RS, US = b"\x1d", b"\x1c", b"\x1e", b"\x1f"
+
+
+def _tagged(record_type: int, fields: list[tuple[int, bytes]], image: bytes | None = None) -> bytes:
+    """Monta um registro com tags calculando o LEN (x.001) automaticamente."""
+    body = [f"{record_type}.{num:03d}:".encode() + value for num, value in fields]
+    if image is not None:
+        body.append(f"{record_type}.999:".encode() + image)
+    rest = GS + GS.join(body) + FS if body else FS
+    length = 0
+    while True:
+        candidate = f"{record_type}.001:{length}".encode() + rest
+        if len(candidate) == length:
+            return candidate
+        length = len(candidate)
+
+
+def _binary(idc: int, data: bytes) -> bytes:
+    return (5 + len(data)).to_bytes(4, "big") + bytes([idc]) + data
+
+
+def _build_payload(origin: bytes = b"TSE") -> bytes:
+    cnt = US.join([b"1", b"3"]) + RS + US.join([b"2", b"0"]) + RS + US.join([b"4", b"1"]) + RS + US.join([b"10", b"2"])
+    type1 = _tagged(1, [(2, b"0300"), (3, cnt), (8, origin)])
+    type2 = _tagged(2, [(2, b"0"), (30, b"MARIA DA SILVA"), (39, b"2")])
+    # Dados binarios contendo separadores e tags falsas nao podem confundir o parser.
+    type4 = _binary(1, b"\x00\x1d2.030:FALSO\x1c" * 10)
+    type10 = _tagged(10, [(2, b"2"), (3, b"FACE")], image=b"\xff\xd8\x1d10.003:X\x1c\xff\xd9")
+    return type1 + type2 + type4 + type10
+
+
+def test_parse_cnt_returns_record_list() -> None:
+    assert parse_cnt("1\x1f2\x1e2\x1f0\x1e10\x1f1") == [(2, 0), (10, 1)]
+
+
+def test_parse_cnt_rejects_malformed_value() -> None:
+    with pytest.raises(NistFormatError):
+        parse_cnt("x\x1f2")
+    with pytest.raises(NistFormatError):
+        parse_cnt("1\x1f2\x1e2")
+
+
+def test_read_type1_only_reads_header() -> None:
+    payload = _build_payload()
+
+    header = read_type1(payload)
+
+    assert header.record_type == 1
+    assert header.fields[8] == "TSE"
+    assert header.length < len(payload)
+
+
+def test_iter_records_skips_binary_and_image_data() -> None:
+    payload = _build_payload()
+
+    records = list(iter_records(payload))
+
+    assert [(r.record_type, r.idc) for r in records] == [(1, None), (2, 0), (4, 1), (10, 2)]
+    assert records[1].fields[30] == "MARIA DA SILVA"
+    assert records[2].fields == {}
+    assert records[3].fields[3] == "FACE"
+    assert 999 not in records[3].fields
+    assert payload[records[3].data_offset : records[3].data_offset + 2] == b"\xff\xd8"
+    last = records[-1]
+    assert last.offset + last.length == len(payload)
+
+
+def test_find_field_looks_up_type2_past_binary_records() -> None:
+    payload = _build_payload()
+
+    assert find_field(payload, 2, 30) == "MARIA DA SILVA"
+    assert find_field(payload, 10, 3) == "FACE"
+    assert find_field(payload, 2, 999) is None
+    assert find_field(payload, 14, 1) is None
+
+
+def test_memoryview_and_mmap_buffers_parse_like_bytes(tmp_path: Path) -> None:
+    payload = _build_payload()
+    path = tmp_path / "pacote.nst"
+    path.write_bytes(payload)
+    expected = [(r.record_type, r.idc, r.offset, r.length, r.fields, r.data_offset) for r in iter_records(payload)]
+
+    view = memoryview(payload)
+    assert [(r.record_type, r.idc, r.offset, r.length, r.fields, r.data_offset) for r in iter_records(view)] == expected
+    with map_file(path) as mapped:
+        records = list(iter_records(mapped))
+        assert [(r.record_type, r.idc, r.offset, r.length, r.fields, r.data_offset) for r in records] == expected
+        assert find_field(mapped, 2, 30) == "MARIA DA SILVA"
+        # A imagem é uma fatia do mapeamento, sem cópia.
+        with record_data(mapped, records[3]) as image:
+            assert image.obj is mapped
+            assert bytes(image) == b"\xff\xd8\x1d10.003:X\x1c\xff\xd9"
+        with record_data(mapped, records[2]) as binary:
+            # Registros binarios Tipo-4 tem 18 bytes fixos antes da imagem.
+            assert bytes(binary) == (b"\x00\x1d2.030:FALSO\x1c" * 10)[13:]
+
+
+def test_image_span_and_format_locate_image_bytes() -> None:
+    wsq = b"\xff\xa0" + b"\x00" * 8
+    type4 = _binary(1, bytes(12) + b"\x01" + wsq)
+    raw_type4 = _binary(2, bytes(13) + b"\x10" * 6)
+    cnt = US.join([b"1", b"3"]) + RS + US.join([b"4", b"1"]) + RS + US.join([b"4", b"2"]) + RS + US.join([b"14", b"3"])
+    type1 = _tagged(1, [(2, b"0300"), (3, cnt)])
+    type14 = _tagged(14, [(2, b"3"), (11, b"NONE")], image=b"\x01\x02\x03")
+    payload = type1 + type4 + raw_type4 + type14
+    records = list(iter_records(payload))
+
+    start, length = image_span(payload, records[1])
+    assert payload[start : start + length] == wsq
+    assert image_format(payload, records[1]) == "wsq"
+    # Byte de compressao zerado: imagem sem compressao.
+    assert image_format(payload, records[2]) == "raw"
+    start, length = image_span(payload, records[3])
+    assert payload[start : start + length] == b"\x01\x02\x03"
+    assert image_format(payload, records[3]) == "raw"
+    assert image_span(payload, records[0]) is None
+    assert image_format(payload, records[0]) is None
+
+
+def test_structural_error_reports_reason_codes() -> None:
+    payload = _build_payload()
+
+    assert structural_error(payload) is None
+    assert structural_error(b"") == "empty"
+    # Texto livre segue o fallback textual.
+    assert structural_error(b"1:008 TSE\n") is None
+    assert structural_error(payload[:-1]) == "truncated"
+    assert structural_error(payload[: read_type1(payload).length + 3]) == "truncated"
+    assert structural_error(payload + b"\n") == "trailing-bytes"
+    assert structural_error(payload.replace(b"4\x1f1\x1e10", b"4\x1f7\x1e10", 1)) == "idc-mismatch"
+    assert structural_error(payload.replace(b"1.003:1\x1f3", b"1.003:1\x1fX", 1)) == "bad-cnt"
+    type1_len = read_type1(payload).length
+    corrupt = bytearray(payload)
+    corrupt[type1_len - 1] = 0x20
+    assert structural_error(bytes(corrupt)) == "bad-len"
+
+
+def test_structural_error_accepts_payloads_handled_by_text_fallback() -> None:
+    # Formatos legados sem Tipo-1 estruturado: o parser extrai a origem pela varredura textual.
+    for raw in (b"1.08:TSE", b"1.0008=TSE", b"1.008: TSE\r\n1.009: 123"):
+        assert structural_error(raw) is None
+    # Tipo-1 truncado não é lido como estrutura: também segue o fallback.
+    assert structural_error(_build_payload()[:40]) is None
+
+
+def test_sample_files_pass_structural_validation() -> None:
+    for path in sorted(NISTS_DIR.rglob("*.nst")):
+        assert structural_error(path.read_bytes()) is None, path
+
+
+def test_map_file_handles_empty_files(tmp_path: Path) -> None:
+    path = tmp_path / "vazio.nst"
+    path.write_bytes(b"")
+
+    with map_file(path) as raw:
+        assert raw == b""
+
+
+def test_iter_records_detects_truncated_payload() -> None:
+    payload = _build_payload()
+
+    with pytest.raises(NistFormatError):
+        list(iter_records(payload[:-10]))
+
+
+def test_read_type1_rejects_free_text() -> None:
+    with pytest.raises(NistFormatError):
+        read_type1(b"1:008 TSE\n")
+    with pytest.raises(NistFormatError):
+        read_type1(b"1.08:TSE")
+
+
+@pytest.mark.parametrize(
+    "relative, origin",
+    [
+        ("tse/116528666.nst", "BR/TSE"),
+        ("sinpa/120080001610875010220091414.nst", "SINPA"),
+        ("sismigra/202007231646204053190120240940.nst", "SISMIGRA"),
+    ],
+)
+def test_iter_records_walks_sample_files(relative: str, origin: str) -> None:
+    raw = (NISTS_DIR / relative).read_bytes()
+
+    records = list(iter_records(raw))
+
+    assert records[0].fields[8] == origin
+    assert records[-1].offset + records[-1].length == len(raw)
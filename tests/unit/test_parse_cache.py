@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from project.application.ports.parse_cache_port import ParsedSummary
+from project.application.ports.repository_port import RecordRow
+from project.infra.parse_cache import SqliteParseCache, _encode
+
+
+def _summary(name: str = "MARIA") -> ParsedSummary:
+    return ParsedSummary(
+        origin="BR/TSE",
+        name=name,
+        sex="F",
+        birth_date="1954-06-30",
+        records=(RecordRow(0, 1, None, 0, 197), RecordRow(1, 10, 1, 197, 900, 370, 726, "jpeg")),
+    )
+
+
+def test_round_trip_and_hit_counters(tmp_path: Path) -> None:
+    cache = SqliteParseCache(tmp_path / "parse-cache.sqlite3", version=1)
+    cache.put("md5a", _summary())
+
+    assert cache.get("md5a") == _summary()
+    assert cache.get("md5b") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    reopened = SqliteParseCache(tmp_path / "parse-cache.sqlite3", version=1)
+    assert reopened.get("md5a") == _summary()
+    reopened.close()
+
+
+def test_parser_version_change_discards_entries(tmp_path: Path) -> None:
+    path = tmp_path / "parse-cache.sqlite3"
+    cache = SqliteParseCache(path, version=1)
+    cache.put("md5a", _summary())
+    cache.close()
+
+    upgraded = SqliteParseCache(path, version=2)
+
+    assert upgraded.get("md5a") is None
+    assert len(upgraded) == 0
+    upgraded.close()
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path: Path) -> None:
+    size = len(_encode(_summary("A")))
+    cache = SqliteParseCache(tmp_path / "parse-cache.sqlite3", version=1, max_bytes=3 * size)
+    cache.put("md5a", _summary("A"))
+    cache.put("md5b", _summary("B"))
+    cache.put("md5c", _summary("C"))
+    # Leitura renova "a": o menos usado passa a ser "b".
+    assert cache.get("md5a") is not None
+    cache.put("md5d", _summary("D"))
+
+    assert cache.get("md5b") is None
+    assert [cache.get(md5) is not None for md5 in ("md5a", "md5c", "md5d")] == [True, True, True]
+    assert len(cache) == 3
+    cache.close()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from multiprocessing import shared_memory
+from pathlib import Path
+
+from project.application.services.checksum_service import ChecksumService
+from project.application.services.nist_parser_service import NistParserService
+from project.infra.parse_pool import ProcessPoolAnalyzer, _analyze_shared
+
+NISTS_DIR = Path(__file__).resolve().parents[2] / "nists"
+
+
+def test_analyze_matches_in_process_results() -> None:
+    files = [NISTS_DIR / "tse" / "116528666.nst", NISTS_DIR / "sinpa" / "120080001610875010220091414.nst"]
+    parser = NistParserService()
+    checksum = ChecksumService()
+
+    with ProcessPoolAnalyzer(workers=2) as analyzer:
+        for path in files:
+            raw = path.read_bytes()
+
+            result = analyzer.analyze(raw)
+
+            expected = parser.load(raw)
+            assert result.md5_hash == checksum.md5_bytes(raw)
+            assert result.nist.raw is raw
+            assert result.nist.fields == expected.fields
+            assert result.origin_base == parser.parse(expected)[1]
+
+
+def test_analyze_handles_empty_payload() -> None:
+    with ProcessPoolAnalyzer(workers=1) as analyzer:
+        result = analyzer.analyze(b"")
+
+    assert result.md5_hash == "d41d8cd98f00b204e9800998ecf8427e"
+    assert result.origin_base.origin == "UNKNOWN"
+
+
+def test_worker_parses_shared_segment_in_place_and_releases_it() -> None:
+    raw = (NISTS_DIR / "tse" / "116528666.nst").read_bytes()
+    shm = shared_memory.SharedMemory(create=True, size=len(raw))
+    try:
+        shm.buf[: len(raw)] = raw
+
+        # Uma view retida no resultado faria `shm.close()` falhar com BufferError dentro do worker.
+        result = _analyze_shared(shm.name, len(raw))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    expected = NistParserService().load(raw)
+    assert result.md5_hash == ChecksumService().md5_bytes(raw)
+    assert result.nist.raw == b""
+    assert result.nist.fields == expected.fields
@@ -0,0 +1,415 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Iterator
+
+import psycopg
+import pytest
+
+from project.application.ports.repository_port import IngestRow, RecordRow
+from project.application.services.nist_parser_service import OriginBase, Person
+from project.config import Config
+from project.infra.db import migrations
+from project.infra.db.orm_db import PgManager
+from project.infra.db.person_repository import PgPersonRepository
+
+
+@pytest.fixture(autouse=True)
+def _reset_schema_cache() -> Iterator[None]:
+    migrations._VERIFIED.clear()
+    yield
+    migrations._VERIFIED.clear()
+
+
+def _config() -> Config:
+    return Config(
+        s3_endpoint="http://127.0.0.1:9000",
+        s3_bucket="bucket",
+        s3_access="minio",
+        s3_secret="secret",
+        s3_secure=False,
+        db_host="127.0.0.1",
+        db_port=5432,
+        db_name="mitra",
+        db_user="postgres",
+        db_password="postgres",
+        log_level="INFO",
+    )
+
+
+class DummyCopy:
+    def __init__(self, rows: list[tuple[object, ...]]) -> None:
+        self.rows = rows
+
+    def __enter__(self) -> "DummyCopy":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def write_row(self, row: tuple[object, ...]) -> None:
+        self.rows.append(row)
+
+
+class DummyCursor:
+    def __init__(self, statements: list[tuple[str, object]], manager: "DummyManager | None" = None) -> None:
+        self.statements = statements
+        self.manager = manager
+        self._copied: list[tuple[object, ...]] = []
+
+    def copy(self, sql: str) -> DummyCopy:
+        self.statements.append((sql, None))
+        if "nist_record" in sql:
+            return DummyCopy(self.manager.copied_records)
+        return DummyCopy(self._copied)
+
+    def fetchall(self) -> list[tuple[object, ...]]:
+        last_sql, params = self.statements[-1]
+        if last_sql.startswith("SELECT s3_key, md5_hash, origin"):
+            return [row for row in self.manager.rows if row[0] in params[0]]
+        return self.manager.merge(self._copied)
+
+    def __enter__(self) -> "DummyCursor":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+    def execute(self, sql: str, params: object = None) -> None:
+        self.statements.append((" ".join(sql.split()), params))
+        if " ".join(sql.split()).startswith("DELETE FROM findface.tb_nist_ingest AS t USING tmp_nist_ingest"):
+            self.manager.replace_changed(self._copied)
+        if sql.startswith("UPDATE findface.tb_nist_ingest SET processed_at"):
+            self.rowcount = sum(1 for row in self.manager.rows if row[0] in params[0])
+
+    def fetchone(self) -> tuple[object, ...] | None:
+        return None
+
+
+class DummyConnection:
+    def __init__(self, statements: list[tuple[str, object]], manager: "DummyManager | None" = None) -> None:
+        self.statements = statements
+        self.manager = manager
+
+    def cursor(self) -> DummyCursor:
+        return DummyCursor(self.statements, self.manager)
+
+
+class DummyManager:
+    def __init__(self) -> None:
+        self.statements: list[tuple[str, object]] = []
+        self.borrowed = 0
+        self.closed = False
+        self.existing: set[str] = set()
+        self.rejected_keys: set[str] = set()
+        self.rows: list[tuple[object, ...]] = []
+        self.copied_records: list[tuple[object, ...]] = []
+        self.session_setup: list[str] = []
+        # s3_key -> md5 gravado (simula a restrição uq_tb_nist_ingest_s3key).
+        self.keys: dict[str, str] = {}
+
+    def add_session_setup(self, *statements: str) -> None:
+        self.session_setup.extend(statements)
+
+    def merge(self, copied: list[tuple[object, ...]]) -> list[tuple[object, ...]]:
+        """Simula o INSERT ... SELECT DISTINCT ON (md5_hash) ... RETURNING s3_key, md5_hash, inserted."""
+        if any(key in self.rejected_keys for key, _, _ in copied):
+            raise psycopg.errors.UniqueViolation("duplicate s3_key")
+        winners: dict[str, str] = {}
+        for key, md5_hash, _ in sorted(copied, key=lambda row: (row[1], row[0])):
+            winners.setdefault(md5_hash, key)
+        returned = []
+        for md5_hash, key in winners.items():
+            if self.keys.get(key, md5_hash) != md5_hash:
+                raise psycopg.errors.UniqueViolation("duplicate key value violates uq_tb_nist_ingest_s3key")
+            # ON CONFLICT (md5_hash) mantém a chave da linha já gravada.
+            owner = next((k for k, m in self.keys.items() if m == md5_hash), key)
+            returned.append((owner, md5_hash, md5_hash not in self.existing))
+            self.existing.add(md5_hash)
+            self.keys[owner] = md5_hash
+        return returned
+
+    def replace_changed(self, copied: list[tuple[object, ...]]) -> None:
+        """Simula o DELETE ... USING tmp_nist_ingest das linhas com md5 antigo."""
+        for key, md5_hash, _ in copied:
+            if self.keys.get(key, md5_hash) != md5_hash:
+                self.existing.discard(self.keys.pop(key))
+
+    @contextmanager
+    def connection(self) -> Iterator[DummyConnection]:
+        self.borrowed += 1
+        yield DummyConnection(self.statements, self)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_upsert_borrows_connection_from_shared_manager() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+    origin_base = OriginBase(origin="TSE")
+    setattr(origin_base, "s3_key", "nist/TSE/a.nst")
+
+    repo.upsert_person_from_nist(Person(), origin_base, "abc")
+    repo.log("INFO", "ok")
+
+    # 2 conexoes para a migracao inicial (verificacao + aplicacao) e 1 por operacao.
+    assert manager.borrowed == 4
+    inserts = [params for sql, params in manager.statements if sql.startswith("INSERT INTO findface.tb_nist_ingest")]
+    assert inserts == [("nist/TSE/a.nst", "abc", "TSE")]
+    assert ("INSERT INTO findface.tb_log (level, message) VALUES (%s, %s)", ("INFO", "ok")) in manager.statements
+
+
+def test_schema_is_checked_once_then_only_dml_runs() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+
+    repo.upsert_person_from_nist(Person(), OriginBase(origin="TSE"), "a")
+    ddl_after_first = len(manager.statements)
+    repo.upsert_person_from_nist(Person(), OriginBase(origin="TSE"), "b")
+    repo.log("INFO", "ok")
+
+    later = manager.statements[ddl_after_first:]
+    assert all(sql.startswith(("INSERT INTO", "DELETE FROM findface.tb_nist_ingest")) for sql, _ in later)
+    assert sum(1 for sql, _ in manager.statements if sql.startswith("CREATE SCHEMA")) == 1
+
+
+def test_close_shuts_down_manager_pool() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+
+    repo.close()
+
+    assert manager.closed is True
+
+
+def test_upsert_many_copies_batch_and_reports_inserted_and_updated() -> None:
+    manager = DummyManager()
+    manager.existing = {"md5-b"}
+    repo = PgPersonRepository(_config(), manager=manager)
+    rows = [IngestRow("nist/A/a.nst", "md5-a", "A"), IngestRow("nist/B/b.nst", "md5-b", "B")]
+
+    result = repo.upsert_many(rows)
+
+    assert result.inserted == ["nist/A/a.nst"]
+    assert result.updated == ["nist/B/b.nst"]
+    assert result.failed == {}
+    copies = [sql for sql, _ in manager.statements if sql.startswith("COPY tmp_nist_ingest")]
+    assert len(copies) == 1
+    assert any("ON CONFLICT (md5_hash)" in sql for sql, _ in manager.statements)
+
+
+def test_upsert_many_reports_same_md5_rows_as_duplicates_not_persisted() -> None:
+    manager = DummyManager()
+    manager.keys = {"nist/A/old.nst": "md5-c"}
+    manager.existing = {"md5-c"}
+    repo = PgPersonRepository(_config(), manager=manager)
+    rows = [
+        IngestRow("nist/B/b.nst", "md5-a", "B"),
+        IngestRow("nist/A/a.nst", "md5-a", "A"),
+        IngestRow("nist/A/c.nst", "md5-c", "A"),
+    ]
+
+    result = repo.upsert_many(rows)
+
+    assert result.inserted == ["nist/A/a.nst"]
+    assert result.updated == []
+    assert result.persisted == {"nist/A/a.nst"}
+    assert result.duplicates == {"nist/B/b.nst": "nist/A/a.nst", "nist/A/c.nst": "nist/A/old.nst"}
+    assert result.failed == {}
+    merge = next(sql for sql, _ in manager.statements if sql.startswith("INSERT INTO findface.tb_nist_ingest"))
+    assert "ORDER BY md5_hash, s3_key" in merge
+    assert "RETURNING s3_key, md5_hash" in merge
+
+
+def test_upsert_many_replaces_record_index_in_same_transaction() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+    records = (
+        RecordRow(0, 1, None, 0, 120),
+        RecordRow(1, 10, 1, 120, 900, image_offset=200, image_length=819, image_format="jpeg"),
+    )
+    rows = [IngestRow("nist/A/a.nst", "md5-a", "A", records=records), IngestRow("nist/B/b.nst", "md5-b", "B")]
+
+    result = repo.upsert_many(rows)
+
+    assert result.inserted == ["nist/A/a.nst", "nist/B/b.nst"]
+    sqls = [sql for sql, _ in manager.statements]
+    copy_at = next(i for i, sql in enumerate(sqls) if sql.startswith("COPY tmp_nist_record"))
+    assert sqls[copy_at + 1].startswith("DELETE FROM findface.tb_nist_record")
+    assert sqls[copy_at + 2].startswith("INSERT INTO findface.tb_nist_record")
+    assert manager.copied_records == [
+        ("md5-a", 0, 1, None, 0, 120, None, None, None),
+        ("md5-a", 1, 10, 1, 120, 900, 200, 819, "jpeg"),
+    ]
+
+
+def test_upsert_person_replaces_record_index_in_same_transaction() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+    origin_base = OriginBase(origin="TSE")
+    setattr(origin_base, "s3_key", "nist/TSE/a.nst")
+    repo.upsert_person_from_nist(Person(), origin_base, "md5-x")
+    borrowed = manager.borrowed
+    start = len(manager.statements)
+
+    repo.upsert_person_from_nist(Person(), origin_base, "md5-a", [RecordRow(0, 4, 3, 500, 1000, 518, 982, "wsq")])
+
+    assert manager.borrowed == borrowed + 1
+    sqls = [sql for sql, _ in manager.statements[start:]]
+    assert sqls[0].startswith("DELETE FROM findface.tb_nist_ingest WHERE s3_key")
+    assert sqls[1].startswith("INSERT INTO findface.tb_nist_ingest")
+    copy_at = next(i for i, sql in enumerate(sqls) if sql.startswith("COPY tmp_nist_record"))
+    assert sqls[copy_at + 1].startswith("DELETE FROM findface.tb_nist_record")
+    assert manager.copied_records == [("md5-a", 0, 4, 3, 500, 1000, 518, 982, "wsq")]
+
+
+def test_temp_tables_are_created_per_pooled_connection_not_per_batch() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+    records = (RecordRow(0, 1, None, 0, 120),)
+
+    repo.upsert_many([IngestRow("nist/A/a.nst", "md5-a", "A", records=records)])
+    repo.upsert_many([IngestRow("nist/B/b.nst", "md5-b", "B", records=records)])
+
+    assert [sql.split()[6] for sql in manager.session_setup] == ["tmp_nist_ingest", "tmp_nist_record"]
+    assert not any(sql.startswith("CREATE TEMP") for sql, _ in manager.statements)
+
+
+def test_pg_manager_runs_session_setup_when_pool_opens_a_connection() -> None:
+    executed: list[str] = []
+
+    class Conn:
+        committed = False
+
+        def cursor(self) -> "Conn":
+            return self
+
+        def __enter__(self) -> "Conn":
+            return self
+
+        def __exit__(self, *exc: object) -> None:
+            return None
+
+        def execute(self, sql: str) -> None:
+            executed.append(sql)
+
+        def commit(self) -> None:
+            Conn.committed = True
+
+    pg = PgManager(_config())
+    pg.add_session_setup("CREATE TEMP TABLE a (x INT)")
+    pg.add_session_setup("CREATE TEMP TABLE a (x INT)", "CREATE TEMP TABLE b (x INT)")
+    pg._configure(Conn())
+
+    assert executed == ["CREATE TEMP TABLE a (x INT)", "CREATE TEMP TABLE b (x INT)"]
+    assert Conn.committed is True
+
+
+def test_reprocessing_changed_content_replaces_row_of_same_key() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+    assert repo.upsert_many([IngestRow("nist/A/a.nst", "md5-old", "A")]).inserted == ["nist/A/a.nst"]
+
+    # Mesmo objeto com conteúdo novo (ETag divergente na pré-checagem).
+    result = repo.upsert_many([IngestRow("nist/A/a.nst", "md5-new", "A", records=(RecordRow(0, 1, None, 0, 10),))])
+
+    assert result.failed == {}
+    assert result.inserted == ["nist/A/a.nst"]
+    assert manager.keys == {"nist/A/a.nst": "md5-new"}
+    assert manager.existing == {"md5-new"}
+
+
+def test_serial_upsert_replaces_stale_md5_of_same_key_first() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+    origin_base = OriginBase(origin="TSE")
+    setattr(origin_base, "s3_key", "nist/TSE/a.nst")
+
+    repo.upsert_person_from_nist(Person(), origin_base, "md5-new")
+
+    dml = [
+        (sql, params)
+        for sql, params in manager.statements
+        if sql.startswith(("DELETE FROM findface.tb_nist_ingest", "INSERT INTO findface.tb_nist_ingest"))
+    ]
+    assert dml[0] == (
+        "DELETE FROM findface.tb_nist_ingest WHERE s3_key = %s AND md5_hash <> %s",
+        ("nist/TSE/a.nst", "md5-new"),
+    )
+    assert dml[1][0].startswith("INSERT INTO findface.tb_nist_ingest")
+
+
+def test_upsert_many_isolates_failing_rows_when_batch_fails() -> None:
+    manager = DummyManager()
+    manager.rejected_keys = {"nist/B/b.nst"}
+    repo = PgPersonRepository(_config(), manager=manager)
+    rows = [IngestRow("nist/A/a.nst", "md5-a", "A"), IngestRow("nist/B/b.nst", "md5-b", "B")]
+
+    result = repo.upsert_many(rows)
+
+    assert result.inserted == ["nist/A/a.nst"]
+    assert list(result.failed) == ["nist/B/b.nst"]
+
+
+def test_upsert_many_empty_batch_does_not_touch_database() -> None:
+    manager = DummyManager()
+    repo = PgPersonRepository(_config(), manager=manager)
+
+    result = repo.upsert_many([])
+
+    assert result.persisted == set()
+    assert manager.borrowed == 0
+
+
+def test_log_goes_through_buffered_sink_when_configured() -> None:
+    manager = DummyManager()
+
+    class DummySink:
+        def __init__(self) -> None:
+            self.entries: list[tuple[str, str]] = []
+            self.closed = False
+
+        def write(self, level: str, message: str) -> None:
+            self.entries.append((level, message))
+
+        def close(self) -> None:
+            self.closed = True
+
+    sink = DummySink()
+    repo = PgPersonRepository(_config(), manager=manager, log_sink=sink)
+
+    repo.log("INFO", "buffered")
+    repo.close()
+
+    assert sink.entries == [("INFO", "buffered")]
+    assert not any(sql.startswith("INSERT INTO findface.tb_log") for sql, _ in manager.statements)
+    assert sink.closed is True and manager.closed is True
+
+
+def test_lookup_ingested_queries_page_with_any() -> None:
+    manager = DummyManager()
+    manager.rows = [("nist/A/a.nst", "md5-a", "A", True), ("nist/C/c.nst", "md5-c", "C", False)]
+    repo = PgPersonRepository(_config(), manager=manager)
+
+    known = repo.lookup_ingested(["nist/A/a.nst", "nist/B/b.nst"])
+
+    assert list(known) == ["nist/A/a.nst"]
+    assert known["nist/A/a.nst"].md5_hash == "md5-a"
+    assert known["nist/A/a.nst"].processed is True
+    sql, params = manager.statements[-1]
+    assert "s3_key = ANY(%s)" in sql
+    assert params == (["nist/A/a.nst", "nist/B/b.nst"],)
+
+
+def test_mark_processed_updates_state_column_for_listed_keys() -> None:
+    manager = DummyManager()
+    manager.rows = [("nist/A/a.nst", "md5-a", "A", False)]
+    repo = PgPersonRepository(_config(), manager=manager)
+
+    updated = repo.mark_processed(["nist/A/a.nst", "nist/B/b.nst"])
+
+    assert updated == 1
+    sql, params = manager.statements[-1]
+    assert sql == "UPDATE findface.tb_nist_ingest SET processed_at = NOW() WHERE s3_key = ANY(%s)"
+    assert params == (["nist/A/a.nst", "nist/B/b.nst"],)
@@ -1,9 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import queue
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
 
-from project.application.services.nist_parser_service import OriginBase, Person
-from project.application.usecases.process_nist_usecase import ProcessNistUseCase
+import pytest
+
+from project.application.ports.repository_port import IngestRow, RecordRow, UpsertResult
+from project.application.ports.s3_port import MoveResult, ObjectInfo
+from project.application.services.nist_parser_service import NistParserService, OriginBase, ParsedNist, Person
+from project.application.usecases.process_nist_usecase import (
+    _STOP,
+    PipelineOptions,
+    ProcessNistUseCase,
+    _ListingCursor,
+    _WorkItem,
+)
 
 
 class DummyS3:
@@ -12,17 +25,30 @@ class DummyS3:
         self.moves: list[tuple[str, str]] = []
         self.keys = ["nist/TSE/sample.nst"]
         self.read_calls: list[str] = []
+        self.move_batches: list[list[tuple[str, str]]] = []
 
-    def list_nists(self) -> list[str]:
+    def list_nists(self, start_after: str | None = None, page_size: int = 1000) -> list[str]:
         return list(self.keys)
 
     def read_bytes(self, key: str) -> bytes:
         self.read_calls.append(key)
         return self.payload
 
+    def iter_bytes(self, key: str):  # noqa: ANN201
+        payload = self.read_bytes(key)
+        yield payload[:4]
+        yield payload[4:]
+
     def move_processed(self, key: str, dest: str) -> None:
         self.moves.append((key, dest))
 
+    def move_many(self, moves):  # noqa: ANN001, ANN201
+        batch = list(moves)
+        self.move_batches.append(batch)
+        for key, dest in batch:
+            self.move_processed(key, dest)
+        return MoveResult(moved=[key for key, _ in batch], destinations=dict(batch))
+
 
 class DummyChecksum:
     def __init__(self) -> None:
@@ -32,25 +58,69 @@ class DummyChecksum:
         self.calls.append(data)
         return f"md5-{len(data)}"
 
+    def new_md5(self) -> "DummyDigest":
+        return DummyDigest(self)
+
+
+class DummyDigest:
+    def __init__(self, checksum: DummyChecksum) -> None:
+        self.checksum = checksum
+        self.chunks: list[bytes] = []
+
+    def update(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+
+    def finalize(self) -> str:
+        return self.checksum.md5_bytes(b"".join(self.chunks))
+
 
 @dataclass
 class DummyRepository:
     upsert_calls: list[tuple[object, object, str]]
     log_calls: list[tuple[str, str]]
+    batches: list[list[IngestRow]] = field(default_factory=list)
+    saved_records: dict[str, list[RecordRow]] = field(default_factory=dict)
 
-    def upsert_person_from_nist(self, person: object, origin_base: object, md5_hash: str) -> None:
+    def upsert_person_from_nist(
+        self, person: object, origin_base: object, md5_hash: str, records: tuple[RecordRow, ...] = ()
+    ) -> None:
         self.upsert_calls.append((person, origin_base, md5_hash))
+        if records:
+            self.saved_records[md5_hash] = list(records)
+
+    def upsert_many(self, rows: list[IngestRow]) -> UpsertResult:
+        self.batches.append(list(rows))
+        result = UpsertResult()
+        for row in rows:
+            if row.s3_key.endswith("/5.nst"):
+                result.failed[row.s3_key] = "duplicate s3_key"
+            else:
+                result.inserted.append(row.s3_key)
+        return result
 
     def log(self, level: str, message: str) -> None:
         self.log_calls.append((level, message))
 
 
 class DummyParser:
-    def parse(self, raw: bytes) -> tuple[Person, OriginBase]:
+    def __init__(self) -> None:
+        self.load_calls = 0
+
+    def load(self, raw: bytes) -> ParsedNist:
+        self.load_calls += 1
+        return ParsedNist(raw=raw)
+
+    def load_header(self, raw: bytes) -> ParsedNist:
+        return ParsedNist(raw=raw)
+
+    def validate(self, raw: bytes) -> str | None:  # noqa: ARG002
+        return None
+
+    def parse(self, nist: ParsedNist) -> tuple[Person, OriginBase]:
         origin = OriginBase(origin="TSE")
         return Person(), origin
 
-    def destination_key_for_processed(self, key: str, raw: bytes) -> str:  # noqa: ARG002
+    def destination_key_for_processed(self, key: str, nist: ParsedNist) -> str:  # noqa: ARG002
         return f"nist-lidos/TSE/{key.split('/')[-1]}"
 
 
@@ -67,6 +137,7 @@ def test_execute_processes_each_key_and_moves_to_destination() -> None:
     assert processed == 1
     assert s3.read_calls == ["nist/TSE/sample.nst"]
     assert checksum.calls == [payload]
+    assert parser.load_calls == 1
     assert len(repository.upsert_calls) == 1
     person, origin_base, md5_hash = repository.upsert_calls[0]
     assert isinstance(person, Person)
@@ -77,6 +148,103 @@ def test_execute_processes_each_key_and_moves_to_destination() -> None:
     assert ("INFO", "Processed nist/TSE/sample.nst -> nist-lidos/TSE/sample.nst") in repository.log_calls
 
 
+def test_execute_persists_record_index_for_structured_payloads() -> None:
+    payload = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+    usecase = ProcessNistUseCase(
+        s3=DummyS3(payload=payload), repository=repository, parser=NistParserService(), checksum=DummyChecksum()
+    )
+
+    usecase.execute()
+
+    records = repository.saved_records[f"md5-{len(payload)}"]
+    assert [row.record_type for row in records][:3] == [1, 2, 10]
+    assert records[2].image_format == "jpeg"
+
+    # No modo em lote o indice segue junto com a linha de tb_nist_ingest.
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+    usecase = ProcessNistUseCase(
+        s3=DummyS3(payload=payload), repository=repository, parser=NistParserService(), checksum=DummyChecksum()
+    )
+    usecase.execute_pipelined(PipelineOptions(batch_size=4, flush_interval=0.1))
+
+    assert repository.saved_records == {}
+    assert list(repository.batches[0][0].records) == records
+
+
+class DictParseCache:
+    def __init__(self) -> None:
+        self.entries: dict[str, object] = {}
+
+    def get(self, md5_hash: str):  # noqa: ANN201
+        return self.entries.get(md5_hash)
+
+    def put(self, md5_hash: str, summary: object) -> None:
+        self.entries[md5_hash] = summary
+
+
+def test_parse_cache_skips_parsing_known_payloads() -> None:
+    payload = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()
+    cache = DictParseCache()
+
+    class CountingParser(NistParserService):
+        loads = 0
+
+        def load(self, raw: bytes) -> ParsedNist:
+            CountingParser.loads += 1
+            return super().load(raw)
+
+    results = []
+    for _ in range(2):
+        repository = DummyRepository(upsert_calls=[], log_calls=[])
+        s3 = DummyS3(payload=payload)
+        usecase = ProcessNistUseCase(
+            s3=s3, repository=repository, parser=CountingParser(), checksum=DummyChecksum(), parse_cache=cache
+        )
+        usecase.execute()
+        results.append((repository.upsert_calls[0][0], repository.saved_records, s3.moves, usecase.stats.parse_cache_hits))
+
+    assert CountingParser.loads == 1
+    assert list(cache.entries) == [f"md5-{len(payload)}"]
+    assert results[1][:3] == results[0][:3]
+    assert results[1][0].name == "MARIA LUCIA SANTOS"
+    assert (results[0][3], results[1][3]) == (0, 1)
+
+
+def test_structurally_invalid_payload_is_quarantined_before_any_db_work() -> None:
+    payload = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()
+    for run in ("serial", "pipelined"):
+        s3 = DummyS3(payload=payload[:-100])
+        repository = DummyRepository(upsert_calls=[], log_calls=[])
+        usecase = ProcessNistUseCase(s3=s3, repository=repository, parser=NistParserService(), checksum=DummyChecksum())
+
+        if run == "serial":
+            processed = usecase.execute()
+        else:
+            processed = usecase.execute_pipelined(PipelineOptions(batch_size=4, flush_interval=0.1))
+
+        assert processed == 0
+        assert s3.moves == [("nist/TSE/sample.nst", "nist-quarentena/truncated/TSE/sample.nst")]
+        assert repository.upsert_calls == [] and repository.batches == []
+        assert usecase.stats.quarantined == 1
+        assert repository.log_calls == [
+            ("WARNING", "Quarantined nist/TSE/sample.nst (truncated) -> nist-quarentena/truncated/TSE/sample.nst")
+        ]
+
+
+def test_quarantine_can_be_disabled() -> None:
+    payload = (Path(__file__).resolve().parents[2] / "nists" / "tse" / "116528666.nst").read_bytes()[:-100]
+    s3 = DummyS3(payload=payload)
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+    usecase = ProcessNistUseCase(
+        s3=s3, repository=repository, parser=NistParserService(), checksum=DummyChecksum(), quarantine=False
+    )
+
+    assert usecase.execute() == 1
+    assert usecase.stats.quarantined == 0
+    assert s3.moves[0][1].startswith("nist-lidos/")
+
+
 def test_execute_logs_errors_and_continues() -> None:
     payload = b"1:008 TSE\n"
     checksum = DummyChecksum()
@@ -84,7 +252,7 @@ def test_execute_logs_errors_and_continues() -> None:
     parser = DummyParser()
 
     class FlakyS3(DummyS3):
-        def list_nists(self) -> list[str]:
+        def list_nists(self, start_after: str | None = None, page_size: int = 1000) -> list[str]:
             return ["nist/TSE/fail.nst", "nist/TSE/ok.nst"]
 
         def read_bytes(self, key: str) -> bytes:
@@ -118,7 +286,7 @@ def test_execute_handles_immutable_origin_base() -> None:
             raise AttributeError("locked")
 
     class ImmutableParser(DummyParser):
-        def parse(self, raw: bytes) -> tuple[Person, OriginBase]:
+        def parse(self, nist: ParsedNist) -> tuple[Person, OriginBase]:
             return Person(), ImmutableOriginBase(origin="TSE")
 
     parser = ImmutableParser()
@@ -128,3 +296,483 @@ def test_execute_handles_immutable_origin_base() -> None:
 
     assert processed == 1
     assert any("Processed" in message for _, message in repository.log_calls)
+
+
+def test_execute_pipelined_processes_all_keys_and_isolates_failures() -> None:
+    payload = b"1:008 TSE\n"
+    checksum = DummyChecksum()
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+    parser = DummyParser()
+    keys = [f"nist/TSE/{i}.nst" for i in range(20)]
+
+    class ManyS3(DummyS3):
+        def list_nists(self, start_after: str | None = None, page_size: int = 1000) -> list[str]:
+            return keys
+
+        def read_bytes(self, key: str) -> bytes:
+            if key.endswith("/3.nst"):
+                raise RuntimeError("boom")
+            return super().read_bytes(key)
+
+        def move_processed(self, key: str, dest: str) -> None:
+            if key.endswith("/7.nst"):
+                raise RuntimeError("move failed")
+            super().move_processed(key, dest)
+
+    s3 = ManyS3(payload=payload)
+    usecase = ProcessNistUseCase(s3=s3, repository=repository, parser=parser, checksum=checksum)
+
+    processed = usecase.execute_pipelined(
+        PipelineOptions(read_workers=3, parse_workers=2, persist_workers=2, move_workers=3, queue_size=2)
+    )
+
+    assert processed == 18
+    assert len(repository.upsert_calls) == 19
+    assert sorted(src for src, _ in s3.moves) == sorted(k for k in keys if not k.endswith(("/3.nst", "/7.nst")))
+    errors = [message for level, message in repository.log_calls if level == "ERROR"]
+    assert sorted(errors) == ["Failed nist/TSE/3.nst: boom", "Failed nist/TSE/7.nst: move failed"]
+
+
+def test_execute_pipelined_with_uniform_options_matches_serial_result() -> None:
+    payload = b"1:008 TSE\n"
+    s3 = DummyS3(payload=payload)
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+    usecase = ProcessNistUseCase(s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum())
+
+    processed = usecase.execute_pipelined(PipelineOptions.uniform(2, queue_size=1))
+
+    assert processed == 1
+    assert s3.moves == [("nist/TSE/sample.nst", "nist-lidos/TSE/sample.nst")]
+    assert getattr(repository.upsert_calls[0][1], "s3_key") == "nist/TSE/sample.nst"
+
+
+def test_execute_uses_analyzer_when_configured() -> None:
+    payload = b"1:008 TSE\n"
+    s3 = DummyS3(payload=payload)
+    checksum = DummyChecksum()
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+
+    class DummyAnalyzer:
+        def __init__(self) -> None:
+            self.calls: list[bytes] = []
+
+        def analyze(self, raw: bytes):  # noqa: ANN201
+            self.calls.append(raw)
+
+            class Result:
+                md5_hash = "md5-from-pool"
+                nist = ParsedNist(raw=raw)
+                person = Person()
+                origin_base = OriginBase(origin="TSE")
+
+            return Result()
+
+    analyzer = DummyAnalyzer()
+    usecase = ProcessNistUseCase(
+        s3=s3, repository=repository, parser=DummyParser(), checksum=checksum, analyzer=analyzer
+    )
+
+    processed = usecase.execute_pipelined(PipelineOptions.uniform(2))
+
+    assert processed == 1
+    assert analyzer.calls == [payload]
+    assert checksum.calls == []
+    assert repository.upsert_calls[0][2] == "md5-from-pool"
+
+
+def test_execute_pipelined_batches_upserts_and_moves_only_persisted_keys() -> None:
+    payload = b"1:008 TSE\n"
+    keys = [f"nist/TSE/{i}.nst" for i in range(10)]
+
+    class ManyS3(DummyS3):
+        def list_nists(self, start_after: str | None = None, page_size: int = 1000) -> list[str]:
+            return keys
+
+    s3 = ManyS3(payload=payload)
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+    usecase = ProcessNistUseCase(s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum())
+
+    processed = usecase.execute_pipelined(
+        PipelineOptions(read_workers=2, parse_workers=1, persist_workers=1, move_workers=2, batch_size=4, flush_interval=5.0)
+    )
+
+    assert processed == 9
+    assert repository.upsert_calls == []
+    assert sum(len(batch) for batch in repository.batches) == 10
+    assert all(len(batch) <= 4 for batch in repository.batches)
+    assert "nist/TSE/5.nst" not in {src for src, _ in s3.moves}
+    assert ("ERROR", "Failed nist/TSE/5.nst: duplicate s3_key") in repository.log_calls
+    # A movimentacao tambem e feita em lotes (move_many), com o destino registrado no log.
+    assert sum(len(batch) for batch in s3.move_batches) == 9
+    assert all(len(batch) <= 4 for batch in s3.move_batches)
+    assert ("INFO", "Processed nist/TSE/0.nst -> nist-lidos/TSE/0.nst") in repository.log_calls
+
+
+def test_pipelined_batch_moves_duplicate_content_without_counting_it() -> None:
+    keys = [f"nist/TSE/{i}.nst" for i in range(4)]
+
+    class ManyS3(DummyS3):
+        def list_nists(self, start_after: str | None = None, page_size: int = 1000) -> list[str]:
+            return keys
+
+    class DuplicateRepository(DummyRepository):
+        def upsert_many(self, rows: list[IngestRow]) -> UpsertResult:
+            self.batches.append(list(rows))
+            result = UpsertResult()
+            for row in rows:
+                if row.s3_key.endswith("/3.nst"):
+                    result.duplicates[row.s3_key] = "nist/TSE/2.nst"
+                else:
+                    result.inserted.append(row.s3_key)
+            return result
+
+    s3 = ManyS3(payload=b"1:008 TSE\n")
+    repository = DuplicateRepository(upsert_calls=[], log_calls=[])
+    usecase = ProcessNistUseCase(s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum())
+
+    processed = usecase.execute_pipelined(PipelineOptions(batch_size=4, flush_interval=5.0))
+
+    assert processed == 3
+    assert "nist/TSE/3.nst" in {src for src, _ in s3.moves}
+    assert ("INFO", "Duplicate content nist/TSE/3.nst (md5 kept by nist/TSE/2.nst)") in repository.log_calls
+    assert ("INFO", "Moved already ingested nist/TSE/3.nst -> nist-lidos/TSE/3.nst") in repository.log_calls
+
+
+def test_batch_persist_worker_flushes_partial_batch_after_interval() -> None:
+    repository = DummyRepository(upsert_calls=[], log_calls=[])
+    usecase = ProcessNistUseCase(
+        s3=DummyS3(payload=b""), repository=repository, parser=DummyParser(), checksum=DummyChecksum()
+    )
+    inbox: queue.Queue = queue.Queue()
+    outbox: queue.Queue = queue.Queue()
+    worker = threading.Thread(
+        target=usecase._batch_worker,
+        args=(
+            inbox,
+            PipelineOptions(batch_size=100, flush_interval=0.05),
+            lambda items: usecase._flush_batch(items, outbox),
+        ),
+    )
+    worker.start()
+
+    inbox.put(_WorkItem(key="nist/TSE/a.nst", md5_hash="m", origin_base=OriginBase(origin="TSE")))
+    flushed = outbox.get(timeout=2)
+
+    inbox.put(_STOP)
+    worker.join(timeout=2)
+    assert flushed.key == "nist/TSE/a.nst"
+    assert [[row.s3_key for row in batch] for batch in repository.batches] == [["nist/TSE/a.nst"]]
+
+
+class PrecheckS3(DummyS3):
+    def __init__(self, payload: bytes, objects: list[ObjectInfo]) -> None:
+        super().__init__(payload=payload)
+        self.objects = objects
+        self.header_reads: list[str] = []
+
+    def list_nist_objects(self, start_after: str | None = None, page_size: int = 1000) -> list[ObjectInfo]:
+        return list(self.objects)
+
+    def read_header(self, key: str) -> bytes:
+        self.header_reads.append(key)
+        return self.payload
+
+
+class PrecheckRepository(DummyRepository):
+    def __init__(self, known: dict[str, IngestRow]) -> None:
+        super().__init__(upsert_calls=[], log_calls=[])
+        self.known = known
+        self.lookups: list[list[str]] = []
+
+    def lookup_ingested(self, keys: list[str]) -> dict[str, IngestRow]:
+        self.lookups.append(list(keys))
+        return {k: v for k, v in self.known.items() if k in keys}
+
+
+def _precheck_fixture() -> tuple[PrecheckS3, PrecheckRepository]:
+    objects = [
+        ObjectInfo("nist/TSE/new.nst", etag="aaa"),
+        ObjectInfo("nist/TSE/known.nst", etag="bbb"),
+        ObjectInfo("nist/TSE/changed.nst", etag="ccc"),
+        ObjectInfo("nist/TSE/multipart.nst", etag="ddd-2"),
+    ]
+    known = {
+        "nist/TSE/known.nst": IngestRow("nist/TSE/known.nst", "bbb", "TSE"),
+        "nist/TSE/changed.nst": IngestRow("nist/TSE/changed.nst", "old", "TSE"),
+        "nist/TSE/multipart.nst": IngestRow("nist/TSE/multipart.nst", "eee", "TSE"),
+    }
+    return PrecheckS3(payload=b"1:008 TSE\n", objects=objects), PrecheckRepository(known)
+
+
+def test_precheck_moves_known_objects_without_downloading() -> None:
+    s3, repository = _precheck_fixture()
+    usecase = ProcessNistUseCase(
+        s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum(), precheck=True, precheck_page_size=3
+    )
+
+    processed = usecase.execute()
+
+    assert processed == 2
+    assert sorted(s3.read_calls) == ["nist/TSE/changed.nst", "nist/TSE/new.nst"]
+    assert sorted(s3.header_reads) == ["nist/TSE/known.nst", "nist/TSE/multipart.nst"]
+    assert len(s3.moves) == 4
+    assert [len(page) for page in repository.lookups] == [3, 1]
+    assert usecase.stats.downloads_avoided == 2
+    assert usecase.stats.known_moved == 2
+    assert usecase.stats.etag_mismatch == 1
+
+
+def test_pipelined_batch_move_routes_known_objects_by_header() -> None:
+    s3, repository = _precheck_fixture()
+    usecase = ProcessNistUseCase(
+        s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum(), precheck=True
+    )
+
+    processed = usecase.execute_pipelined(PipelineOptions(move_workers=1, batch_size=10, flush_interval=0.05))
+
+    assert processed == 2
+    assert sorted(src for batch in s3.move_batches for src, _ in batch) == [
+        "nist/TSE/changed.nst",
+        "nist/TSE/known.nst",
+        "nist/TSE/multipart.nst",
+        "nist/TSE/new.nst",
+    ]
+    assert sorted(s3.header_reads) == ["nist/TSE/known.nst", "nist/TSE/multipart.nst"]
+    assert usecase.stats.known_moved == 2
+    assert ("INFO", "Moved already ingested nist/TSE/known.nst -> nist-lidos/TSE/known.nst") in repository.log_calls
+
+
+def test_precheck_skip_action_leaves_known_objects_in_place() -> None:
+    s3, repository = _precheck_fixture()
+    usecase = ProcessNistUseCase(
+        s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum(), precheck=True, known_action="skip"
+    )
+
+    processed = usecase.execute_pipelined(PipelineOptions.uniform(2))
+
+    assert processed == 2
+    assert sorted(src for src, _ in s3.moves) == ["nist/TSE/changed.nst", "nist/TSE/new.nst"]
+    assert s3.header_reads == []
+    assert usecase.stats.known_skipped == 2
+
+
+def test_precheck_pipelined_routes_known_objects_to_move_stage() -> None:
+    s3, repository = _precheck_fixture()
+    usecase = ProcessNistUseCase(
+        s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum(), precheck=True, verify_etag=False
+    )
+
+    processed = usecase.execute_pipelined(PipelineOptions.uniform(2))
+
+    assert processed == 1
+    assert s3.read_calls == ["nist/TSE/new.nst"]
+    assert usecase.stats.known_moved == 3
+    assert len(s3.moves) == 4
+
+
+class MemoryCheckpoint:
+    def __init__(self, start_after: str | None = None) -> None:
+        self.value = start_after
+        self.saves: list[str | None] = []
+
+    def load(self, name: str) -> str | None:
+        return self.value
+
+    def save(self, name: str, start_after: str | None) -> None:
+        self.saves.append(start_after)
+        self.value = start_after
+
+
+class SortedS3(DummyS3):
+    def __init__(self, keys: list[str]) -> None:
+        super().__init__(payload=b"1:008 TSE\n")
+        self.keys = keys
+        self.start_after_calls: list[str | None] = []
+
+    def list_nists(self, start_after: str | None = None, page_size: int = 1000):  # noqa: ANN201
+        self.start_after_calls.append(start_after)
+        return (key for key in self.keys if start_after is None or key > start_after)
+
+
+def test_checkpoint_resumes_after_interruption_and_clears_when_listing_completes() -> None:
+    keys = [f"nist/TSE/{i}.nst" for i in range(6)]
+
+    class InterruptedS3(SortedS3):
+        def read_bytes(self, key: str) -> bytes:
+            if key.endswith("/4.nst"):
+                raise KeyboardInterrupt
+            return super().read_bytes(key)
+
+    checkpoint = MemoryCheckpoint()
+    s3 = InterruptedS3(keys)
+    usecase = ProcessNistUseCase(
+        s3=s3,
+        repository=DummyRepository(upsert_calls=[], log_calls=[]),
+        parser=DummyParser(),
+        checksum=DummyChecksum(),
+        checkpoint=checkpoint,
+        checkpoint_every=2,
+    )
+
+    try:
+        usecase.execute()
+    except KeyboardInterrupt:
+        pass
+
+    assert checkpoint.saves == ["nist/TSE/1.nst", "nist/TSE/3.nst", "nist/TSE/3.nst"]
+
+    resumed = SortedS3(keys)
+    usecase.s3 = resumed
+    processed = usecase.execute()
+
+    assert resumed.start_after_calls == ["nist/TSE/3.nst"]
+    assert processed == 2
+    assert checkpoint.value is None
+
+
+def test_listing_cursor_only_advances_over_contiguous_completed_keys() -> None:
+    cursor = _ListingCursor()
+    seqs = [cursor.register(f"k{i}") for i in range(4)]
+
+    cursor.complete(seqs[2])
+    cursor.complete(seqs[1])
+    assert cursor.value is None
+
+    cursor.complete(seqs[0])
+    assert cursor.value == "k2"
+    assert cursor.unsaved == 3
+
+
+def test_pipelined_checkpoint_is_cleared_after_full_listing() -> None:
+    keys = [f"nist/TSE/{i}.nst" for i in range(10)]
+    checkpoint = MemoryCheckpoint(start_after="nist/TSE/1.nst")
+    s3 = SortedS3(keys)
+    usecase = ProcessNistUseCase(
+        s3=s3,
+        repository=DummyRepository(upsert_calls=[], log_calls=[]),
+        parser=DummyParser(),
+        checksum=DummyChecksum(),
+        checkpoint=checkpoint,
+        checkpoint_every=3,
+    )
+
+    processed = usecase.execute_pipelined(PipelineOptions.uniform(3, queue_size=2))
+
+    assert processed == 8
+    assert s3.start_after_calls == ["nist/TSE/1.nst"]
+    assert checkpoint.saves[-1] is None
+    assert checkpoint.saves[:-1] == sorted(checkpoint.saves[:-1])
+
+
+class MarkingS3(PrecheckS3):
+    def __init__(self, payload: bytes, objects: list[ObjectInfo]) -> None:
+        super().__init__(payload=payload, objects=objects)
+        self.marked: list[str] = []
+        self.list_calls: list[str | None] = []
+
+    def list_nist_objects(self, start_after: str | None = None, page_size: int = 1000) -> list[ObjectInfo]:
+        self.list_calls.append(start_after)
+        return [info for info in self.objects if start_after is None or info.key > start_after]
+
+    def mark_processed(self, key: str) -> None:
+        self.marked.append(key)
+
+
+class MarkingRepository(PrecheckRepository):
+    def __init__(self, known: dict[str, IngestRow]) -> None:
+        super().__init__(known)
+        self.marked: list[str] = []
+
+    def upsert_person_from_nist(
+        self, person: object, origin_base: object, md5_hash: str, records: tuple[RecordRow, ...] = ()
+    ) -> None:
+        super().upsert_person_from_nist(person, origin_base, md5_hash, records)
+        key = getattr(origin_base, "s3_key")
+        if not key.endswith("dup.nst"):
+            self.known[key] = IngestRow(key, md5_hash, "TSE")
+
+    def mark_processed(self, keys: list[str]) -> int:
+        found = [key for key in keys if key in self.known]
+        self.marked.extend(found)
+        return len(found)
+
+
+def test_mark_strategy_keeps_objects_in_place_and_skips_processed_rows() -> None:
+    objects = [
+        ObjectInfo("nist/TSE/new.nst"),
+        ObjectInfo("nist/TSE/done.nst"),
+        ObjectInfo("nist/TSE/known.nst"),
+        ObjectInfo("nist/TSE/dup.nst"),
+    ]
+    known = {
+        "nist/TSE/done.nst": IngestRow("nist/TSE/done.nst", "aaa", "TSE", processed=True),
+        "nist/TSE/known.nst": IngestRow("nist/TSE/known.nst", "bbb", "TSE"),
+    }
+    s3 = MarkingS3(payload=b"1:008 TSE\n", objects=objects)
+    repository = MarkingRepository(known)
+    usecase = ProcessNistUseCase(
+        s3=s3, repository=repository, parser=DummyParser(), checksum=DummyChecksum(), processed_strategy="mark"
+    )
+
+    processed = usecase.execute()
+
+    assert processed == 2
+    assert sorted(repository.marked) == ["nist/TSE/known.nst", "nist/TSE/new.nst"]
+    assert sorted(s3.marked) == ["nist/TSE/dup.nst", "nist/TSE/known.nst", "nist/TSE/new.nst"]
+    # Conteudo duplicado nao tem linha propria: cai para a movimentacao.
+    assert s3.moves == [("nist/TSE/dup.nst", "nist-lidos/TSE/dup.nst")]
+    assert s3.header_reads == []
+    assert usecase.stats.already_processed == 1
+
+
+def test_unknown_processed_strategy_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        ProcessNistUseCase(
+            s3=DummyS3(payload=b""),
+            repository=DummyRepository(upsert_calls=[], log_calls=[]),
+            parser=DummyParser(),
+            checksum=DummyChecksum(),
+            processed_strategy="tag",
+        )
+
+
+def test_mark_watermark_keeps_last_listed_key_and_lists_only_after_it() -> None:
+    objects = [ObjectInfo("nist/TSE/a.nst"), ObjectInfo("nist/TSE/b.nst"), ObjectInfo("nist/TSE/c.nst")]
+    known = {"nist/TSE/c.nst": IngestRow("nist/TSE/c.nst", "ccc", "TSE", processed=True)}
+    checkpoint = MemoryCheckpoint()
+    s3 = MarkingS3(payload=b"1:008 TSE\n", objects=objects)
+    usecase = ProcessNistUseCase(
+        s3=s3,
+        repository=MarkingRepository(known),
+        parser=DummyParser(),
+        checksum=DummyChecksum(),
+        processed_strategy="mark",
+        checkpoint=checkpoint,
+        mark_watermark=True,
+    )
+
+    assert usecase.execute() == 2
+    # A varredura completa grava a ultima chave listada, inclusive a ja marcada.
+    assert checkpoint.value == "nist/TSE/c.nst"
+
+    s3.objects.append(ObjectInfo("nist/TSE/d.nst"))
+    s3.list_calls.clear()
+    assert usecase.execute() == 1
+    assert s3.list_calls == ["nist/TSE/c.nst"]
+    assert checkpoint.value == "nist/TSE/d.nst"
+
+
+def test_mark_strategy_without_watermark_clears_cursor_after_full_listing() -> None:
+    checkpoint = MemoryCheckpoint()
+    usecase = ProcessNistUseCase(
+        s3=MarkingS3(payload=b"1:008 TSE\n", objects=[ObjectInfo("nist/TSE/a.nst")]),
+        repository=MarkingRepository({}),
+        parser=DummyParser(),
+        checksum=DummyChecksum(),
+        processed_strategy="mark",
+        checkpoint=checkpoint,
+    )
+
+    usecase.execute()
+
+    assert checkpoint.value is None
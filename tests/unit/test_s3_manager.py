@@ -1,12 +1,17 @@
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
 from typing import Iterable
 
+import pytest
+from minio.deleteobjects import DeleteError
 from minio.error import S3Error
 from urllib3.response import HTTPResponse
 
-from project.infra.s3.s3_manager import MinioS3Adapter, _field_1_008, _tag_matches
+from project.infra.s3.s3_manager import MinioS3Adapter, UploadChecksumError, _field_1_008, _tag_matches
 
 
 def test_campo_1_008_extracts_value() -> None:
@@ -25,6 +30,12 @@ def test_campo_1_008_returns_none_when_missing() -> None:
     assert _field_1_008(b"") is None
 
 
+def test_campo_1_008_reads_structured_header_only() -> None:
+    header = b"1.001:29\x1d1.003:1\x1f0\x1d1.008:TSE\x1c"
+    # Bytes apos o Tipo-1 nao devem ser decodificados nem afetar o resultado.
+    assert _field_1_008(header + b"\x1d1.008:FALSO" + b"\xff" * 64) == "TSE"
+
+
 def test_tag_matches_handles_edge_cases() -> None:
     assert _tag_matches("sem-digitos", 1, 8) is False
     assert _tag_matches("2:008", 1, 8) is False
@@ -34,6 +45,8 @@ def test_tag_matches_handles_edge_cases() -> None:
 @dataclass
 class DummyObject:
     object_name: str
+    etag: str | None = None
+    size: int | None = None
 
 
 class DummyResponse:
@@ -45,6 +58,10 @@ class DummyResponse:
     def read(self) -> bytes:
         return self._data
 
+    def stream(self, amt: int):  # noqa: ANN201
+        for start in range(0, len(self._data), amt):
+            yield self._data[start : start + amt]
+
     def close(self) -> None:
         self.closed = True
 
@@ -60,34 +77,101 @@ class DummyClient:
         self.uploads: list[tuple[str, bytes]] = []
         self.stat_calls: list[str] = []
         self.list_calls: list[tuple[str, bool]] = []
+        self.start_after_calls: list[str | None] = []
+        self.range_calls: list[tuple[int, int]] = []
+        self.delete_batches: list[list[str]] = []
+        self.failing_deletes: set[str] = set()
+        self.copy_failures: dict[str, tuple[str, int]] = {}
+        self.tagged: list[tuple[str, dict[str, str]]] = []
+        self.file_uploads: list[tuple[str, bytes, int, int]] = []
+        self.etag_override: str | None = None
+        self.put_headers: dict[str, str] = {}
         self._stat_should_raise = False
         self._response_payload = b""
         self.last_response: DummyResponse | None = None
 
-    def list_objects(self, bucket: str, prefix: str, recursive: bool) -> Iterable[DummyObject]:
+    def list_objects(
+        self, bucket: str, prefix: str, recursive: bool, start_after: str | None = None
+    ) -> Iterable[DummyObject]:
         assert bucket == "bucket"
         self.list_calls.append((prefix, recursive))
-        filtered = [obj for obj in self.objects if obj.object_name.startswith(prefix)]
-        return list(filtered)
-
-    def get_object(self, bucket: str, key: str) -> DummyResponse:
+        self.start_after_calls.append(start_after)
+        for obj in self.objects:
+            if obj.object_name.startswith(prefix) and (start_after is None or obj.object_name > start_after):
+                yield obj
+
+    def _list_objects(  # noqa: ANN202
+        self, bucket: str, prefix: str, start_after: str | None, max_keys: int, encoding_type: str
+    ):
+        """Simula a paginação do ListObjectsV2: uma requisição de até `max_keys` chaves por página."""
+        assert bucket == "bucket" and encoding_type == "url"
+        self.list_calls.append((prefix, True))
+        matching = [obj for obj in self.objects if obj.object_name.startswith(prefix)]
+        cursor = start_after
+        while True:
+            self.start_after_calls.append(cursor)
+            page = [obj for obj in matching if cursor is None or obj.object_name > cursor][:max_keys]
+            yield from page
+            if len(page) < max_keys or page[-1] is matching[-1]:
+                return
+            cursor = page[-1].object_name
+
+    def get_object(self, bucket: str, key: str, offset: int = 0, length: int = 0) -> DummyResponse:
         assert bucket == "bucket"
-        response = DummyResponse(self._response_payload)
+        self.range_calls.append((offset, length))
+        payload = self._response_payload[offset:]
+        if length:
+            payload = payload[:length]
+        response = DummyResponse(payload)
         self.last_response = response
         return response
 
     def copy_object(self, bucket: str, dest_key: str, source) -> None:  # noqa: ANN001, D401
         assert bucket == "bucket"
+        code, remaining = self.copy_failures.get(source.object_name, ("", 0))
+        if remaining:
+            self.copy_failures[source.object_name] = (code, remaining - 1)
+            raise S3Error(
+                code=code, message="copy", resource=None, request_id=None, host_id=None, response=HTTPResponse()
+            )
         self.copies.append((dest_key, source.object_name))
 
     def remove_object(self, bucket: str, key: str) -> None:  # noqa: ANN001, D401
         assert bucket == "bucket"
         self.removed.append(key)
 
-    def put_object(self, bucket: str, key: str, data: bytes, length: int) -> None:  # noqa: ANN001, D401
+    def remove_objects(self, bucket: str, delete_list) -> Iterable[DeleteError]:  # noqa: ANN001
+        assert bucket == "bucket"
+        keys = [item.name for item in delete_list]
+        self.delete_batches.append(keys)
+        for key in keys:
+            if key in self.failing_deletes:
+                yield DeleteError("AccessDenied", "denied", key, None)
+            else:
+                self.removed.append(key)
+
+    def set_object_tags(self, bucket: str, key: str, tags) -> None:  # noqa: ANN001
         assert bucket == "bucket"
-        assert length == len(data)
-        self.uploads.append((key, data))
+        self.tagged.append((key, dict(tags)))
+
+    def put_object(self, bucket: str, key: str, data, length: int, part_size: int = 0):  # noqa: ANN001, ANN201
+        assert bucket == "bucket"
+        if isinstance(data, bytes):
+            assert length == len(data)
+            self.uploads.append((key, data))
+            return None
+        # Fluxos são lidos em partes, como faz o cliente MinIO.
+        parts = []
+        while True:
+            chunk = data.read(part_size)
+            if not chunk:
+                break
+            parts.append(chunk)
+        body = b"".join(parts)
+        assert length in (-1, len(body))
+        self.file_uploads.append((key, body, length, part_size))
+        etag = self.etag_override or hashlib.md5(body).hexdigest()
+        return SimpleNamespace(etag=etag, http_headers=self.put_headers)
 
     def stat_object(self, bucket: str, key: str):  # noqa: ANN001, D401
         assert bucket == "bucket"
@@ -112,7 +196,49 @@ def test_list_nists_filters_extensions() -> None:
     ]
     adapter = MinioS3Adapter(client=client, bucket="bucket")
 
-    assert adapter.list_nists() == ["nist/A/sample.nst"]
+    assert list(adapter.list_nists()) == ["nist/A/sample.nst"]
+
+
+def test_list_nists_is_lazy_and_pages_with_start_after() -> None:
+    client = DummyClient()
+    client.objects = [DummyObject(f"nist/A/{i:02d}.nst") for i in range(5)] + [DummyObject("nist/A/99.txt")]
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    keys = adapter.list_nists(page_size=2)
+    assert client.list_calls == []
+    assert next(keys) == "nist/A/00.nst"
+
+    assert list(keys) == [f"nist/A/{i:02d}.nst" for i in range(1, 5)]
+    # Uma listagem; cada página é uma requisição de `page_size` chaves, sem descartar o restante.
+    assert client.list_calls == [("nist/", True)]
+    assert client.start_after_calls == [None, "nist/A/01.nst", "nist/A/03.nst"]
+
+
+def test_list_nists_resumes_after_cursor() -> None:
+    client = DummyClient()
+    client.objects = [DummyObject(f"nist/A/{i:02d}.nst") for i in range(4)]
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    assert list(adapter.list_nists(start_after="nist/A/01.nst")) == ["nist/A/02.nst", "nist/A/03.nst"]
+
+
+def test_list_nist_objects_exposes_etag_and_size() -> None:
+    client = DummyClient()
+    client.objects = [
+        DummyObject("nist/A/sample.nst", etag='"abc"', size=10),
+        DummyObject("nist/A/multi.nst", etag='"def-3"', size=20),
+        DummyObject("nist/A/sample.txt"),
+    ]
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    infos = list(adapter.list_nist_objects())
+
+    assert [(i.key, i.etag, i.size) for i in infos] == [
+        ("nist/A/sample.nst", "abc", 10),
+        ("nist/A/multi.nst", "def-3", 20),
+    ]
+    assert infos[0].single_part_md5 == "abc"
+    assert infos[1].single_part_md5 is None
 
 
 def test_read_bytes_releases_response() -> None:
@@ -128,6 +254,58 @@ def test_read_bytes_releases_response() -> None:
     assert client.last_response.released is True
 
 
+def _header_payload(origin: bytes, image_size: int) -> bytes:
+    type1 = b"1.001:0000\x1d1.003:1\x1f1\x1e10\x1f1\x1d1.008:" + origin + b"\x1c"
+    type1 = type1.replace(b"0000", str(len(type1)).zfill(4).encode())
+    return type1 + b"10.001:99999\x1d10.999:" + b"\xff" * image_size
+
+
+def test_read_header_fetches_only_type1_record() -> None:
+    client = DummyClient()
+    client._response_payload = _header_payload(b"TSE", image_size=4096)
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    header = adapter.read_header("nist/A/sample.nst")
+
+    assert header.endswith(b"1.008:TSE\x1c")
+    assert client.range_calls == [(0, 1024)]
+    assert client.last_response.released is True
+
+
+def test_read_header_issues_follow_up_range_for_long_type1() -> None:
+    client = DummyClient()
+    client._response_payload = _header_payload(b"X" * 100, image_size=4096)
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    header = adapter.read_header("nist/A/sample.nst", max_bytes=32)
+
+    assert header.endswith(b"1.008:" + b"X" * 100 + b"\x1c")
+    assert client.range_calls == [(0, 32), (32, len(header) - 32)]
+
+
+def test_read_header_returns_short_unstructured_payload_as_is() -> None:
+    client = DummyClient()
+    client._response_payload = b"1.08:TSE\n" + b"x" * 20
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    header = adapter.read_header("nist/A/sample.nst", max_bytes=64)
+
+    assert header == client._response_payload
+    assert client.range_calls == [(0, 64)]
+
+
+def test_read_header_reads_rest_of_unstructured_payload_past_window() -> None:
+    client = DummyClient()
+    client._response_payload = b"x" * 2000 + b"\n1.08:TSE\n"
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    header = adapter.read_header("nist/A/sample.nst", max_bytes=64)
+
+    assert header == client._response_payload
+    assert header.endswith(b"1.08:TSE\n")
+    assert client.range_calls == [(0, 64), (64, 0)]
+
+
 def test_move_processed_invokes_copy_and_delete() -> None:
     client = DummyClient()
     adapter = MinioS3Adapter(client=client, bucket="bucket")
@@ -181,8 +359,122 @@ def test_delete_prefix_removes_matching_objects() -> None:
     ]
     adapter = MinioS3Adapter(client=client, bucket="bucket")
 
-    removed = adapter.delete_prefix("nist/")
+    result = adapter.delete_prefix("nist/")
 
-    assert removed == 2
+    assert (result.listed, result.removed, result.failed) == (2, 2, 0)
     assert client.removed == ["nist/A/1.nst", "nist/B/2.nst"]
+    assert client.delete_batches == [["nist/A/1.nst", "nist/B/2.nst"]]
+
+
+def test_delete_prefix_batches_keys_and_counts_failures() -> None:
+    client = DummyClient()
+    client.objects = [DummyObject(f"nist/A/{i:02d}.nst") for i in range(7)]
+    client.failing_deletes = {"nist/A/03.nst"}
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    result = adapter.delete_prefix("nist/", batch_size=3, max_in_flight=2)
+
+    assert sorted(len(batch) for batch in client.delete_batches) == [1, 3, 3]
+    assert (result.listed, result.removed, result.failed) == (7, 6, 1)
+    assert result.errors == {"nist/A/03.nst": "AccessDenied: denied"}
+
+
+def test_delete_prefix_dry_run_only_counts() -> None:
+    client = DummyClient()
+    client.objects = [DummyObject("nist/A/1.nst"), DummyObject("nist/B/2.nst")]
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    result = adapter.delete_prefix("nist/", dry_run=True)
+
+    assert result.dry_run is True
+    assert (result.listed, result.removed) == (2, 0)
+    assert client.delete_batches == []
+
+
+
+def test_move_many_copies_concurrently_and_deletes_sources_in_batches() -> None:
+    client = DummyClient()
+    client.copy_failures = {
+        "nist/A/slow.nst": ("SlowDown", 2),
+        "nist/A/denied.nst": ("AccessDenied", 5),
+    }
+    client.failing_deletes = {"nist/A/keep.nst"}
+    adapter = MinioS3Adapter(client=client, bucket="bucket", retry_backoff=0.0)
+    sources = ["nist/A/1.nst", "nist/A/slow.nst", "nist/A/denied.nst", "nist/A/keep.nst"]
+
+    result = adapter.move_many(((src, src.replace("nist/", "nist-lidos/")) for src in sources), max_workers=2)
+
+    assert sorted(result.moved) == ["nist/A/1.nst", "nist/A/slow.nst"]
+    assert set(result.failed) == {"nist/A/denied.nst", "nist/A/keep.nst"}
+    assert "origem não removida" in result.failed["nist/A/keep.nst"]
+    assert sorted(src for _, src in client.copies) == ["nist/A/1.nst", "nist/A/keep.nst", "nist/A/slow.nst"]
+    assert len(client.delete_batches) == 1
+
+
+def test_mark_processed_tags_object_without_copying() -> None:
+    client = DummyClient()
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    adapter.mark_processed("nist/A/1.nst")
+
+    assert client.tagged == [("nist/A/1.nst", {"mitra-status": "processed"})]
+    assert client.copies == [] and client.removed == []
+
+
+def test_upload_file_streams_from_disk_with_multipart_threshold(tmp_path: Path) -> None:
+    client = DummyClient()
+    adapter = MinioS3Adapter(client=client, bucket="bucket", multipart_threshold=1024)
+    path = tmp_path / "1.nst"
+    path.write_bytes(b"conteudo")
+
+    md5_hash = adapter.upload_file("nist/A/1.nst", path)
+
+    # O S3 exige partes de pelo menos 5 MiB.
+    assert client.file_uploads == [("nist/A/1.nst", b"conteudo", 8, 5 * 1024 * 1024)]
+    assert md5_hash == hashlib.md5(b"conteudo").hexdigest()
+
+
+def test_upload_stream_returns_md5_and_checks_single_part_etag() -> None:
+    import io
+
+    client = DummyClient()
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+
+    assert adapter.upload_stream("nist/A/1.nst", io.BytesIO(b"abc")) == "900150983cd24fb0d6963f7d28e17f72"
+    assert client.file_uploads[0][2] == -1
+
+    client.etag_override = "0" * 32
+    with pytest.raises(UploadChecksumError):
+        adapter.upload_stream("nist/A/2.nst", io.BytesIO(b"abc"))
+    # O objeto divergente é removido do bucket.
+    assert client.removed == ["nist/A/2.nst"]
+    # ETag de multipart não é um md5 e não é comparado.
+    client.etag_override = "abc-2"
+    adapter.upload_stream("nist/A/3.nst", io.BytesIO(b"abc"))
+
+
+def test_upload_skips_etag_check_for_sse_kms_and_sse_c() -> None:
+    import io
+
+    client = DummyClient()
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
+    client.etag_override = "0" * 32
+
+    client.put_headers = {"x-amz-server-side-encryption": "aws:kms"}
+    assert adapter.upload_stream("nist/A/1.nst", io.BytesIO(b"abc")) == "900150983cd24fb0d6963f7d28e17f72"
+    client.put_headers = {"x-amz-server-side-encryption-customer-algorithm": "AES256"}
+    adapter.upload_stream("nist/A/2.nst", io.BytesIO(b"abc"))
+    # SSE-S3 mantém o MD5 no ETag e continua verificado.
+    client.put_headers = {"x-amz-server-side-encryption": "AES256"}
+    with pytest.raises(UploadChecksumError):
+        adapter.upload_stream("nist/A/3.nst", io.BytesIO(b"abc"))
+    assert client.removed == ["nist/A/3.nst"]
+
+
+def test_iter_bytes_streams_chunks_and_releases_connection() -> None:
+    client = DummyClient()
+    client._response_payload = b"0123456789"
+    adapter = MinioS3Adapter(client=client, bucket="bucket")
 
+    assert list(adapter.iter_bytes("nist/A/1.nst", chunk_size=4)) == [b"0123", b"4567", b"89"]
+    assert client.last_response.closed and client.last_response.released
@@ -1,6 +1,13 @@
 import pytest
 
-from infra.sanitizers import sanitize_text, parse_date, normalize_sex
+from infra.sanitizers import (
+    normalize_sex,
+    normalize_sexes,
+    parse_date,
+    parse_dates,
+    sanitize_text,
+    sanitize_texts,
+)
 
 
 def test_sanitize_text_removes_accents_and_whitespace():
@@ -23,3 +30,28 @@ def test_normalize_sex_maps_codes_to_letters():
     assert normalize_sex(None) == "U"
     assert normalize_sex("feminino") == "F"
     assert normalize_sex("masc") == "M"
+
+
+def test_sanitize_text_handles_characters_outside_latin_table():
+    assert sanitize_text("\ufb01cha \uff21") == "FICHA A"
+    assert sanitize_text("a\x1cb") == "A B"
+
+
+def test_parse_date_detects_format_from_shape():
+    assert str(parse_date("1987-01-15")) == "1987-01-15"
+    assert str(parse_date("1987/1/5")) == "1987-01-05"
+    assert str(parse_date("15.01.1987")) == "1987-01-15"
+    assert parse_date("19871315") is None
+    assert parse_date("1987-01/15") is None
+    assert parse_date("1987115") is None
+
+
+def test_batch_variants_keep_order_and_match_scalar_results():
+    names = [" Jo\u00E3o ", None, " Jo\u00E3o ", "\u00C1gata"]
+    dates = ["19870115", "", "15/01/1987", None]
+    sexes = ["1", "feminino", None, "x"]
+
+    assert sanitize_texts(names) == [sanitize_text(v) for v in names]
+    assert parse_dates(dates) == [parse_date(v) for v in dates]
+    assert normalize_sexes(sexes) == ["M", "F", "U", "U"]
+    assert sanitize_texts(iter([])) == []
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from project.application.services.checksum_service import ChecksumService
+from project.application.services.nist_parser_service import NistParserService
+from project.application.usecases.upload_batch_usecase import UploadBatchUseCase
+from project.infra.mapped_file import MappedFileReader
+
+TYPE1 = b"1.001:29\x1d1.003:1\x1f0\x1d1.008:TSE\x1c"
+
+
+class DummyS3:
+    def __init__(self, existing: set[str] | None = None) -> None:
+        self.existing = existing or set()
+        self.uploads: list[tuple[str, bytes]] = []
+
+    def object_exists(self, key: str) -> bool:
+        return key in self.existing
+
+    def upload_file(self, key: str, path: Path) -> str:
+        self.uploads.append((key, path.read_bytes()))
+        return ChecksumService().md5_bytes(path.read_bytes())
+
+
+def test_execute_uploads_in_parallel_and_keeps_summary_format(tmp_path: Path) -> None:
+    new = tmp_path / "new.nst"
+    new.write_bytes(TYPE1 + b"\x00" * 5000)
+    existing = tmp_path / "old.nst"
+    existing.write_bytes(TYPE1)
+    missing = tmp_path / "missing.nst"
+    s3 = DummyS3(existing={"nist-lidos/TSE/old.nst"})
+    usecase = UploadBatchUseCase(s3=s3, nist_tools=NistParserService(), file_reader=MappedFileReader(), workers=3)
+
+    summary = usecase.execute([new, existing, missing])
+
+    assert [entry["status"] for entry in summary] == ["uploaded", "skipped_exists", "error"]
+    assert summary[0] == {"file": str(new), "status": "uploaded", "key": "nist/TSE/new.nst"}
+    assert summary[1]["key"] == "nist/TSE/old.nst"
+    assert s3.uploads == [("nist/TSE/new.nst", new.read_bytes())]
+    stats = usecase.stats
+    assert (stats.files, stats.uploaded, stats.skipped, stats.errors) == (3, 1, 1, 1)
+    assert stats.bytes_uploaded == len(TYPE1) + 5000
+
+
+def test_legacy_text_file_larger_than_window_is_read_entirely(tmp_path: Path) -> None:
+    legacy = tmp_path / "legacy.nst"
+    legacy.write_bytes(b"x" * 100 + b"\n1.08:TSE\n")
+    s3 = DummyS3()
+
+    class FullLoadParser(NistParserService):
+        def load(self, data):  # noqa: ANN001, ANN201
+            raise AssertionError("a chave depende apenas do Tipo-1")
+
+    class RecordingReader(MappedFileReader):
+        def __init__(self) -> None:
+            self.opened: list[Path] = []
+
+        def open(self, path):  # noqa: ANN001, ANN201
+            self.opened.append(path)
+            return super().open(path)
+
+    reader = RecordingReader()
+    usecase = UploadBatchUseCase(s3=s3, nist_tools=FullLoadParser(), file_reader=reader, header_bytes=16)
+
+    summary = usecase.execute([legacy])
+
+    assert summary == [{"file": str(legacy), "status": "uploaded", "key": "nist/TSE/legacy.nst"}]
+    assert reader.opened == [legacy]
+
+
+class DummyIndex:
+    def __init__(self, existing: set[str]) -> None:
+        self.existing = existing
+        self.added: list[str] = []
+
+    def exists_any(self, keys) -> bool:  # noqa: ANN001
+        return any(key in self.existing for key in keys)
+
+    def add(self, key: str) -> None:
+        self.added.append(key)
+
+
+def test_key_index_replaces_head_requests(tmp_path: Path) -> None:
+    first = tmp_path / "a.nst"
+    first.write_bytes(TYPE1)
+    second = tmp_path / "b.nst"
+    second.write_bytes(TYPE1)
+
+    class NoHeadS3(DummyS3):
+        def object_exists(self, key: str) -> bool:
+            raise AssertionError("HEAD nao esperado")
+
+    index = DummyIndex(existing={"nist/TSE/b.nst"})
+    usecase = UploadBatchUseCase(
+        s3=NoHeadS3(),
+        nist_tools=NistParserService(),
+        file_reader=MappedFileReader(),
+        key_index=index,
+    )
+
+    summary = usecase.execute([first, second])
+
+    assert [entry["status"] for entry in summary] == ["uploaded", "skipped_exists"]
+    assert index.added == ["nist/TSE/a.nst"]
+
+
+def test_manifest_skips_unchanged_files_without_reading(tmp_path: Path) -> None:
+    from project.infra.local_manifest import SqliteManifest
+
+    nst = tmp_path / "a.nst"
+    nst.write_bytes(TYPE1)
+    manifest = SqliteManifest(tmp_path / "manifest.sqlite3")
+    s3 = DummyS3()
+    first = UploadBatchUseCase(
+        s3=s3,
+        nist_tools=NistParserService(),
+        file_reader=MappedFileReader(),
+        manifest=manifest,
+        checksum=ChecksumService(),
+    )
+    first.execute([nst])
+
+    class NoParse(NistParserService):
+        def load(self, data):  # noqa: ANN001, ANN201
+            raise AssertionError("parse nao esperado")
+
+        load_header = load
+
+    second = UploadBatchUseCase(
+        s3=s3,
+        nist_tools=NoParse(),
+        file_reader=MappedFileReader(),
+        manifest=manifest,
+        checksum=ChecksumService(),
+    )
+    summary = second.execute([nst])
+
+    assert summary == [{"file": str(nst), "status": "skipped_unchanged", "key": "nist/TSE/a.nst"}]
+    assert second.stats.unchanged == 1
+    assert len(s3.uploads) == 1
+    entry = manifest.get(str(nst.resolve()), nst.stat().st_size, nst.stat().st_mtime_ns)
+    assert entry is not None and entry.md5_hash == ChecksumService().md5_bytes(TYPE1) and entry.origin == "TSE"
+    manifest.close()
+
+
+def test_manifest_is_keyed_by_resolved_path(tmp_path: Path, monkeypatch) -> None:  # noqa: ANN001
+    from project.infra.local_manifest import SqliteManifest
+
+    (tmp_path / "a.nst").write_bytes(TYPE1)
+    monkeypatch.chdir(tmp_path)
+    manifest = SqliteManifest(tmp_path / "manifest.sqlite3")
+    UploadBatchUseCase(
+        s3=DummyS3(),
+        nist_tools=NistParserService(),
+        file_reader=MappedFileReader(),
+        manifest=manifest).execute([Path("a.nst")],
+    )
+
+    second = UploadBatchUseCase(
+        s3=DummyS3(),
+        nist_tools=NistParserService(),
+        file_reader=MappedFileReader(),
+        manifest=manifest,
+    )
+    summary = second.execute([tmp_path / "a.nst"])
+
+    assert summary[0]["status"] == "skipped_unchanged"
+    manifest.close()
+
+
+def test_manifest_failure_after_upload_still_reports_uploaded(tmp_path: Path) -> None:
+    nst = tmp_path / "a.nst"
+    nst.write_bytes(TYPE1)
+
+    class BrokenManifest:
+        def get(self, path: str, size: int, mtime_ns: int) -> None:  # noqa: ARG002
+            return None
+
+        def record_upload(self, entry) -> None:  # noqa: ANN001
+            raise OSError("database is locked")
+
+    index = DummyIndex(existing=set())
+    usecase = UploadBatchUseCase(
+        s3=DummyS3(),
+        nist_tools=NistParserService(),
+        file_reader=MappedFileReader(),
+        key_index=index,
+        manifest=BrokenManifest(),
+    )
+
+    summary = usecase.execute([nst])
+
+    assert summary == [
+        {"file": str(nst), "status": "uploaded", "key": "nist/TSE/a.nst", "manifest_error": "database is locked"}
+    ]
+    assert index.added == ["nist/TSE/a.nst"]
+    assert (usecase.stats.uploaded, usecase.stats.errors, usecase.stats.manifest_errors) == (1, 0, 1)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
+from project.application.services.nist_parser_service import ParsedNist
 from project.application.usecases.upload_nist_usecase import UploadNistUseCase
 
 
@@ -9,12 +12,34 @@ class DummyS3:
     def __init__(self) -> None:
         self.calls: list[tuple[str, bytes]] = []
 
-    def upload_bytes(self, key: str, raw: bytes) -> None:
-        self.calls.append((key, raw))
+    def upload_file(self, key: str, path: Path) -> str:
+        self.calls.append((key, path.read_bytes()))
+        return ""
+
+
+class DummyReader:
+    def __init__(self) -> None:
+        self.opened: list[Path] = []
+
+    @contextmanager
+    def open(self, path: Path) -> Iterator[memoryview]:
+        self.opened.append(path)
+        yield memoryview(path.read_bytes())
 
 
 class DummyParser:
-    def compose_key_for_upload(self, filename: str, raw: bytes) -> str:  # noqa: ARG002
+    def __init__(self) -> None:
+        self.loaded: list[bytes] = []
+        self.parsed: list[ParsedNist] = []
+
+    def load_header(self, raw) -> ParsedNist:  # noqa: ANN001
+        # O conteudo chega pelo leitor injetado, nao como copia em bytes.
+        assert not isinstance(raw, bytes)
+        self.loaded.append(bytes(raw))
+        self.parsed.append(ParsedNist(raw=raw))
+        return self.parsed[-1]
+
+    def compose_key_for_upload(self, filename: str, nist: ParsedNist) -> str:  # noqa: ARG002
         return f"nist/TSE/{filename}"
 
 
@@ -25,10 +50,15 @@ def test_execute_reads_file_and_uploads(tmp_path: Path) -> None:
 
     s3 = DummyS3()
     parser = DummyParser()
+    reader = DummyReader()
 
-    usecase = UploadNistUseCase(s3=s3, nist_tools=parser)
+    usecase = UploadNistUseCase(s3=s3, nist_tools=parser, file_reader=reader)
 
     key = usecase.execute(str(target))
 
     assert key == "nist/TSE/sample.nst"
+    assert reader.opened == [target]
     assert s3.calls == [("nist/TSE/sample.nst", payload)]
+    assert parser.loaded == [payload]
+    # O NIST nao guarda o buffer ja liberado.
+    assert parser.parsed[0].raw == b""
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from hashlib import md5
+
+from project.application.services.nist_parser_service import NistParserService
+from project.application.usecases.upload_url_usecase import UploadUrlUseCase, filename_for_url
+from project.infra.http_downloader import HttpDownloader
+
+TYPE1 = b"1.001:29\x1d1.003:1\x1f0\x1d1.008:TSE\x1c"
+
+
+class DummyS3:
+    def __init__(self, existing: set[str] | None = None, part_size: int = 1024) -> None:
+        self.existing = existing or set()
+        self.part_size = part_size
+        self.uploads: dict[str, bytes] = {}
+        self.reads: list[int] = []
+
+    def object_exists(self, key: str) -> bool:
+        return key in self.existing
+
+    def upload_stream(self, key: str, stream) -> None:  # noqa: ANN001
+        parts = []
+        while True:
+            chunk = stream.read(self.part_size)
+            if not chunk:
+                break
+            self.reads.append(len(chunk))
+            parts.append(chunk)
+        self.uploads[key] = b"".join(parts)
+        return md5(self.uploads[key]).hexdigest()
+
+
+def test_filename_for_url() -> None:
+    assert filename_for_url("https://h/a/b%20c.nst?x=1") == "b c.nst"
+    assert filename_for_url("https://h/a/b") == "b.nst"
+    assert filename_for_url("https://h/", "nome") == "nome.nst"
+
+
+def test_execute_streams_bodies_and_computes_md5(http_server) -> None:  # noqa: ANN001
+    big = TYPE1 + b"\x00" * 10_000
+    http_server.routes = {"/a.nst": big, "/old.nst": TYPE1, "/b": TYPE1}
+    s3 = DummyS3(existing={"nist-lidos/TSE/old.nst"})
+    usecase = UploadUrlUseCase(s3=s3, nist_tools=NistParserService(), downloader=HttpDownloader(), workers=3)
+
+    summary = usecase.execute(
+        [
+            (http_server.url("/a.nst"), None),
+            (http_server.url("/old.nst"), None),
+            (http_server.url("/b"), "renomeado"),
+            (http_server.url("/ausente.nst"), None),
+        ]
+    )
+
+    assert summary[0] == {
+        "url": http_server.url("/a.nst"),
+        "status": "uploaded",
+        "key": "nist/TSE/a.nst",
+        "size": len(big),
+        "md5": md5(big).hexdigest(),
+    }
+    assert summary[1]["status"] == "skipped_exists"
+    assert summary[2]["key"] == "nist/TSE/renomeado.nst"
+    assert summary[3]["status"] == "error"
+    assert s3.uploads["nist/TSE/a.nst"] == big
+    # O corpo segue em partes, sem ser montado inteiro antes do envio.
+    assert max(s3.reads) <= s3.part_size
+    stats = usecase.stats
+    assert (stats.files, stats.uploaded, stats.skipped, stats.errors) == (4, 2, 1, 1)
+    assert stats.bytes_uploaded == len(big) + len(TYPE1)
+
+
+def test_legacy_text_body_larger_than_window_is_read_entirely(http_server) -> None:  # noqa: ANN001
+    legacy = b"x" * 100 + b"\n1.08:TSE\n"
+    http_server.routes = {"/legacy.nst": legacy}
+    s3 = DummyS3()
+    usecase = UploadUrlUseCase(s3=s3, nist_tools=NistParserService(), downloader=HttpDownloader(), header_bytes=16)
+
+    summary = usecase.execute([(http_server.url("/legacy.nst"), None)])
+
+    assert summary[0]["key"] == "nist/TSE/legacy.nst"
+    assert s3.uploads["nist/TSE/legacy.nst"] == legacy
+    assert summary[0]["md5"] == md5(legacy).hexdigest()
+
+
+def test_journal_skips_urls_completed_in_previous_runs(http_server, tmp_path) -> None:  # noqa: ANN001
+    from project.infra.url_journal import SqliteUrlJournal
+
+    http_server.routes = {"/a.nst": TYPE1, "/old.nst": TYPE1}
+    items = [(http_server.url(path), None) for path in ("/a.nst", "/old.nst", "/b.nst")]
+    journal = SqliteUrlJournal(tmp_path / "journal.sqlite3")
+    s3 = DummyS3(existing={"nist/TSE/old.nst"})
+    first = UploadUrlUseCase(s3=s3, nist_tools=NistParserService(), downloader=HttpDownloader(), journal=journal)
+    assert [entry["status"] for entry in first.execute(items)] == ["uploaded", "skipped_exists", "error"]
+
+    # Na retomada, apenas a URL que falhou volta a ser baixada.
+    http_server.routes["/b.nst"] = TYPE1
+    second = UploadUrlUseCase(s3=s3, nist_tools=NistParserService(), downloader=HttpDownloader(), journal=journal)
+    summary = second.execute(items)
+
+    assert summary == [
+        {"url": items[2][0], "status": "uploaded", "key": "nist/TSE/b.nst", "size": len(TYPE1), "md5": md5(TYPE1).hexdigest()}
+    ]
+    assert (second.stats.files, second.stats.already_done) == (1, 2)
+    journal.close()
+
+
+def test_execute_iter_keeps_a_bounded_number_of_urls_in_flight() -> None:
+    from contextlib import contextmanager
+    import io
+
+    class Downloader:
+        @contextmanager
+        def open(self, url: str):  # noqa: ANN201
+            yield io.BytesIO(TYPE1)
+
+    consumed = []
+
+    def items():  # noqa: ANN202
+        for i in range(100):
+            consumed.append(i)
+            yield (f"https://s/{i}.nst", None)
+
+    usecase = UploadUrlUseCase(s3=DummyS3(), nist_tools=NistParserService(), downloader=Downloader(), workers=2)
+    results = usecase.execute_iter(items())
+
+    assert next(results)["key"] == "nist/TSE/0.nst"
+    assert len(consumed) == 4
+    assert len(list(results)) == 99
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import io
+import json
+
+import pytest
+
+from project.infra.url_index import UrlIndexError, iter_json_index, iter_text_index
+
+
+def test_json_index_yields_entries_across_chunk_boundaries() -> None:
+    entries = [f"https://servidor/{i}/arquivo-ç.nst" for i in range(50)]
+    entries.append({"url": "https://servidor/obj", "filename": "nome.nst"})
+    payload = json.dumps([*entries, 7, {"sem_url": 1}], ensure_ascii=False, indent=1).encode("utf-8")
+
+    for chunk_size in (1, 3, 64, 1 << 16):
+        result = list(iter_json_index(io.BytesIO(payload), chunk_size=chunk_size))
+        assert result[:50] == [(url, None) for url in entries[:50]]
+        assert result[50:] == [("https://servidor/obj", "nome.nst")]
+
+
+def test_json_index_is_consumed_incrementally() -> None:
+    class Stream(io.BytesIO):
+        def read(self, size: int = -1) -> bytes:
+            self.calls = getattr(self, "calls", 0) + 1
+            return super().read(size)
+
+    stream = Stream(json.dumps([f"https://s/{i}.nst" for i in range(1000)]).encode())
+    entries = iter_json_index(stream, chunk_size=32)
+
+    assert next(entries) == ("https://s/0.nst", None)
+    assert stream.tell() < 64
+
+
+@pytest.mark.parametrize("payload", [b'{"url": "x"}', b'["a", "b"', b'["a" "b"]', b'["a", {]'])
+def test_json_index_rejects_invalid_payloads(payload: bytes) -> None:
+    with pytest.raises(UrlIndexError):
+        list(iter_json_index(io.BytesIO(payload), chunk_size=2))
+
+
+def test_text_index_skips_blank_lines_and_handles_split_lines() -> None:
+    payload = b"https://s/1.nst\r\n\n  https://s/2.nst  \nhttps://s/3.nst"
+
+    result = list(iter_text_index(io.BytesIO(payload), chunk_size=4))
+
+    assert result == [("https://s/1.nst", None), ("https://s/2.nst", None), ("https://s/3.nst", None)]